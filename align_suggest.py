@@ -0,0 +1,190 @@
+import re
+import zlib
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Numbers and Latin acronyms (HP, SSS, ...) survive translation unchanged
+ANCHOR_PATTERN = re.compile(r"\d+(?:[.,]\d+)*|(?<![A-Za-z])[A-Z]{2,}(?![A-Za-z])")
+QUOTE_STARTS = ('"', "'", "“", "‘", "「", "『", "-", "—")
+FINGERPRINT_BITS = 64
+
+# Relative weight of each signal in the pair score (tuned on output/ aligned files)
+LENGTH_WEIGHT = 1.0
+PARAGRAPH_WEIGHT = 3.0
+DIALOGUE_WEIGHT = 3.0
+POSITION_WEIGHT = 1.5
+ANCHOR_WEIGHT = 0.1
+
+
+def anchor_tokens(content: str) -> set:
+    """Return the set of language-independent tokens (numbers, acronyms) in a text."""
+    return {token.replace(",", "") for token in ANCHOR_PATTERN.findall(content)}
+
+
+def compute_features(chapters: Sequence[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Compute per-chapter feature vectors.
+
+    Returns arrays of length, paragraph count, dialogue ratio and a hashed bitset
+    fingerprint of anchor tokens.
+    """
+    n = len(chapters)
+    lengths = np.zeros(n, dtype=np.float64)
+    paragraphs = np.zeros(n, dtype=np.float64)
+    dialogue = np.zeros(n, dtype=np.float64)
+    fingerprints = np.zeros((n, FINGERPRINT_BITS), dtype=bool)
+
+    for i, chapter in enumerate(chapters):
+        content = chapter.get("content", "") or ""
+        lines = [line.strip() for line in content.split("\n") if line.strip()]
+
+        lengths[i] = len(content)
+        paragraphs[i] = len(lines)
+        if lines:
+            dialogue[i] = sum(line.startswith(QUOTE_STARTS) for line in lines) / len(
+                lines
+            )
+
+        for token in anchor_tokens(content):
+            fingerprints[i, zlib.crc32(token.encode("utf-8")) % FINGERPRINT_BITS] = True
+
+    return {
+        "length": lengths,
+        "paragraphs": paragraphs,
+        "dialogue": dialogue,
+        "fingerprint": fingerprints,
+    }
+
+
+def _log_offset(korean: np.ndarray, english: np.ndarray) -> float:
+    """Typical log-ratio between English and Korean values of one feature."""
+    return float(np.median(np.log1p(english)) - np.median(np.log1p(korean)))
+
+
+def score_band(
+    korean_features: Dict[str, np.ndarray],
+    english_features: Dict[str, np.ndarray],
+    band: int = 15,
+):
+    """
+    Score every Korean chapter against English chapters in a band around the diagonal.
+
+    Returns (candidates, scores), both shaped (n_korean, 2 * band + 1). Candidate
+    slots that fall outside the English range get index -1 and score -inf.
+    """
+    n_kr = len(korean_features["length"])
+    n_en = len(english_features["length"])
+
+    # Expected English position for each Korean chapter, then the band around it
+    expected = np.round(np.arange(n_kr) * (n_en / max(n_kr, 1))).astype(np.int64)
+    offsets = np.arange(-band, band + 1)
+    candidates = expected[:, None] + offsets[None, :]
+    valid = (candidates >= 0) & (candidates < n_en)
+    safe = np.clip(candidates, 0, max(n_en - 1, 0))
+
+    def log_cost(name):
+        kr = np.log1p(korean_features[name])[:, None]
+        en = np.log1p(english_features[name])[safe]
+        offset = _log_offset(korean_features[name], english_features[name])
+        return np.abs(en - kr - offset)
+
+    cost = (
+        LENGTH_WEIGHT * log_cost("length")
+        + PARAGRAPH_WEIGHT * log_cost("paragraphs")
+        + DIALOGUE_WEIGHT
+        * np.abs(
+            english_features["dialogue"][safe] - korean_features["dialogue"][:, None]
+        )
+        + POSITION_WEIGHT * np.abs(offsets)[None, :] / (band + 1)
+    )
+    structure = np.exp(-cost)
+
+    kr_bits = korean_features["fingerprint"][:, None, :]
+    en_bits = english_features["fingerprint"][safe]
+    intersection = (kr_bits & en_bits).sum(axis=-1)
+    union = (kr_bits | en_bits).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        anchors = np.where(union > 0, intersection / union, structure)
+
+    scores = (1 - ANCHOR_WEIGHT) * structure + ANCHOR_WEIGHT * anchors
+    scores = np.where(valid, scores, -np.inf)
+    candidates = np.where(valid, candidates, -1)
+
+    return candidates, scores
+
+
+def suggest_alignments(
+    korean_chapters: Sequence[Dict],
+    english_chapters: Sequence[Dict],
+    band: int = 15,
+    top_k: int = 3,
+) -> List[Dict]:
+    """
+    Suggest the top-k English chapters for every Korean chapter.
+
+    Returns one entry per Korean chapter:
+    {"korean": idx, "candidates": [{"english": idx, "score": float}, ...]}
+    """
+    if not korean_chapters or not english_chapters:
+        return []
+
+    candidates, scores = score_band(
+        compute_features(korean_chapters), compute_features(english_chapters), band
+    )
+
+    k = min(top_k, scores.shape[1])
+    top = np.argsort(-scores, axis=1)[:, :k]
+    top_candidates = np.take_along_axis(candidates, top, axis=1)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+
+    suggestions = []
+    for kr_idx in range(len(korean_chapters)):
+        suggestions.append(
+            {
+                "korean": kr_idx,
+                "candidates": [
+                    {"english": int(en_idx), "score": round(float(score), 4)}
+                    for en_idx, score in zip(top_candidates[kr_idx], top_scores[kr_idx])
+                    if en_idx >= 0
+                ],
+            }
+        )
+
+    return suggestions
+
+
+def confident_alignments(
+    suggestions: List[Dict],
+    min_score: float = 0.6,
+    min_margin: float = 0.05,
+    used_korean: Sequence[int] = (),
+    used_english: Sequence[int] = (),
+) -> List[Dict]:
+    """
+    Pick 1:1 alignments from suggestions whose best match is clearly ahead.
+
+    Suggestions are taken best-first; a chapter already used on either side is skipped.
+    """
+    used_kr = set(used_korean)
+    used_en = set(used_english)
+
+    picks = []
+    for suggestion in suggestions:
+        candidates = suggestion["candidates"]
+        if not candidates or suggestion["korean"] in used_kr:
+            continue
+        best = candidates[0]
+        runner_up = candidates[1]["score"] if len(candidates) > 1 else 0.0
+        if best["score"] >= min_score and best["score"] - runner_up >= min_margin:
+            picks.append((best["score"], suggestion["korean"], best["english"]))
+
+    alignments = []
+    for _, kr_idx, en_idx in sorted(picks, reverse=True):
+        if kr_idx in used_kr or en_idx in used_en:
+            continue
+        used_kr.add(kr_idx)
+        used_en.add(en_idx)
+        alignments.append({"english": [en_idx], "korean": [kr_idx]})
+
+    return sorted(alignments, key=lambda a: a["korean"][0])
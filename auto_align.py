@@ -1,16 +1,17 @@
 import argparse
-import json
 import logging
 import os
 
+import edit_journal
+import json_io
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 
 def load_chapters(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        logger.info(f"Loading chapters from {file_path}")
-        return json.load(f)
+    logger.info(f"Loading chapters from {file_path}")
+    return json_io.read_json(file_path)
 
 
 def align_chapters(korean_chapters, english_chapters):
@@ -26,8 +27,8 @@ def align_chapters(korean_chapters, english_chapters):
 
 
 def save_aligned_chapters(aligned_chapters, output_path):
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(aligned_chapters, f, ensure_ascii=False, indent=4)
+    json_io.write_json(output_path, aligned_chapters)
+    edit_journal.discard(output_path)
 
 
 if __name__ == "__main__":
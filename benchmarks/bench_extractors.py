@@ -0,0 +1,244 @@
+"""
+Offline benchmark and regression check for the site extractors.
+
+Every fixture is a saved chapter page (<name>.html) plus a sidecar (<name>.json)
+holding the page URL and the expected output of each BaseExtractor method.
+
+    python -m benchmarks.bench_extractors                # benchmark + check
+    python -m benchmarks.bench_extractors --update       # accept current output
+    python -m benchmarks.bench_extractors --record novelfire chapter_58 <url>
+"""
+
+import argparse
+import difflib
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from scrapy.http import HtmlResponse
+
+from scraper.extractors import (
+    BookTokiExtractor,
+    LightNovelPubExtractor,
+    MythicRegressorExtractor,
+    NovelFireExtractor,
+    WeTriedTlsExtractor,
+)
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures" / "extractors"
+
+EXTRACTORS = {
+    "booktoki": BookTokiExtractor,
+    "lightnovelpub": LightNovelPubExtractor,
+    "mythic_regressor": MythicRegressorExtractor,
+    "novelfire": NovelFireExtractor,
+    "wetriedtls": WeTriedTlsExtractor,
+}
+
+METHODS = [
+    "extract_novel_title",
+    "extract_chapter_number",
+    "extract_content",
+    "extract_next_chapter_url",
+    "extract_prev_chapter_url",
+]
+
+
+def load_fixtures(sites=None):
+    """Yield (site, name, html_bytes, meta) for every recorded page"""
+    for html_path in sorted(FIXTURE_DIR.glob("*/*.html")):
+        site = html_path.parent.name
+        if sites and site not in sites:
+            continue
+        meta_path = html_path.with_suffix(".json")
+        meta = {}
+        if meta_path.exists():
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        yield site, html_path.stem, html_path.read_bytes(), meta
+
+
+def extract_all(extractor, url, body):
+    # A fresh response per call so selector parsing is part of the measurement
+    response = HtmlResponse(url=url, body=body, encoding="utf-8")
+    return {method: getattr(extractor, method)(response) for method in METHODS}
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def benchmark_page(extractor, url, body, iterations):
+    """Return per-page latencies (seconds) and traced peak memory (bytes)"""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        extract_all(extractor, url, body)
+        latencies.append(time.perf_counter() - start)
+
+    # Memory is measured in a separate pass; tracing slows everything down
+    tracemalloc.start()
+    extract_all(extractor, url, body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return latencies, peak
+
+
+def check_output(site, name, output, expected):
+    """Print a diff for every method whose output changed; return True if all match"""
+    ok = True
+    for method in METHODS:
+        if method not in expected:
+            continue
+        if output[method] != expected[method]:
+            ok = False
+            print(f"❌ {site}/{name}: {method} changed")
+            diff = difflib.unified_diff(
+                str(expected[method]).splitlines(),
+                str(output[method]).splitlines(),
+                fromfile="expected",
+                tofile="actual",
+                lineterm="",
+            )
+            for line in diff:
+                print(f"      {line}")
+    return ok
+
+
+def run(sites=None, iterations=50, update=False, output_file=None):
+    extractors = {site: cls() for site, cls in EXTRACTORS.items()}
+    results = {}
+    all_ok = True
+
+    for site, name, body, meta in load_fixtures(sites):
+        extractor = extractors[site]
+        url = meta.get("url", f"https://{site}.invalid/{name}")
+        output = extract_all(extractor, url, body)
+
+        if update:
+            meta_path = FIXTURE_DIR / site / f"{name}.json"
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"url": url, "expected": output}, f, ensure_ascii=False, indent=2
+                )
+            print(f"📝 Updated {site}/{name}")
+        elif not check_output(site, name, output, meta.get("expected", {})):
+            all_ok = False
+
+        latencies, peak = benchmark_page(extractor, url, body, iterations)
+        site_result = results.setdefault(
+            site, {"pages": 0, "latencies": [], "peak_bytes": []}
+        )
+        site_result["pages"] += 1
+        site_result["latencies"].extend(latencies)
+        site_result["peak_bytes"].append(peak)
+
+    summary = {}
+    print(
+        f"\n{'site':<18}{'pages':>6}{'pages/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'peak KiB':>10}"
+    )
+    for site, result in sorted(results.items()):
+        latencies = result["latencies"]
+        summary[site] = {
+            "pages": result["pages"],
+            "pages_per_sec": len(latencies) / sum(latencies),
+            "p50_ms": percentile(latencies, 0.50) * 1000,
+            "p99_ms": percentile(latencies, 0.99) * 1000,
+            "peak_kib_per_page": statistics.mean(result["peak_bytes"]) / 1024,
+        }
+        row = summary[site]
+        print(
+            f"{site:<18}{row['pages']:>6}{row['pages_per_sec']:>10.1f}"
+            f"{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}{row['peak_kib_per_page']:>10.1f}"
+        )
+
+    if output_file:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(
+                {"iterations": iterations, "sites": summary},
+                f,
+                ensure_ascii=False,
+                indent=2,
+            )
+        print(f"\nResults saved to {output_file}")
+
+    if not all_ok:
+        print("\n❌ Extractor output changed; rerun with --update if this is intended")
+    return all_ok
+
+
+def record(site, name, url):
+    """Fetch a live page and save it as a new fixture with its current output"""
+    import requests
+
+    response = requests.get(
+        url,
+        headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"},
+        timeout=60,
+    )
+    response.raise_for_status()
+
+    site_dir = FIXTURE_DIR / site
+    site_dir.mkdir(parents=True, exist_ok=True)
+    (site_dir / f"{name}.html").write_bytes(response.content)
+
+    output = extract_all(EXTRACTORS[site](), url, response.content)
+    with open(site_dir / f"{name}.json", "w", encoding="utf-8") as f:
+        json.dump({"url": url, "expected": output}, f, ensure_ascii=False, indent=2)
+
+    print(f"📝 Recorded {site}/{name} from {url}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark extractors on recorded pages and check their output."
+    )
+
+    parser.add_argument(
+        "--site",
+        nargs="+",
+        choices=sorted(EXTRACTORS),
+        help="Only run these sites (default: all)",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=50,
+        help="Timed extractions per page (default: 50)",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Store the current output as the expected output",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write the benchmark summary to this JSON file",
+    )
+    parser.add_argument(
+        "--record",
+        nargs=3,
+        metavar=("SITE", "NAME", "URL"),
+        help="Fetch URL and save it as fixture SITE/NAME",
+    )
+
+    args = parser.parse_args()
+
+    if args.record:
+        record(*args.record)
+        sys.exit(0)
+
+    ok = run(
+        sites=args.site,
+        iterations=args.iterations,
+        update=args.update,
+        output_file=args.output,
+    )
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,171 @@
+"""
+Load/save benchmark for json_io against the standard json module.
+
+Runs on the chapter and aligned files under output/ (or the given files) and
+compares, per file:
+    load:  json.load, json_io.read_json, json_io.iter_json_array, read_json on .zst
+    save:  json.dump(indent=2), json_io.write_json (atomic, fsynced), write_json to .zst
+plus the traced peak memory of a full load against streaming the same array.
+
+    python -m benchmarks.bench_json_io
+    python -m benchmarks.bench_json_io --repeat 10 --output bench_json_io.json
+"""
+
+import argparse
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import json_io
+
+
+def find_files(root):
+    """Chapter lists and aligned files, skipping hidden files and index folders"""
+    return [
+        path
+        for path in sorted(Path(root).rglob("*.json"))
+        if not any(part.startswith(".") for part in path.relative_to(root).parts)
+        and not path.name.endswith("_report.json")
+    ]
+
+
+def timed(fn, repeat):
+    """Median seconds of fn() over repeat runs"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def traced_peak(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def stdlib_load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def stdlib_save(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+def drain(iterator):
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+def bench_file(path, repeat, tmp_dir):
+    data = json_io.read_json(path)
+    size = path.stat().st_size
+    plain = tmp_dir / "bench.json"
+    compressed = tmp_dir / "bench.json.zst"
+    json_io.write_json(compressed, data)
+
+    load = {
+        "json.load": timed(lambda: stdlib_load(path), repeat),
+        "read_json": timed(lambda: json_io.read_json(path), repeat),
+        "iter_json_array": timed(lambda: drain(json_io.iter_json_array(path)), repeat),
+        "read_json .zst": timed(lambda: json_io.read_json(compressed), repeat),
+    }
+    save = {
+        "json.dump": timed(lambda: stdlib_save(plain, data), repeat),
+        "write_json": timed(lambda: json_io.write_json(plain, data), repeat),
+        "write_json .zst": timed(lambda: json_io.write_json(compressed, data), repeat),
+    }
+    memory = {
+        "json.load": traced_peak(lambda: stdlib_load(path)),
+        "iter_json_array": traced_peak(lambda: drain(json_io.iter_json_array(path))),
+    }
+
+    return {
+        "bytes": size,
+        "zst_bytes": compressed.stat().st_size,
+        "items": len(data) if isinstance(data, list) else None,
+        "load_seconds": load,
+        "save_seconds": save,
+        "peak_bytes": memory,
+    }
+
+
+def print_table(title, rows, baseline, size):
+    print(f"   {title}")
+    for name, seconds in rows.items():
+        speedup = rows[baseline] / seconds if seconds else float("inf")
+        print(
+            f"      {name:<18}{seconds * 1000:>9.1f} ms"
+            f"{size / seconds / 1e6 if seconds else 0:>9.1f} MB/s{speedup:>7.2f}x"
+        )
+
+
+def run(files, repeat=5, output_file=None):
+    codec = f"orjson {json_io.orjson.__version__}" if json_io.orjson else "json"
+    print(f"▶ json_io codec: {codec}, median of {repeat} runs")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in files:
+            result = bench_file(path, repeat, Path(tmp))
+            results[str(path)] = result
+
+            print(
+                f"\n{path} ({result['bytes'] / 1e6:.1f} MB, {result['items']} items, "
+                f"{result['zst_bytes'] / 1e6:.1f} MB as .zst)"
+            )
+            print_table("load", result["load_seconds"], "json.load", result["bytes"])
+            print_table("save", result["save_seconds"], "json.dump", result["bytes"])
+            peak = result["peak_bytes"]
+            print(
+                f"   peak memory: json.load {peak['json.load'] / 2**20:.1f} MiB, "
+                f"iter_json_array {peak['iter_json_array'] / 2**20:.1f} MiB"
+            )
+
+    if output_file:
+        json_io.write_json(
+            output_file, {"codec": codec, "repeat": repeat, "files": results}
+        )
+        print(f"\nResults saved to {output_file}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark json_io loads and saves on real chapter files."
+    )
+
+    parser.add_argument(
+        "files",
+        nargs="*",
+        help="JSON files to benchmark (default: every chapter/aligned file in output/)",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Timed runs per operation (default: 5)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Write the results to this JSON file",
+    )
+
+    args = parser.parse_args()
+
+    files = [Path(f) for f in args.files] or find_files("output")
+    if not files:
+        parser.error("no JSON files found in output/")
+    run(files, args.repeat, args.output)
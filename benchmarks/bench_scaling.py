@@ -0,0 +1,464 @@
+"""
+Scaling benchmark for the data pipeline on synthetic corpora.
+
+A synthetic corpus is generated for every scale (see synthetic_corpus) and each
+stage runs on it in a fresh process, timed and with its peak RSS above the RSS
+the process had after imports:
+    auto_align     pair chapters_korean/english.json into aligned.json, per novel
+    prepare        prepare_data.build_shards: cleaning, quality filter, split
+    mix            prepare_data.mix_training_data
+    dedup          dedup.main on the training file
+    search_index   build the editors' search index over the corpus and query it
+    editor_open    load one aligned file with its edit journal, as edit.py does
+    editor_save    journal one edited pair, then compact the journal
+    align_suggest  manual_align's suggestions for one novel
+
+Novels keep the same number of chapters at every scale, so the editor stages
+measure one file and should stay flat; the others should grow linearly.
+
+Each run is appended to benchmarks/results/bench_scaling.jsonl. A stage is flagged
+as superlinear when its time or memory grows faster than corpus size ** 1.25
+between the smallest and largest scale, and as a regression when it is 30% slower
+(or larger) than in the last recorded run on the same host at the same scale.
+
+    python -m benchmarks.bench_scaling                        # 1x and 10x
+    python -m benchmarks.bench_scaling --scales 1 10 100 --check
+"""
+
+import argparse
+import contextlib
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import align_suggest
+import auto_align
+import dedup
+import edit_journal
+import json_io
+import prepare_data
+import search_index
+from benchmarks import synthetic_corpus
+
+RESULTS_FILE = Path(__file__).parent / "results" / "bench_scaling.jsonl"
+# Growth faster than corpus size ** SUPERLINEAR_EXPONENT is flagged
+SUPERLINEAR_EXPONENT = 1.25
+# Slower or larger than the last run by this share is flagged
+REGRESSION_TOLERANCE = 0.3
+# Below these, timing and RSS noise outweighs the trend
+MIN_SECONDS = 1.0
+MIN_PEAK_MIB = 50
+SEARCH_QUERIES = ["무슨 일", "sword", "the young master"]
+
+
+def first_novel(corpus):
+    return sorted(corpus.glob("*/aligned.json"))[0]
+
+
+def stage_auto_align(corpus):
+    for korean_path in sorted(corpus.glob("*/chapters_korean.json")):
+        aligned = auto_align.align_chapters(
+            auto_align.load_chapters(korean_path),
+            auto_align.load_chapters(korean_path.with_name("chapters_english.json")),
+        )
+        auto_align.save_aligned_chapters(aligned, korean_path.with_name("aligned.json"))
+
+
+def stage_prepare(corpus):
+    prepare_data.build_shards(corpus, seed=42)
+
+
+def stage_mix(corpus):
+    prepare_data.mix_training_data(corpus, seed=42)
+
+
+def stage_dedup(corpus):
+    dedup.main(
+        corpus / "training_data.jsonl",
+        corpus / "training_data_cleaned.jsonl",
+        corpus / "duplicate_report.json",
+    )
+
+
+def stage_search_index(corpus):
+    index = search_index.SearchIndex(corpus)
+    index.update()
+    for query in SEARCH_QUERIES:
+        index.search(query)
+
+
+def stage_editor_open(corpus):
+    path = first_novel(corpus)
+    edit_journal.load(path)
+
+
+def stage_editor_save(corpus):
+    path = first_novel(corpus)
+    data = json_io.read_json(path)
+    data[0]["english"]["content"] += "\n(edited)"
+    edit_journal.append_patches(path, data, [0])
+    edit_journal.compact(path)
+
+
+def stage_align_suggest(corpus):
+    novel_dir = first_novel(corpus).parent
+    korean = json_io.read_json(novel_dir / "chapters_korean.json")
+    english = json_io.read_json(novel_dir / "chapters_english.json")
+    align_suggest.confident_alignments(
+        align_suggest.suggest_alignments(korean, english)
+    )
+
+
+# In run order; later stages read what earlier ones wrote
+STAGES = {
+    "auto_align": stage_auto_align,
+    "prepare": stage_prepare,
+    "mix": stage_mix,
+    "dedup": stage_dedup,
+    "search_index": stage_search_index,
+    "editor_open": stage_editor_open,
+    "editor_save": stage_editor_save,
+    "align_suggest": stage_align_suggest,
+}
+
+
+def reset_peak_rss():
+    """
+    Restart peak RSS tracking from the current RSS, so the peak reached while
+    importing doesn't hide a smaller stage. Returns the current RSS in bytes, or
+    None where the kernel can't reset it (the peak then covers the whole process).
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return _proc_status_kib("VmRSS") * 1024
+    except OSError:
+        return None
+
+
+def peak_rss():
+    """Peak resident memory of this process in bytes"""
+    try:
+        return _proc_status_kib("VmHWM") * 1024
+    except OSError:
+        # ru_maxrss is in KiB on Linux, bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _proc_status_kib(field):
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1])
+    raise OSError(f"{field} missing from /proc/self/status")
+
+
+def _stage_worker(name, corpus, conn):
+    try:
+        with (
+            open(os.devnull, "w") as devnull,
+            contextlib.redirect_stdout(devnull),
+            contextlib.redirect_stderr(devnull),
+        ):
+            baseline = reset_peak_rss() or peak_rss()
+            start = time.perf_counter()
+            STAGES[name](Path(corpus))
+            seconds = time.perf_counter() - start
+        conn.send(
+            {
+                "seconds": round(seconds, 3),
+                "peak_mib": round((peak_rss() - baseline) / 2**20, 1),
+            }
+        )
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_stage(name, corpus):
+    """Run one stage in a fresh process so its memory is measured on its own"""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_stage_worker, args=(name, str(corpus), sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = None
+    process.join()
+    if result is None:
+        # Killed before reporting, e.g. by the OOM killer
+        result = {"error": f"process exited with code {process.exitcode}"}
+    return result
+
+
+def growth_exponent(low, high, name, metric, floor):
+    """Exponent of a stage metric's growth against corpus bytes, None if too small"""
+    low_value = low["stages"].get(name, {}).get(metric)
+    high_value = high["stages"].get(name, {}).get(metric)
+    if not low_value or not high_value or high_value < floor:
+        return None
+    size_ratio = high["corpus"]["bytes"] / low["corpus"]["bytes"]
+    return math.log(high_value / low_value) / math.log(size_ratio)
+
+
+def find_superlinear(scales):
+    """Stages whose time or memory grows faster than SUPERLINEAR_EXPONENT"""
+    if len(scales) < 2:
+        return [], {}
+    ordered = sorted(scales.values(), key=lambda s: s["corpus"]["bytes"])
+    low, high = ordered[0], ordered[-1]
+
+    issues, exponents = [], {}
+    for name in STAGES:
+        for metric, floor in (("seconds", MIN_SECONDS), ("peak_mib", MIN_PEAK_MIB)):
+            exponent = growth_exponent(low, high, name, metric, floor)
+            exponents.setdefault(name, {})[metric] = (
+                None if exponent is None else round(exponent, 2)
+            )
+            if exponent is not None and exponent > SUPERLINEAR_EXPONENT:
+                issues.append(
+                    f"{name}: {metric} grows as size^{exponent:.2f} "
+                    f"({low['stages'][name][metric]} -> {high['stages'][name][metric]})"
+                )
+    return issues, exponents
+
+
+def load_history(path):
+    path = Path(path)
+    if not path.exists():
+        return []
+    return list(json_io.iter_jsonl(path, skip_invalid=True))
+
+
+def find_regressions(record, history):
+    """Stages slower or larger than in the last comparable run"""
+    previous = next(
+        (
+            run
+            for run in reversed(history)
+            if run.get("host") == record["host"]
+            and run.get("chapters_per_novel") == record["chapters_per_novel"]
+        ),
+        None,
+    )
+    if previous is None:
+        return [], None
+
+    issues = []
+    for scale, result in record["scales"].items():
+        before = previous["scales"].get(scale)
+        if before is None:
+            continue
+        for name, stage in result["stages"].items():
+            old = before["stages"].get(name, {})
+            for metric, floor in (("seconds", 0.5), ("peak_mib", 20)):
+                new_value, old_value = stage.get(metric), old.get(metric)
+                if new_value is None or old_value is None:
+                    continue
+                if (
+                    new_value > old_value * (1 + REGRESSION_TOLERANCE)
+                    and new_value - old_value > floor
+                ):
+                    issues.append(
+                        f"{scale}x {name}: {metric} {old_value} -> {new_value} "
+                        f"(run of {previous['timestamp']}, {previous.get('commit')})"
+                    )
+    return issues, previous
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_scale(scale, result):
+    corpus = result["corpus"]
+    print(
+        f"\n{scale}x: {corpus['chapters']} chapter pairs in {corpus['novels']} novels "
+        f"({corpus['bytes'] / 1e6:.1f} MB)"
+    )
+    print(f"   {'stage':<15}{'seconds':>10}{'MB/s':>9}{'peak MiB':>10}")
+    for name, stage in result["stages"].items():
+        if "error" in stage:
+            print(f"   {name:<15}  ❌ {stage['error']}")
+            continue
+        rate = corpus["bytes"] / stage["seconds"] / 1e6 if stage["seconds"] else 0
+        print(
+            f"   {name:<15}{stage['seconds']:>10.2f}{rate:>9.1f}{stage['peak_mib']:>10.1f}"
+        )
+
+
+def run(
+    scales=(1, 10),
+    seed_dir="output",
+    chapters_per_novel=synthetic_corpus.CHAPTERS_PER_NOVEL,
+    stages=None,
+    work_dir=None,
+    keep=False,
+    results_file=RESULTS_FILE,
+):
+    """Benchmark every stage at every scale; returns (record, issues)"""
+    stages = [name for name in STAGES if not stages or name in stages]
+    seeds = synthetic_corpus.load_seeds(seed_dir)
+    root = Path(work_dir or tempfile.mkdtemp(prefix="bench_scaling_"))
+    print(
+        f"▶ Seeds: {len(seeds['shapes'])} aligned pairs, "
+        f"{seeds['bytes'] / 1e6:.1f} MB in {seed_dir}; working in {root}"
+    )
+
+    record = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "host": platform.node(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "chapters_per_novel": chapters_per_novel,
+        "scales": {},
+    }
+
+    try:
+        for scale in scales:
+            corpus_dir = root / f"scale_{scale:g}"
+            if corpus_dir.exists():
+                shutil.rmtree(corpus_dir)
+
+            start = time.time()
+            corpus = synthetic_corpus.generate(
+                corpus_dir, scale, chapters_per_novel=chapters_per_novel, seeds=seeds
+            )
+            print(f"\n📝 Generated {scale:g}x corpus in {time.time() - start:.1f}s")
+
+            result = {"corpus": corpus, "stages": {}}
+            for name in stages:
+                print(f"   running {name}...", flush=True)
+                result["stages"][name] = run_stage(name, corpus_dir)
+
+            record["scales"][f"{scale:g}"] = result
+            print_scale(f"{scale:g}", result)
+
+            if not keep:
+                shutil.rmtree(corpus_dir)
+    finally:
+        if not keep and not work_dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    issues = [
+        f"{scale}x {name}: {stage['error']}"
+        for scale, result in record["scales"].items()
+        for name, stage in result["stages"].items()
+        if "error" in stage
+    ]
+    superlinear, record["exponents"] = find_superlinear(record["scales"])
+    issues += superlinear
+
+    if results_file:
+        regressions, previous = find_regressions(record, load_history(results_file))
+        issues += regressions
+        if previous is not None:
+            print(f"\nCompared with the run of {previous['timestamp']}")
+        Path(results_file).parent.mkdir(parents=True, exist_ok=True)
+        json_io.append_jsonl(results_file, [record])
+        print(f"Results appended to {results_file}")
+
+    if record["exponents"]:
+        print(f"\nGrowth exponents (1.0 = linear in corpus size):")
+        for name, exponents in record["exponents"].items():
+            shown = ", ".join(
+                f"{metric} {value:.2f}"
+                for metric, value in exponents.items()
+                if value is not None
+            )
+            print(f"   {name:<15}{shown or 'too small to tell'}")
+
+    if issues:
+        print(f"\n❌ {len(issues)} issue(s):")
+        for issue in issues:
+            print(f"   {issue}")
+    else:
+        print(f"\n✅ No superlinear stages or regressions")
+    return record, issues
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time and memory-profile the data pipeline on synthetic corpora."
+    )
+
+    parser.add_argument(
+        "--scales",
+        nargs="+",
+        type=float,
+        default=[1, 10],
+        help="Corpus sizes as multiples of the seed files (default: 1 10)",
+    )
+    parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=list(STAGES),
+        help="Only run these stages (default: all; later stages need earlier ones)",
+    )
+    parser.add_argument(
+        "--seed_dir",
+        type=str,
+        default="output",
+        help="Real files the corpora are drawn from (default: output)",
+    )
+    parser.add_argument(
+        "--chapters_per_novel",
+        type=int,
+        default=synthetic_corpus.CHAPTERS_PER_NOVEL,
+        help=f"Chapters in each synthetic novel (default: {synthetic_corpus.CHAPTERS_PER_NOVEL})",
+    )
+    parser.add_argument(
+        "--work_dir",
+        type=str,
+        default=None,
+        help="Where corpora are generated (default: a temporary directory)",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the generated corpora and stage outputs",
+    )
+    parser.add_argument(
+        "--results",
+        type=str,
+        default=str(RESULTS_FILE),
+        help="JSONL history to compare with and append to; empty to skip",
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit with status 1 on errors, superlinear stages or regressions",
+    )
+
+    args = parser.parse_args()
+
+    _, issues = run(
+        scales=args.scales,
+        seed_dir=args.seed_dir,
+        chapters_per_novel=args.chapters_per_novel,
+        stages=args.stages,
+        work_dir=args.work_dir,
+        keep=args.keep,
+        results_file=args.results or None,
+    )
+    sys.exit(1 if args.check and issues else 0)
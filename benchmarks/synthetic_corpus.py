@@ -0,0 +1,208 @@
+"""
+Synthetic Korean/English chapter corpora for scaling benchmarks.
+
+Chapters are assembled from the paragraphs of the real files under output/. Each
+synthetic pair takes the paragraph counts of a real aligned pair and draws its
+paragraphs at random from the Korean and English pools, so chapter lengths, the
+KR/EN length ratio and the vocabulary follow the real corpus while no two chapters
+are copies. A small share of chapters repeats the one before, verbatim or with one
+paragraph changed, like the re-uploads scraping picks up.
+
+A corpus of scale N holds about N times the bytes of the seed files, split into
+novels of chapters_per_novel chapters:
+    <output_dir>/novel_0000/chapters_korean.json
+    <output_dir>/novel_0000/chapters_english.json
+
+    python -m benchmarks.synthetic_corpus --scale 10 --output_dir /tmp/synthetic
+"""
+
+import argparse
+import random
+import time
+from pathlib import Path
+
+import json_io
+from benchmarks.bench_json_io import find_files
+
+CHAPTERS_PER_NOVEL = 300
+# Share of chapters that repeat the previous one exactly, and with one paragraph changed
+DUPLICATE_RATE = 0.01
+NEAR_DUPLICATE_RATE = 0.01
+TIMESTAMP = "2025-01-01T00:00:00"
+
+
+def paragraphs(content):
+    return [line for line in (content or "").split("\n") if line.strip()]
+
+
+def load_seeds(seed_dir="output"):
+    """
+    Paragraph pools per language and the (korean, english) paragraph counts of
+    every aligned pair in seed_dir, plus the seed files' total size.
+    """
+    pools = {"korean": [], "english": []}
+    shapes = []
+    size = 0
+
+    for path in find_files(seed_dir):
+        data = json_io.read_json(path)
+        if not isinstance(data, list):
+            continue
+        size += path.stat().st_size
+        for entry in data:
+            if "korean" in entry and "english" in entry:
+                korean = paragraphs(entry["korean"].get("content"))
+                english = paragraphs(entry["english"].get("content"))
+                pools["korean"].extend(korean)
+                pools["english"].extend(english)
+                if korean and english:
+                    shapes.append((len(korean), len(english)))
+            elif entry.get("language") in pools:
+                pools[entry["language"]].extend(paragraphs(entry.get("content")))
+
+    if not shapes:
+        raise ValueError(f"No aligned chapter pairs to seed from in {seed_dir}")
+    return {"pools": pools, "shapes": shapes, "bytes": size}
+
+
+def make_chapter(language, novel, number, total, content):
+    base = f"https://synthetic.invalid/{novel}/{language}/chapter-"
+    return {
+        "url": f"{base}{number}",
+        "source_site": "synthetic",
+        "language": language,
+        "timestamp": TIMESTAMP,
+        "novel_title": novel,
+        "chapter_number": (
+            f"({number}/{total})" if language == "korean" else f"Chapter {number}"
+        ),
+        "content": content,
+        "next_chapter_url": f"{base}{number + 1}" if number < total else None,
+        "prev_chapter_url": f"{base}{number - 1}" if number > 1 else None,
+    }
+
+
+def _contents(seeds, rng, previous):
+    """Korean and English paragraph lists of the next synthetic pair"""
+    pools = seeds["pools"]
+    roll = rng.random()
+    if previous and roll < DUPLICATE_RATE:
+        return previous
+    if previous and roll < DUPLICATE_RATE + NEAR_DUPLICATE_RATE:
+        korean, english = list(previous[0]), list(previous[1])
+        korean[rng.randrange(len(korean))] = rng.choice(pools["korean"])
+        english[rng.randrange(len(english))] = rng.choice(pools["english"])
+        return korean, english
+
+    korean_count, english_count = rng.choice(seeds["shapes"])
+    return (
+        rng.choices(pools["korean"], k=korean_count),
+        rng.choices(pools["english"], k=english_count),
+    )
+
+
+def generate(
+    output_dir,
+    scale=1.0,
+    seed_dir="output",
+    chapters_per_novel=CHAPTERS_PER_NOVEL,
+    seed=0,
+    seeds=None,
+):
+    """
+    Write a corpus of about scale times the seed files' size to output_dir.
+
+    Files are streamed, so memory stays at the seed pools plus one novel's
+    chapters. Returns {"bytes", "novels", "chapters"}.
+    """
+    seeds = seeds or load_seeds(seed_dir)
+    rng = random.Random(seed)
+    output_dir = Path(output_dir)
+    target = scale * seeds["bytes"]
+    written = novels = chapters = 0
+
+    while written < target:
+        novel = f"novel_{novels:04d}"
+        novel_dir = output_dir / novel
+        novel_dir.mkdir(parents=True, exist_ok=True)
+
+        with (
+            json_io.atomic_open(novel_dir / "chapters_korean.json") as korean_file,
+            json_io.atomic_open(novel_dir / "chapters_english.json") as english_file,
+        ):
+            separator = b"[\n"
+            previous = None
+            for number in range(1, chapters_per_novel + 1):
+                previous = _contents(seeds, rng, previous)
+                for f, language, lines in zip(
+                    (korean_file, english_file), ("korean", "english"), previous
+                ):
+                    chapter = make_chapter(
+                        language, novel, number, chapters_per_novel, "\n".join(lines)
+                    )
+                    data = separator + json_io.dumps(chapter, indent=2)
+                    f.write(data)
+                    written += len(data)
+                separator = b",\n"
+                chapters += 1
+                if written >= target:
+                    break
+            korean_file.write(b"\n]")
+            english_file.write(b"\n]")
+
+        novels += 1
+
+    return {"bytes": written, "novels": novels, "chapters": chapters}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic KR/EN chapter corpus from the files in output/."
+    )
+
+    parser.add_argument(
+        "--scale",
+        type=float,
+        default=1.0,
+        help="Corpus size as a multiple of the seed files (default: 1.0)",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        required=True,
+        help="Directory to write the novels to",
+    )
+    parser.add_argument(
+        "--seed_dir",
+        type=str,
+        default="output",
+        help="Real chapter and aligned files to draw from (default: output)",
+    )
+    parser.add_argument(
+        "--chapters_per_novel",
+        type=int,
+        default=CHAPTERS_PER_NOVEL,
+        help=f"Chapters in each synthetic novel (default: {CHAPTERS_PER_NOVEL})",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed (default: 0)",
+    )
+
+    args = parser.parse_args()
+
+    start = time.time()
+    corpus = generate(
+        args.output_dir,
+        scale=args.scale,
+        seed_dir=args.seed_dir,
+        chapters_per_novel=args.chapters_per_novel,
+        seed=args.seed,
+    )
+    print(
+        f"✅ Wrote {corpus['chapters']} chapter pairs in {corpus['novels']} novels "
+        f"({corpus['bytes'] / 1e6:.1f} MB) to {args.output_dir} "
+        f"in {time.time() - start:.1f}s"
+    )
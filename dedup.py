@@ -1,8 +1,9 @@
-import json
 import re
 
 from datasketch import MinHash, MinHashLSH
 
+import json_io
+
 # --- CONFIGURATION ---
 INPUT_FILE = "output/training_data.jsonl"
 OUTPUT_FILE = "training_data_cleaned.jsonl"
@@ -45,14 +46,14 @@ def preprocess(text):
     return tokens
 
 
-def main():
-    print(f"--- Processing {INPUT_FILE} ---")
+def main(
+    input_file=INPUT_FILE,
+    output_file=OUTPUT_FILE,
+    report_file=DUPLICATE_REPORT_FILE,
+):
+    print(f"--- Processing {input_file} ---")
 
-    raw_data = []
-    with open(INPUT_FILE, "r", encoding="utf-8") as f:
-        for line in f:
-            if line.strip():
-                raw_data.append(json.loads(line))
+    raw_data = list(json_io.iter_jsonl(input_file))
 
     print(f"Total Initial Rows: {len(raw_data)}")
 
@@ -150,11 +151,9 @@ def main():
     print(f"Final Dataset Size: {len(final_data)}")
 
     # Save the cleaned file
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        for entry in final_data:
-            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    json_io.write_jsonl(output_file, final_data)
 
-    print(f"--- Done. Clean data saved to {OUTPUT_FILE} ---")
+    print(f"--- Done. Clean data saved to {output_file} ---")
 
     # Save duplicate report
     duplicate_report = {
@@ -170,10 +169,9 @@ def main():
         "fuzzy_duplicate_groups": fuzzy_duplicate_groups,
     }
 
-    with open(DUPLICATE_REPORT_FILE, "w", encoding="utf-8") as f:
-        json.dump(duplicate_report, f, indent=2, ensure_ascii=False)
+    json_io.write_json(report_file, duplicate_report)
 
-    print(f"--- Duplicate report saved to {DUPLICATE_REPORT_FILE} ---")
+    print(f"--- Duplicate report saved to {report_file} ---")
 
 
 if __name__ == "__main__":
@@ -1,10 +1,15 @@
 import asyncio
-import json
+import os
 from datetime import datetime
 from pathlib import Path
 
 import streamlit as st
 
+import edit_journal
+import json_io
+import search_index
+from search_ui import SEARCH_LIMIT, search_corpus
+
 # Set page config
 st.set_page_config(page_title="Chapter Editor", page_icon="✏️", layout="wide")
 
@@ -25,27 +30,84 @@ st.markdown(
 )
 
 
+def file_signature(file_path):
+    """Return (mtime_ns, size) of a file, used as a cache key"""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def dir_signature(root):
+    """Return mtimes of root and its direct subdirectories, used as a cache key"""
+    root = Path(root)
+    if not root.exists():
+        return ()
+
+    signature = [(str(root), root.stat().st_mtime_ns)]
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                signature.append((entry.path, entry.stat().st_mtime_ns))
+
+    return tuple(sorted(signature))
+
+
+@st.cache_data(show_spinner=False)
+def _list_json_files(root, signature):
+    return sorted(Path(root).rglob("*.json"))
+
+
+def list_json_files(root="output"):
+    """List JSON files under root, rescanning only when a directory changed"""
+    return _list_json_files(str(root), dir_signature(root))
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _load_json_file(file_path, signature):
+    return json_io.read_json(file_path)
+
+
 def load_json_file(file_path):
-    """Load JSON file"""
+    """Load JSON file, reusing the parsed data while the file is unchanged"""
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _load_json_file(str(file_path), file_signature(file_path))
     except Exception as e:
         st.error(f"Error loading file: {e}")
         return None
 
 
+def load_aligned_file(file_path):
+    """Load an aligned file with its pending journal edits applied"""
+    return edit_journal.load(file_path, load_json_file)
+
+
 def save_json_file(file_path, data):
-    """Save JSON file"""
+    """Save JSON file atomically"""
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        json_io.write_json(file_path, data)
+
+        # New files change the listing; rewritten ones get a new signature
+        _list_json_files.clear()
         return True
     except Exception as e:
         st.error(f"Error saving file: {e}")
         return False
 
 
+def save_journal_patches(file_path, data, indices):
+    """Append the changed chapter pairs to the edit journal"""
+    try:
+        count = edit_journal.append_patches(file_path, data, indices)
+        edit_journal.maybe_compact_async(file_path)
+        return count
+    except Exception as e:
+        st.error(f"Error saving file: {e}")
+        return None
+
+
+def same_file(a, b):
+    return a is not None and b is not None and Path(a).resolve() == Path(b).resolve()
+
+
 def create_empty_chapter(language):
     """Create an empty chapter template"""
     return {
@@ -59,6 +121,90 @@ def create_empty_chapter(language):
     }
 
 
+def pair_chapters(korean_data, english_data):
+    """Pair two chapter lists by position, padding the shorter one"""
+    max_len = max(len(korean_data), len(english_data))
+    aligned_data = []
+
+    for i in range(max_len):
+        korean_ch = (
+            korean_data[i] if i < len(korean_data) else create_empty_chapter("korean")
+        )
+        english_ch = (
+            english_data[i]
+            if i < len(english_data)
+            else create_empty_chapter("english")
+        )
+
+        aligned_data.append({"korean": korean_ch, "english": english_ch})
+
+    return aligned_data
+
+
+def open_aligned_file(file_path):
+    """Load an aligned file into the session; returns the number of chapters"""
+    data = load_aligned_file(file_path)
+    if not data:
+        return 0
+    st.session_state.aligned_data = data
+    st.session_state.current_file = str(file_path)
+    st.session_state.edited_data = [item.copy() for item in data]
+    st.session_state.dirty_chapters = set()
+    st.session_state.current_chapter_idx = 0
+    st.session_state.mode = "aligned"
+    return len(data)
+
+
+def open_pairing(korean_file, english_file):
+    """Load chapter files for manual pairing; returns the number of pairs"""
+    korean_data = load_json_file(korean_file) if korean_file else []
+    english_data = load_json_file(english_file) if english_file else []
+    aligned_data = pair_chapters(korean_data or [], english_data or [])
+
+    st.session_state.aligned_data = aligned_data
+    st.session_state.edited_data = [item.copy() for item in aligned_data]
+    st.session_state.mode = "manual"
+    st.session_state.dirty_chapters = set()
+    st.session_state.current_chapter_idx = 0
+    st.session_state.pop("current_file", None)
+    st.session_state.korean_file = str(korean_file) if korean_file else None
+    st.session_state.english_file = str(english_file) if english_file else None
+    return len(aligned_data)
+
+
+def open_search_hit(hit):
+    """Callback for a search result: open its file if needed and jump to the chapter"""
+    mode = st.session_state.get("mode")
+    if mode == "aligned":
+        is_open = same_file(st.session_state.get("current_file"), hit["file"])
+    elif mode == "manual":
+        is_open = same_file(
+            st.session_state.get(f"{hit['language']}_file"), hit["file"]
+        )
+    else:
+        is_open = False
+
+    if not is_open:
+        if st.session_state.get("dirty_chapters"):
+            st.session_state.search_notice = (
+                "Save or reload your changes before opening another file"
+            )
+            return
+        name = Path(hit["file"]).name.lower()
+        if "korean" in name or "english" in name:
+            files = {"korean": None, "english": None}
+            files[hit["language"]] = hit["file"]
+            open_pairing(files["korean"], files["english"])
+        else:
+            open_aligned_file(hit["file"])
+
+    if "edited_data" in st.session_state:
+        last = len(st.session_state.edited_data) - 1
+        st.session_state.current_chapter_idx = max(0, min(hit["chapter"], last))
+    st.session_state.search_focus = hit
+    st.session_state.pop("search_notice", None)
+
+
 def main():
     st.title("✏️ Chapter Editor")
     st.markdown("Edit aligned Korean and English chapters side by side")
@@ -68,7 +214,7 @@ def main():
         st.header("📂 File Selection")
 
         # Find all JSON files in output directory
-        json_files = list(Path("output").rglob("*.json"))
+        json_files = list_json_files("output")
 
         # Categorize files
         aligned_files = [
@@ -96,13 +242,9 @@ def main():
             )
 
             if st.button("🔄 Load File", type="primary"):
-                data = load_json_file(selected_file)
-                if data:
-                    st.session_state.aligned_data = data
-                    st.session_state.current_file = str(selected_file)
-                    st.session_state.edited_data = [item.copy() for item in data]
-                    st.session_state.mode = "aligned"
-                    st.success(f"Loaded {len(data)} aligned chapters")
+                count = open_aligned_file(selected_file)
+                if count:
+                    st.success(f"Loaded {count} aligned chapters")
 
         else:  # Manual Pairing mode
             st.markdown("### Select Files")
@@ -132,41 +274,45 @@ def main():
                 if not korean_file and not english_file:
                     st.error("Please select at least one file")
                 else:
-                    korean_data = load_json_file(korean_file) if korean_file else []
-                    english_data = load_json_file(english_file) if english_file else []
-
-                    # Create aligned structure
-                    max_len = max(len(korean_data), len(english_data))
-                    aligned_data = []
-
-                    for i in range(max_len):
-                        korean_ch = (
-                            korean_data[i]
-                            if i < len(korean_data)
-                            else create_empty_chapter("korean")
-                        )
-                        english_ch = (
-                            english_data[i]
-                            if i < len(english_data)
-                            else create_empty_chapter("english")
-                        )
-
-                        aligned_data.append(
-                            {"korean": korean_ch, "english": english_ch}
-                        )
-
-                    st.session_state.aligned_data = aligned_data
-                    st.session_state.edited_data = [
-                        item.copy() for item in aligned_data
-                    ]
-                    st.session_state.mode = "manual"
-                    st.session_state.korean_file = (
-                        str(korean_file) if korean_file else None
-                    )
-                    st.session_state.english_file = (
-                        str(english_file) if english_file else None
-                    )
-                    st.success(f"Loaded {max_len} chapter pairs for manual editing")
+                    count = open_pairing(korean_file, english_file)
+                    st.success(f"Loaded {count} chapter pairs for manual editing")
+
+        # Corpus-wide search
+        st.markdown("---")
+        st.header("🔎 Search")
+        query = st.text_input(
+            "Search all chapters:", placeholder="Korean or English text"
+        )
+        loaded_only = st.checkbox("Only the loaded file(s)", value=False)
+
+        if st.session_state.get("search_notice"):
+            st.warning(st.session_state.search_notice)
+
+        if query.strip():
+            files = None
+            if loaded_only:
+                files = [
+                    st.session_state.get(key)
+                    for key in ("current_file", "korean_file", "english_file")
+                    if st.session_state.get(key)
+                ]
+            hits = search_corpus(query, files=files)
+            st.caption(
+                f"{len(hits)} match(es)"
+                f"{f' (first {SEARCH_LIMIT})' if len(hits) == SEARCH_LIMIT else ''}"
+            )
+
+            for i, hit in enumerate(hits):
+                hit_file = Path(hit["file"])
+                label = "KR" if hit["language"] == "korean" else "EN"
+                st.button(
+                    f"{hit_file.parent.name} · Ch {hit['chapter'] + 1} · {label} ¶{hit['paragraph'] + 1}",
+                    key=f"search_hit_{i}",
+                    on_click=open_search_hit,
+                    args=(hit,),
+                    use_container_width=True,
+                )
+                st.caption(search_index.snippet(hit["text"], query))
 
     # Initialize session state
     if "aligned_data" not in st.session_state:
@@ -263,6 +409,14 @@ def main():
                 unsafe_allow_html=True,
             )
 
+    # Search match in this chapter
+    focus = st.session_state.get("search_focus")
+    if focus and focus["chapter"] == current_idx:
+        st.info(
+            f"🔎 Match in {focus['language'].capitalize()} paragraph "
+            f"{focus['paragraph'] + 1}: {focus['text']}"
+        )
+
     # Edit content
     st.markdown("---")
     st.markdown("### ✏️ Edit Content")
@@ -289,7 +443,14 @@ def main():
 
         st.info(f"Characters: {len(english_content)}")
 
-    # Update edited data
+    # Update edited data, remembering which pairs need to be journaled
+    if "dirty_chapters" not in st.session_state:
+        st.session_state.dirty_chapters = set()
+    if korean_content != korean.get("content", "") or english_content != english.get(
+        "content", ""
+    ):
+        st.session_state.dirty_chapters.add(current_idx)
+
     st.session_state.edited_data[current_idx]["korean"]["content"] = korean_content
     st.session_state.edited_data[current_idx]["english"]["content"] = english_content
 
@@ -303,10 +464,14 @@ def main():
                 st.session_state.get("mode") == "aligned"
                 and "current_file" in st.session_state
             ):
-                if save_json_file(
-                    st.session_state.current_file, st.session_state.edited_data
-                ):
-                    st.success("✅ Changes saved successfully!")
+                count = save_journal_patches(
+                    st.session_state.current_file,
+                    st.session_state.edited_data,
+                    st.session_state.dirty_chapters,
+                )
+                if count is not None:
+                    st.session_state.dirty_chapters = set()
+                    st.success(f"✅ Changes saved successfully! ({count} chapters)")
                     st.balloons()
             elif st.session_state.get("mode") == "manual":
                 # Save as aligned file
@@ -318,8 +483,10 @@ def main():
                 aligned_file = output_dir / "aligned.json"
 
                 if save_json_file(aligned_file, st.session_state.edited_data):
+                    edit_journal.discard(aligned_file)
                     st.session_state.current_file = str(aligned_file)
                     st.session_state.mode = "aligned"
+                    st.session_state.dirty_chapters = set()
                     st.success(f"✅ Saved as aligned file: {aligned_file.name}")
                     st.balloons()
 
@@ -350,9 +517,10 @@ def main():
                 st.session_state.get("mode") == "aligned"
                 and "current_file" in st.session_state
             ):
-                data = load_json_file(st.session_state.current_file)
+                data = load_aligned_file(st.session_state.current_file)
                 if data:
                     st.session_state.edited_data = [item.copy() for item in data]
+                    st.session_state.dirty_chapters = set()
                     st.success("✅ Reloaded original data")
                     st.rerun()
             else:
@@ -366,6 +534,7 @@ def main():
             }
             st.session_state.edited_data.append(new_pair)
             st.session_state.current_chapter_idx = len(st.session_state.edited_data) - 1
+            st.session_state.dirty_chapters.add(st.session_state.current_chapter_idx)
             st.success("✅ Added new chapter pair")
             st.rerun()
 
@@ -394,6 +563,31 @@ def main():
             ratio = len(english_content) / len(korean_content)
             st.metric("EN/KR Ratio", f"{ratio:.2f}")
 
+        # Edit journal
+        if (
+            st.session_state.get("mode") == "aligned"
+            and "current_file" in st.session_state
+        ):
+            current_file = st.session_state.current_file
+
+            st.markdown("---")
+            st.header("📝 Edit Journal")
+            st.metric("Pending Patches", len(edit_journal.read_journal(current_file)))
+
+            if st.button("↩️ Undo Last Save", use_container_width=True):
+                removed = edit_journal.undo_last_save(current_file)
+                if removed:
+                    data = load_aligned_file(current_file)
+                    st.session_state.edited_data = [item.copy() for item in data]
+                    st.session_state.dirty_chapters = set()
+                    st.rerun()
+                else:
+                    st.warning("Nothing to undo since the last compaction")
+
+            if st.button("🗜️ Compact Now", use_container_width=True):
+                folded = edit_journal.compact(current_file)
+                st.success(f"✅ Folded {folded} patches into {Path(current_file).name}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,180 @@
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import json_io
+
+# Fold the journal into the main file once it holds this many patches
+COMPACT_THRESHOLD = 200
+
+# Reentrant, so readers that take it can be called from writers that hold it
+_lock = threading.RLock()
+_compacting = set()
+
+
+def journal_path(file_path):
+    """Path of the edit journal that belongs to an aligned file"""
+    file_path = Path(file_path)
+    return file_path.with_name(f"{file_path.name}.journal.jsonl")
+
+
+def _stamp(file_path):
+    """
+    Size and mtime of the aligned file; patches only apply to the version they were
+    written against
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _is_current(patches, stamp):
+    return all(patch.get("base") == stamp for patch in patches)
+
+
+def discard(file_path):
+    """
+    Delete the journal of an aligned file; every writer that rewrites the whole
+    file calls this, since the patches are keyed by pair index into the old version.
+    """
+    with _lock:
+        journal_path(file_path).unlink(missing_ok=True)
+
+
+def append_patches(file_path, data, indices):
+    """
+    Append one patch per changed chapter pair to the journal.
+
+    All patches written by one call share a timestamp, so a save can be undone as a unit.
+    Each patch records the stamp of the aligned file it applies to; a journal left over
+    from an older version of the file is deleted first.
+    Returns the number of patches written.
+    """
+    indices = sorted(set(indices))
+    if not indices:
+        return 0
+
+    timestamp = datetime.now().isoformat()
+
+    # Stamped under the lock, so a compaction can't rewrite the file in between
+    with _lock:
+        stamp = _stamp(file_path)
+        patches = [
+            {"timestamp": timestamp, "base": stamp, "index": idx, "pair": data[idx]}
+            for idx in indices
+        ]
+        path = journal_path(file_path)
+        if path.exists() and not _is_current(_read_patches(path), stamp):
+            path.unlink()
+        json_io.append_jsonl(path, patches, sync=True)
+
+    return len(patches)
+
+
+def _read_patches(path):
+    if not path.exists():
+        return []
+    return list(json_io.iter_jsonl(path, skip_invalid=True))
+
+
+def read_journal(file_path):
+    """
+    Read all journal patches; a torn last line from a crash is ignored.
+
+    A journal written against another version of the aligned file (rewritten since
+    by auto/manual alignment, a translation run or a save as aligned file) is stale
+    and reads as empty.
+    """
+    with _lock:
+        patches = _read_patches(journal_path(file_path))
+        if not _is_current(patches, _stamp(file_path)):
+            return []
+        return patches
+
+
+def load(file_path, read=json_io.read_json):
+    """
+    An aligned file with its journal replayed, both read under the lock so a
+    compaction can't fold the journal in between. read(file_path) loads the file
+    and may return None on failure, which is passed through.
+    """
+    with _lock:
+        data = read(file_path)
+        if data is None:
+            return None
+        return replay(data, read_journal(file_path))
+
+
+def replay(data, patches):
+    """Apply journal patches in order to a list of chapter pairs (in place)"""
+    for patch in patches:
+        idx = patch["index"]
+        if idx < len(data):
+            data[idx] = patch["pair"]
+        elif idx == len(data):
+            # Pairs added in the editor are appended at the end
+            data.append(patch["pair"])
+        # Anything further out doesn't belong to this file and is dropped
+
+    return data
+
+
+def undo_last_save(file_path):
+    """
+    Drop the patches written by the most recent save.
+
+    Only edits that have not been compacted yet can be undone.
+    Returns the number of patches removed.
+    """
+    with _lock:
+        patches = read_journal(file_path)
+        if not patches:
+            return 0
+
+        last_timestamp = patches[-1]["timestamp"]
+        kept = [p for p in patches if p["timestamp"] != last_timestamp]
+
+        path = journal_path(file_path)
+        if kept:
+            json_io.write_jsonl(path, kept)
+        else:
+            path.unlink()
+
+    return len(patches) - len(kept)
+
+
+def compact(file_path):
+    """Fold the journal into the main file with an atomic write, then drop the journal"""
+    with _lock:
+        patches = read_journal(file_path)
+        if not patches:
+            # A stale journal has nothing to fold
+            journal_path(file_path).unlink(missing_ok=True)
+            return 0
+
+        data = json_io.read_json(file_path)
+        json_io.write_json(file_path, replay(data, patches))
+        journal_path(file_path).unlink(missing_ok=True)
+
+    return len(patches)
+
+
+def maybe_compact_async(file_path, threshold=COMPACT_THRESHOLD):
+    """Compact in a background thread once the journal grows past the threshold"""
+    file_path = str(file_path)
+    with _lock:
+        if file_path in _compacting or len(read_journal(file_path)) < threshold:
+            return False
+        _compacting.add(file_path)
+
+    def _run():
+        try:
+            compact(file_path)
+        finally:
+            _compacting.discard(file_path)
+
+    threading.Thread(target=_run, daemon=True).start()
+    return True
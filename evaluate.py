@@ -0,0 +1,365 @@
+"""
+Score a model on the test split through an OpenAI-compatible endpoint.
+
+Test examples are streamed from the ShareGPT JSONL and sent concurrently; every
+reply is cached by prompt hash and scored in worker processes while the next
+requests are in flight. Results go to <output_dir>/eval/<model>/:
+    predictions.jsonl  one line per example with its sentence-level chrF
+    metrics.json       corpus chrF and BLEU, overall and per novel
+
+chrF (character 6-grams, beta 2) and BLEU (word 4-grams, brevity penalty) follow
+the sacreBLEU definitions, without the dependency.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import sys
+import time
+import urllib.error
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import json_io
+from openai_client import DEFAULT_BASE_URL, ChatClient, ResponseCache, cached_complete
+from pretokenize import to_chat
+
+CHRF_ORDER = 6
+CHRF_BETA = 2
+BLEU_ORDER = 4
+# sacreBLEU's default "13a" tokenizer (mteval-v13a)
+BLEU_TOKENIZER = [
+    (re.compile(r"([\{-\~\[-\` -\&\(-\+\:-\@\/])"), r" \1 "),
+    (re.compile(r"([^0-9])([\.,])"), r"\1 \2 "),
+    (re.compile(r"([\.,])([^0-9])"), r" \1 \2"),
+    (re.compile(r"([0-9])(-)"), r"\1 \2 "),
+]
+UNKNOWN_NOVEL = "(unknown)"
+
+
+def bleu_tokens(text):
+    text = text.replace("-\n", "").replace("\n", " ")
+    if "&" in text:
+        text = (
+            text.replace("&quot;", '"')
+            .replace("&amp;", "&")
+            .replace("&lt;", "<")
+            .replace("&gt;", ">")
+        )
+    text = f" {text} "
+    for pattern, replacement in BLEU_TOKENIZER:
+        text = pattern.sub(replacement, text)
+    return text.split()
+
+
+def _ngrams(sequence, n):
+    """n-gram counts; slices of a string, tuples of a word list"""
+    grams = [sequence[i : i + n] for i in range(len(sequence) - n + 1)]
+    if isinstance(sequence, list):
+        grams = list(map(tuple, grams))
+    return Counter(grams)
+
+
+def sentence_stats(hypothesis, reference):
+    """
+    Sufficient statistics for chrF and BLEU of one example.
+
+    Summing them over examples gives the corpus scores (see corpus_scores).
+    """
+    hyp_chars = "".join(hypothesis.split())
+    ref_chars = "".join(reference.split())
+    chrf = []
+    for n in range(1, CHRF_ORDER + 1):
+        hyp, ref = _ngrams(hyp_chars, n), _ngrams(ref_chars, n)
+        chrf.append([sum((hyp & ref).values()), sum(hyp.values()), sum(ref.values())])
+
+    hyp_words = bleu_tokens(hypothesis)
+    ref_words = bleu_tokens(reference)
+    bleu = []
+    for n in range(1, BLEU_ORDER + 1):
+        hyp, ref = _ngrams(hyp_words, n), _ngrams(ref_words, n)
+        bleu.append([sum((hyp & ref).values()), sum(hyp.values())])
+
+    return {
+        "chrf": chrf,
+        "bleu": bleu,
+        "hyp_len": len(hyp_words),
+        "ref_len": len(ref_words),
+    }
+
+
+def add_stats(total, stats):
+    """Accumulate sentence_stats into total (None starts a new total)"""
+    if total is None:
+        return json.loads(json.dumps(stats))
+    for key in ("chrf", "bleu"):
+        for row, values in zip(total[key], stats[key]):
+            for i, value in enumerate(values):
+                row[i] += value
+    total["hyp_len"] += stats["hyp_len"]
+    total["ref_len"] += stats["ref_len"]
+    return total
+
+
+def chrf_score(stats):
+    """chrF from summed statistics: precision and recall averaged over orders"""
+    precisions, recalls = [], []
+    for match, hyp, ref in stats["chrf"]:
+        if hyp and ref:
+            precisions.append(match / hyp)
+            recalls.append(match / ref)
+    if not precisions:
+        return 0.0
+    p = sum(precisions) / len(precisions)
+    r = sum(recalls) / len(recalls)
+    if p + r == 0:
+        return 0.0
+    beta2 = CHRF_BETA**2
+    return 100 * (1 + beta2) * p * r / (beta2 * p + r)
+
+
+def bleu_score(stats):
+    """BLEU from summed statistics (0 if any order has no match)"""
+    if not stats["hyp_len"]:
+        return 0.0
+    log_precision = 0.0
+    for match, total in stats["bleu"]:
+        if not match or not total:
+            return 0.0
+        log_precision += math.log(match / total) / BLEU_ORDER
+    brevity = min(0.0, 1 - stats["ref_len"] / stats["hyp_len"])
+    return 100 * math.exp(brevity + log_precision)
+
+
+def corpus_scores(stats):
+    return {
+        "chrf": round(chrf_score(stats), 2),
+        "bleu": round(bleu_score(stats), 2),
+    }
+
+
+def iter_examples(test_file, limit=None):
+    """
+    Yield (index, prompt messages, reference, novel) from a ShareGPT JSONL.
+
+    The prompt is every turn before the last assistant turn, in chat format.
+    """
+    count = 0
+    for idx, record in enumerate(json_io.iter_jsonl(test_file)):
+        if limit is not None and count >= limit:
+            return
+        messages = to_chat(record)
+        if not messages or messages[-1]["role"] != "assistant":
+            continue
+        count += 1
+        yield idx, messages[:-1], messages[-1]["content"], record.get(
+            "novel", UNKNOWN_NOVEL
+        )
+
+
+async def run_eval(client, cache, test_file, out_dir, workers=None, limit=None):
+    """
+    Evaluate every example, keeping client.concurrency requests in flight.
+
+    Returns the metrics dict also written to out_dir/metrics.json.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    loop = asyncio.get_running_loop()
+    examples = iter_examples(test_file, limit)
+
+    totals = defaultdict(lambda: None)
+    counts = Counter()
+    start = time.time()
+
+    with (
+        ProcessPoolExecutor(max_workers=workers) as pool,
+        json_io.open_file(out_dir / "predictions.jsonl", "wb") as predictions,
+    ):
+
+        async def worker():
+            # The shared generator hands each example to exactly one worker
+            for idx, messages, reference, novel in examples:
+                prediction, cached = await cached_complete(client, cache, messages)
+                stats = await loop.run_in_executor(
+                    pool, sentence_stats, prediction, reference
+                )
+
+                totals["all"] = add_stats(totals["all"], stats)
+                totals[novel] = add_stats(totals[novel], stats)
+                counts["all"] += 1
+                counts[novel] += 1
+                counts["cached"] += cached
+
+                predictions.write(
+                    json_io.dumps(
+                        {
+                            "index": idx,
+                            "novel": novel,
+                            "chrf": round(chrf_score(stats), 2),
+                            "prediction": prediction,
+                        }
+                    )
+                    + b"\n"
+                )
+                if counts["all"] % 50 == 0:
+                    elapsed = time.time() - start
+                    print(
+                        f"   {counts['all']} examples ({counts['cached']} cached), "
+                        f"{counts['all'] / elapsed:.1f}/s, "
+                        f"chrF so far {chrf_score(totals['all']):.2f}"
+                    )
+
+        await asyncio.gather(*(worker() for _ in range(client.concurrency)))
+
+    if not counts["all"]:
+        raise ValueError(f"No examples with an assistant turn in {test_file}")
+
+    metrics = {
+        "model": client.model,
+        "test_file": str(test_file),
+        "params": client.params,
+        "examples": counts["all"],
+        "cached": counts["cached"],
+        "seconds": round(time.time() - start, 2),
+        **corpus_scores(totals["all"]),
+        "novels": {
+            novel: {"examples": counts[novel], **corpus_scores(stats)}
+            for novel, stats in sorted(totals.items())
+            if novel != "all"
+        },
+    }
+    json_io.write_json(out_dir / "metrics.json", metrics)
+    return metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Score a model on the test split through an OpenAI-compatible endpoint."
+    )
+
+    parser.add_argument(
+        "--model",
+        type=str,
+        required=True,
+        help="Model name the endpoint serves",
+    )
+    parser.add_argument(
+        "--base_url",
+        type=str,
+        default=DEFAULT_BASE_URL,
+        help=f"OpenAI-compatible API root (default: {DEFAULT_BASE_URL})",
+    )
+    parser.add_argument(
+        "--api_key",
+        type=str,
+        default=None,
+        help="API key (default: $OPENAI_API_KEY, if set)",
+    )
+    parser.add_argument(
+        "--test_file",
+        type=str,
+        default="output/test_data.jsonl",
+        help="ShareGPT JSONL to evaluate (default: output/test_data.jsonl)",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="output/eval",
+        help="Where results and the response cache go (default: output/eval)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=16,
+        help="Requests in flight (default: 16)",
+    )
+    parser.add_argument(
+        "--max_retries",
+        type=int,
+        default=4,
+        help="Retries for timeouts, 429 and 5xx responses (default: 4)",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=600,
+        help="Seconds to wait for one response (default: 600)",
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=0.0,
+        help="Sampling temperature (default: 0.0)",
+    )
+    parser.add_argument(
+        "--max_tokens",
+        type=int,
+        default=8192,
+        help="Generation limit per example (default: 8192)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="Only evaluate the first N examples",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processes computing metrics (default: CPU count)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=lambda x: x.lower() in ["true", "1", "yes"],
+        default=True,
+        help="Reuse cached responses (default: True)",
+    )
+
+    args = parser.parse_args()
+
+    out_dir = Path(args.output_dir) / args.model.replace("/", "__")
+    cache = ResponseCache(Path(args.output_dir) / "cache.jsonl") if args.cache else None
+
+    print(f"▶ Evaluating {args.model} on {args.test_file} via {args.base_url}")
+    with ChatClient(
+        args.model,
+        base_url=args.base_url,
+        api_key=args.api_key,
+        concurrency=args.concurrency,
+        max_retries=args.max_retries,
+        timeout=args.timeout,
+        temperature=args.temperature,
+        max_tokens=args.max_tokens,
+    ) as client:
+        try:
+            metrics = asyncio.run(
+                run_eval(
+                    client, cache, args.test_file, out_dir, args.workers, args.limit
+                )
+            )
+        except urllib.error.URLError as e:
+            # Responses received so far are cached; rerunning resumes from there
+            print(f"Error: {args.base_url} failed after retries: {e}")
+            sys.exit(1)
+        finally:
+            if cache is not None:
+                cache.close()
+
+    print(f"\n" + "=" * 60)
+    print(f"chrF: {metrics['chrf']:.2f}   BLEU: {metrics['bleu']:.2f}")
+    print(
+        f"{metrics['examples']} examples ({metrics['cached']} cached) "
+        f"in {metrics['seconds']:.1f}s"
+    )
+    for novel, scores in metrics["novels"].items():
+        print(
+            f"   {novel}: chrF {scores['chrf']:.2f}, BLEU {scores['bleu']:.2f} "
+            f"({scores['examples']} examples)"
+        )
+    print(f"Results saved to {out_dir}")
+    print(f"=" * 60)
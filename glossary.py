@@ -0,0 +1,505 @@
+"""
+Glossary of Korean -> English terms: mining, matching and consistency checks.
+
+Candidates are mined from aligned chapters two ways: [bracketed] spans that line up
+one-to-one within a chapter (skill and item names), and capitalised English names
+whose per-chapter counts track a Korean word's counts across the novel.
+
+Matching a glossary against a chapter is a single Aho-Corasick pass over the text,
+whatever the number of terms. pyahocorasick is used when installed; otherwise a
+pure-Python automaton with the same results.
+"""
+
+import argparse
+import re
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+import json_io
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+GLOSSARY_VERSION = 1
+GLOSSARY_HEADER = "Glossary:"
+# Hints added to one prompt at most
+MAX_HINTS = 20
+
+BRACKET_PATTERN = re.compile(r"\[([^\[\]\n]*)\]")
+HANGUL_WORD = re.compile(r"[가-힣]+")
+# Capitalised names of up to four words: "Gu Yangcheon", "Mount Hua Sect", "Wi Seol-Ah"
+ENGLISH_NAME = re.compile(
+    r"\b[A-Z][a-z]*(?:[-'][A-Za-z]+)*(?: (?:of |the )?[A-Z][a-z]*(?:[-'][A-Za-z]+)*){0,3}\b"
+)
+HANJA_GLOSS = re.compile(r"\([一-鿿]+\)")
+SENTENCE_END = ".!?…\"'-—:"
+SMALL_WORDS = {"of", "the", "and", "in", "on", "to", "a", "an"}
+# Capitalised words that start sentences or stand alone but are never part of a name
+COMMON_WORDS = {
+    "A", "After", "All", "An", "And", "As", "At", "Before", "But", "Even", "For",
+    "He", "Her", "His", "How", "Huh", "I", "If", "In", "It", "Its", "Just", "My",
+    "No", "Now", "Oh", "Once", "Or", "She", "So", "That", "The", "Then", "There",
+    "They", "This", "Though", "Well", "What", "When", "Where", "While", "Who", "Why",
+    "With", "Yes", "You", "Your",
+}  # fmt: skip
+
+# Particles stripped from the end of a Korean word, longest first
+PARTICLES = sorted(
+    [
+        "은", "는", "이", "가", "을", "를", "의", "에", "에게", "에서", "께서",
+        "와", "과", "도", "로", "으로", "만", "까지", "부터", "이나", "나", "야",
+        "아", "이여", "여", "한테", "처럼", "보다", "이라", "라고", "이라고", "이란",
+        "란", "이다", "님", "님의", "님이", "님은", "님께서", "에게서", "이랑", "랑",
+    ],
+    key=len,
+    reverse=True,
+)  # fmt: skip
+
+# Mining thresholds
+MIN_CHAPTERS = 3
+MIN_CORRELATION = 0.7
+# Share of the chapters mentioning either side that mention both
+MIN_OVERLAP = 0.5
+MAX_VOCABULARY = 3000
+MAX_KOREAN_CHARS = 15
+MAX_ENGLISH_WORDS = 6
+
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton over a fixed set of terms.
+
+    find() returns leftmost-longest, non-overlapping matches in one pass over the
+    text. Terms that start or end with a Latin letter or digit only match on word
+    boundaries, so "Hua" does not match inside "Huang".
+    """
+
+    def __init__(self, terms: Iterable[str]):
+        self.terms = sorted({t for t in terms if t})
+        if ahocorasick is not None:
+            self._automaton = ahocorasick.Automaton()
+            for term in self.terms:
+                self._automaton.add_word(term, term)
+            if self.terms:
+                self._automaton.make_automaton()
+        else:
+            self._automaton = None
+            self._build()
+
+    def _build(self):
+        """Trie with failure links; out[state] lists the lengths of terms ending there"""
+        self._goto = [{}]
+        self._out = [[]]
+        for term in self.terms:
+            state = 0
+            for ch in term:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(len(term))
+
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def _raw_matches(self, text: str) -> Iterable[Tuple[int, int]]:
+        """Every (start, end) of every term, overlaps included"""
+        if not self.terms:
+            return
+        if self._automaton is not None:
+            for end, term in self._automaton.iter(text):
+                yield end + 1 - len(term), end + 1
+            return
+
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length in out[state]:
+                yield i + 1 - length, i + 1
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Leftmost-longest matches as (start, end, term)"""
+        matches = []
+        cursor = 0
+        for start, end in sorted(self._raw_matches(text), key=lambda m: (m[0], -m[1])):
+            if start < cursor or not _on_boundary(text, start, end):
+                continue
+            matches.append((start, end, text[start:end]))
+            cursor = end
+        return matches
+
+    def counts(self, text: str) -> Counter:
+        return Counter(term for _, _, term in self.find(text))
+
+
+def _on_boundary(text: str, start: int, end: int) -> bool:
+    """Latin/digit edges of a match must not continue into a neighbouring word"""
+    if text[start].isascii() and text[start].isalnum():
+        if start > 0 and text[start - 1].isalnum():
+            return False
+    if text[end - 1].isascii() and text[end - 1].isalnum():
+        if end < len(text) and text[end].isalnum():
+            return False
+    return True
+
+
+def strip_particle(word: str) -> str:
+    """Drop a trailing particle if at least two syllables remain"""
+    for particle in PARTICLES:
+        if word.endswith(particle) and len(word) - len(particle) >= 2:
+            return word[: -len(particle)]
+    return word
+
+
+def korean_words(text: str) -> Counter:
+    """Hangul words of two or more syllables, particles stripped"""
+    words = (strip_particle(w) for w in HANGUL_WORD.findall(text))
+    return Counter(w for w in words if len(w) >= 2)
+
+
+def english_names(text: str) -> Counter:
+    """
+    Capitalised word sequences that look like names.
+
+    A one-word candidate only counts when it also appears mid-sentence somewhere in
+    the text, which drops "The", "But" and other sentence starters.
+    """
+    names = Counter()
+    mid_sentence = set()
+    for match in ENGLISH_NAME.finditer(text):
+        words = match.group().split(" ")
+        while words and (words[0] in COMMON_WORDS or "'" in words[0]):
+            words.pop(0)
+        while words and words[-1] in COMMON_WORDS | SMALL_WORDS:
+            words.pop()
+        if not words:
+            continue
+        name = " ".join(words)
+        names[name] += 1
+        before = text[: match.start()].rstrip(" ")
+        if before and before[-1] not in SENTENCE_END and before[-1] != "\n":
+            mid_sentence.add(name)
+    return Counter(
+        {name: n for name, n in names.items() if " " in name or name in mid_sentence}
+    )
+
+
+def _is_term_span(korean: str, english: str) -> bool:
+    """Short, title-cased bracket spans are names; sentences in brackets are not"""
+    words = english.split()
+    return (
+        0 < len(korean) <= MAX_KOREAN_CHARS
+        and 0 < len(words) <= MAX_ENGLISH_WORDS
+        and korean[-1] not in SENTENCE_END
+        and english[-1] not in SENTENCE_END
+        and all(w[0].isupper() or w in SMALL_WORDS for w in words if w[0].isalpha())
+    )
+
+
+def bracket_pairs(korean: str, english: str) -> List[Tuple[str, str]]:
+    """
+    Pair up bracketed spans of one chapter when both sides have the same number.
+
+    Hanja glosses and trailing punctuation are dropped from the Korean side.
+    """
+    korean_spans = BRACKET_PATTERN.findall(korean)
+    english_spans = BRACKET_PATTERN.findall(english)
+    if not korean_spans or len(korean_spans) != len(english_spans):
+        return []
+
+    pairs = []
+    for kr, en in zip(korean_spans, english_spans):
+        kr = HANJA_GLOSS.sub("", kr).strip().rstrip(".").strip()
+        en = en.strip()
+        if _is_term_span(kr, en):
+            pairs.append((kr, en))
+    return pairs
+
+
+def _vocabulary(counters: Sequence[Counter], min_chapters: int) -> List[str]:
+    """Terms in at least min_chapters chapters, most widespread first"""
+    chapters = Counter()
+    for counter in counters:
+        chapters.update(counter.keys())
+    frequent = [t for t, n in chapters.most_common() if n >= min_chapters]
+    return frequent[:MAX_VOCABULARY]
+
+
+def _count_matrix(counters: Sequence[Counter], vocabulary: List[str]) -> np.ndarray:
+    column = {term: j for j, term in enumerate(vocabulary)}
+    matrix = np.zeros((len(counters), len(vocabulary)), dtype=np.float32)
+    for i, counter in enumerate(counters):
+        for term, n in counter.items():
+            j = column.get(term)
+            if j is not None:
+                matrix[i, j] = n
+    return matrix
+
+
+def cooccurrence_pairs(
+    pairs: Sequence[Dict],
+    min_chapters: int = MIN_CHAPTERS,
+    min_correlation: float = MIN_CORRELATION,
+) -> List[Dict]:
+    """
+    Match Korean words to English names whose per-chapter counts move together.
+
+    Counts are log-scaled and correlated across all chapters in one matrix product;
+    a pair is kept when each side is the other's best match and they mostly appear
+    in the same chapters.
+    """
+    korean_counts = [korean_words(p["korean"]) for p in pairs]
+    english_counts = [english_names(p["english"]) for p in pairs]
+    korean_vocab = _vocabulary(korean_counts, min_chapters)
+    english_vocab = _vocabulary(english_counts, min_chapters)
+    if not korean_vocab or not english_vocab or len(pairs) < 2:
+        return []
+
+    def standardize(matrix):
+        matrix = np.log1p(matrix)
+        matrix -= matrix.mean(axis=0)
+        norms = np.linalg.norm(matrix, axis=0)
+        return matrix / np.where(norms > 0, norms, 1)
+
+    kr = _count_matrix(korean_counts, korean_vocab)
+    en = _count_matrix(english_counts, english_vocab)
+    correlation = standardize(kr).T @ standardize(en)
+
+    best_english = correlation.argmax(axis=1)
+    best_korean = correlation.argmax(axis=0)
+    present_kr = kr > 0
+    present_en = en > 0
+    chapters_kr = present_kr.sum(axis=0)
+
+    terms = []
+    for i, j in enumerate(best_english):
+        score = float(correlation[i, j])
+        if best_korean[j] != i or score < min_correlation:
+            continue
+        both = np.count_nonzero(present_kr[:, i] & present_en[:, j])
+        either = np.count_nonzero(present_kr[:, i] | present_en[:, j])
+        if both / either >= MIN_OVERLAP:
+            terms.append(
+                {
+                    "korean": korean_vocab[i],
+                    "english": english_vocab[j],
+                    "source": "cooccurrence",
+                    "score": round(score, 3),
+                    "chapters": int(chapters_kr[i]),
+                }
+            )
+    return terms
+
+
+def mine_terms(
+    pairs: Sequence[Dict],
+    min_chapters: int = MIN_CHAPTERS,
+    min_correlation: float = MIN_CORRELATION,
+) -> List[Dict]:
+    """
+    Glossary candidates from the aligned pairs of one novel.
+
+    Bracket pairs are kept whenever they agree in at least two chapters or never
+    disagree; co-occurrence pairs must clear min_correlation.
+    """
+    spans = defaultdict(Counter)
+    for p in pairs:
+        for kr, en in bracket_pairs(p["korean"], p["english"]):
+            spans[kr][en] += 1
+
+    terms = []
+    for kr, translations in spans.items():
+        en, n = translations.most_common(1)[0]
+        if n >= 2 or len(translations) == 1:
+            terms.append(
+                {
+                    "korean": kr,
+                    "english": en,
+                    "source": "bracket",
+                    "score": round(n / sum(translations.values()), 3),
+                    "chapters": n,
+                }
+            )
+
+    bracketed = {t["korean"] for t in terms}
+    terms.extend(
+        t
+        for t in cooccurrence_pairs(pairs, min_chapters, min_correlation)
+        if t["korean"] not in bracketed
+    )
+    return sorted(terms, key=lambda t: (-t["chapters"], t["korean"]))
+
+
+class Glossary:
+    """A Korean -> English term list with matchers for both languages"""
+
+    def __init__(self, terms: Sequence[Dict]):
+        self.terms = list(terms)
+        self.english_for = {t["korean"]: t["english"] for t in self.terms}
+        self.korean = TermMatcher(self.english_for)
+        self.english = TermMatcher(self.english_for.values())
+
+    @classmethod
+    def load(cls, path) -> "Glossary":
+        return cls(json_io.read_json(path)["terms"])
+
+    def save(self, path):
+        json_io.write_json(path, {"version": GLOSSARY_VERSION, "terms": self.terms})
+
+    def hints(self, korean_text: str, limit: int = MAX_HINTS) -> List[Tuple[str, str]]:
+        """Terms in a Korean text, in order of first appearance"""
+        seen = {}
+        for _, _, term in self.korean.find(korean_text):
+            seen.setdefault(term, self.english_for[term])
+            if len(seen) >= limit:
+                break
+        return list(seen.items())
+
+    def check(self, korean_text: str, english_text: str) -> Dict[str, bool]:
+        """For each term in the Korean text, whether its translation is in the English"""
+        found = self.english.counts(english_text)
+        return {
+            term: self.english_for[term] in found
+            for term in self.korean.counts(korean_text)
+        }
+
+
+def format_hints(hints: Sequence[Tuple[str, str]]) -> str:
+    """Prompt block listing glossary terms (empty string when there are none)"""
+    if not hints:
+        return ""
+    return "\n".join([GLOSSARY_HEADER] + [f"{kr} = {en}" for kr, en in hints])
+
+
+def consistency_report(glossary: Glossary, novels: Dict[str, Sequence[Dict]]) -> Dict:
+    """
+    Per term, the chapters whose English misses the glossary translation.
+
+    novels maps a novel name to its aligned pairs.
+    """
+    report = {}
+    for novel, pairs in novels.items():
+        terms = defaultdict(lambda: {"chapters": 0, "missing": []})
+        for idx, p in enumerate(pairs):
+            for term, ok in glossary.check(p["korean"], p["english"]).items():
+                terms[term]["chapters"] += 1
+                if not ok:
+                    terms[term]["missing"].append(idx)
+        report[novel] = {
+            term: {"english": glossary.english_for[term], **entry}
+            for term, entry in sorted(terms.items())
+            if entry["missing"]
+        }
+    return report
+
+
+if __name__ == "__main__":
+    from prepare_data import clean_text
+    from quality_filter import load_pairs
+
+    parser = argparse.ArgumentParser(
+        description="Mine a Korean -> English glossary from aligned files, or check "
+        "chapters against one."
+    )
+
+    parser.add_argument(
+        "command",
+        choices=["mine", "check"],
+        help="mine: write candidate terms; check: report inconsistent translations",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="output",
+        help="Directory holding one folder per novel (default: output)",
+    )
+    parser.add_argument(
+        "--glossary",
+        type=str,
+        default=None,
+        help="Glossary file (default: <output_dir>/glossary.json)",
+    )
+    parser.add_argument(
+        "--min_chapters",
+        type=int,
+        default=MIN_CHAPTERS,
+        help=f"Chapters a co-occurring term must appear in (default: {MIN_CHAPTERS})",
+    )
+    parser.add_argument(
+        "--min_correlation",
+        type=float,
+        default=MIN_CORRELATION,
+        help=f"Count correlation a co-occurring pair needs (default: {MIN_CORRELATION})",
+    )
+
+    args = parser.parse_args()
+
+    start = time.time()
+    glossary_file = Path(args.glossary or Path(args.output_dir) / "glossary.json")
+    novels = {
+        aligned_file.parent.name: [
+            {"korean": clean_text(p["korean"]), "english": clean_text(p["english"])}
+            for p in load_pairs(aligned_file)
+        ]
+        for aligned_file in sorted(Path(args.output_dir).rglob("aligned.json"))
+    }
+
+    if args.command == "mine":
+        # Terms already in the glossary (possibly hand-edited) win over new candidates
+        terms = Glossary.load(glossary_file).terms if glossary_file.exists() else []
+        known = {t["korean"] for t in terms}
+        for novel, pairs in novels.items():
+            mined = mine_terms(pairs, args.min_chapters, args.min_correlation)
+            new = [t for t in mined if t["korean"] not in known]
+            known.update(t["korean"] for t in new)
+            terms.extend({**t, "novel": novel} for t in new)
+            print(f"{novel}: {len(mined)} candidate(s), {len(new)} new")
+            for t in new[:10]:
+                print(
+                    f"   {t['korean']} = {t['english']} ({t['source']}, {t['score']})"
+                )
+
+        Glossary(terms).save(glossary_file)
+        print(
+            f"\n✅ {len(terms)} term(s) saved to {glossary_file} "
+            f"in {time.time() - start:.2f}s"
+        )
+
+    else:
+        glossary = Glossary.load(glossary_file)
+        report = consistency_report(glossary, novels)
+        report_file = glossary_file.with_name("glossary_report.json")
+        json_io.write_json(report_file, report)
+
+        for novel, terms in report.items():
+            print(f"{novel}: {len(terms)} inconsistent term(s)")
+            for term, entry in list(terms.items())[:10]:
+                missing = ", ".join(str(i + 1) for i in entry["missing"][:8])
+                print(
+                    f"   {term} = {entry['english']}: missing in "
+                    f"{len(entry['missing'])}/{entry['chapters']} chapters ({missing})"
+                )
+        print(
+            f"\n✅ Checked {len(glossary.terms)} term(s) in {time.time() - start:.2f}s. "
+            f"Report saved to {report_file}"
+        )
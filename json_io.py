@@ -0,0 +1,237 @@
+"""
+JSON and JSONL reading and writing shared by every tool.
+
+- orjson is used when it is installed, the standard json module otherwise; both
+  write the same layout (indent=2 or compact, non-ASCII text kept as is).
+- Paths ending in .zst are zstd-compressed, e.g. chapters_korean.json.zst.
+- iter_json_array and iter_jsonl stream records instead of loading the whole file.
+- Writes go to a temp file in the same directory that is renamed into place, so an
+  interrupted write never leaves a truncated file behind.
+"""
+
+import codecs
+import io
+import json
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+import zstandard
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+ZSTD_SUFFIX = ".zst"
+ZSTD_LEVEL = 3
+# Bytes read at a time while streaming a JSON array
+STREAM_CHUNK = 1 << 20
+
+_WHITESPACE = " \t\r\n"
+
+
+def is_compressed(path):
+    return Path(path).suffix == ZSTD_SUFFIX
+
+
+def loads(data):
+    """Parse JSON from str or bytes"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj, indent=None):
+    """
+    Serialize obj to UTF-8 JSON bytes.
+
+    indent is None for a single compact line or 2 for the pretty-printed layout
+    of json.dump(indent=2); orjson only handles those two, other widths fall
+    back to the json module.
+    """
+    if orjson is not None and indent in (None, 2):
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    separators = (",", ":") if indent is None else None
+    return json.dumps(
+        obj, ensure_ascii=False, indent=indent, separators=separators
+    ).encode("utf-8")
+
+
+def open_file(path, mode="rb"):
+    """
+    Open a file in binary mode ("rb", "wb" or "ab"), through zstd for .zst paths.
+
+    Appending to a .zst file adds a new frame; reading goes across all frames.
+    """
+    if not is_compressed(path):
+        return open(path, mode)
+
+    raw = open(path, mode)
+    if mode == "rb":
+        # Buffered so it can be read line by line
+        return io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(
+                raw, read_across_frames=True, closefd=True
+            )
+        )
+    return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(raw, closefd=True)
+
+
+def read_json(path):
+    """Load a whole JSON file"""
+    with open_file(path) as f:
+        return loads(f.read())
+
+
+def iter_json_array(path, chunk_size=STREAM_CHUNK):
+    """
+    Yield the items of a file holding one JSON array, without loading it whole.
+
+    Memory stays around one chunk plus the largest item.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, eof = "", 0, False
+
+    with open_file(path) as f:
+
+        def fill():
+            nonlocal buffer, pos, eof
+            data = f.read(chunk_size)
+            eof = not data
+            buffer = buffer[pos:] + text_decoder.decode(data, final=eof)
+            pos = 0
+            return not eof
+
+        def skip_to_token():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return pos < len(buffer)
+
+        if not skip_to_token() or buffer[pos] != "[":
+            raise ValueError(f"{path} does not hold a JSON array")
+        pos += 1
+
+        while skip_to_token():
+            if buffer[pos] == "]":
+                return
+            if buffer[pos] == ",":
+                pos += 1
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not fill():
+                    raise
+                continue
+            if end == len(buffer) and not eof:
+                # A number may continue in the next chunk
+                fill()
+                continue
+            pos = end
+            yield item
+
+    raise ValueError(f"{path} ends before its JSON array is closed")
+
+
+def iter_jsonl(path, skip_invalid=False):
+    """
+    Yield the records of a JSONL file, skipping blank lines.
+
+    With skip_invalid, lines that don't parse (such as a torn last line after a
+    crash) are skipped instead of raising.
+    """
+    with open_file(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                yield loads(line)
+            except ValueError:
+                if not skip_invalid:
+                    raise
+
+
+def _read_umask():
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Read once at import; reading it means setting it, which would race other threads
+_UMASK = _read_umask()
+
+
+def _target_mode(path):
+    """Mode for a rewritten file: the existing file's, else what open() would give"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_open(path):
+    """
+    Binary file for writing whose contents replace path only if the block succeeds.
+
+    The temp file lives next to path and is fsynced before the rename. It takes the
+    mode of the file it replaces, or the umask default for a new file, rather than
+    mkstemp's owner-only 0600.
+    """
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as raw:
+            os.fchmod(raw.fileno(), _target_mode(path))
+            if is_compressed(path):
+                compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+                with compressor.stream_writer(raw, closefd=False) as f:
+                    yield f
+            else:
+                yield raw
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(path, data, indent=2):
+    """Write JSON atomically, pretty-printed unless indent is None"""
+    with atomic_open(path) as f:
+        f.write(dumps(data, indent))
+
+
+def write_jsonl(path, records):
+    """Write an iterable of records as JSONL atomically; returns how many were written"""
+    count = 0
+    with atomic_open(path) as f:
+        for record in records:
+            f.write(dumps(record) + b"\n")
+            count += 1
+    return count
+
+
+def append_jsonl(path, records, sync=False):
+    """Append records to a JSONL file; with sync they are on disk when this returns"""
+    data = b"".join(dumps(record) + b"\n" for record in records)
+    with open_file(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        if sync and not is_compressed(path):
+            os.fsync(f.fileno())
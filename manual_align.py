@@ -1,15 +1,31 @@
-import json
+import os
 import re
 from pathlib import Path
 from typing import Dict, List, Tuple
 
 import streamlit as st
 
+import edit_journal
+import json_io
+import search_index
+from align_suggest import confident_alignments, suggest_alignments
+from search_ui import SEARCH_LIMIT, search_corpus
+
+
+def file_signature(file_path: Path) -> Tuple[int, int]:
+    """Return (mtime_ns, size) of a file, used as a cache key."""
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def _load_chapters(file_path: str, signature: Tuple[int, int]) -> List[Dict]:
+    return json_io.read_json(file_path)
+
 
 def load_chapters(file_path: Path) -> List[Dict]:
-    """Load chapters from a JSON file."""
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Load chapters from a JSON file, reusing the parsed data while it is unchanged."""
+    return _load_chapters(str(file_path), file_signature(file_path))
 
 
 def parse_english_chapter(chapter_title: str) -> Tuple[int, int]:
@@ -128,9 +144,116 @@ def save_aligned_chapters(
         # Add to aligned data
         aligned_data.append({"korean": korean_merged, "english": english_merged})
 
-    # Save to file
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(aligned_data, f, ensure_ascii=False, indent=2)
+    # Save to file; edits journaled against the old alignment no longer apply
+    json_io.write_json(output_path, aligned_data)
+    edit_journal.discard(output_path)
+
+
+class AlignmentIndex:
+    """
+    Alignments plus per-side lookup structures for the chapter pickers.
+
+    Tracks how many alignments use each chapter index and keeps picker labels
+    precomputed, updating both incrementally as alignments are added or removed.
+    """
+
+    LANGUAGES = ("english", "korean")
+
+    def __init__(
+        self,
+        english_chapters: List[Dict],
+        korean_chapters: List[Dict],
+        alignments: List[Dict] = None,
+    ):
+        self.alignments: List[Dict] = []
+        self.chapter_numbers = {
+            "english": [ch.get("chapter_number", "Unknown") for ch in english_chapters],
+            "korean": [ch.get("chapter_number", "Unknown") for ch in korean_chapters],
+        }
+        self.use_counts = {
+            lang: [0] * len(numbers) for lang, numbers in self.chapter_numbers.items()
+        }
+        self.labels = {
+            lang: [f"○ {number}" for number in numbers]
+            for lang, numbers in self.chapter_numbers.items()
+        }
+        self.aligned_counts = {lang: 0 for lang in self.LANGUAGES}
+
+        for alignment in alignments or []:
+            self.add(alignment)
+
+    def _update(self, lang: str, idx: int, delta: int):
+        counts = self.use_counts[lang]
+        before = counts[idx]
+        counts[idx] += delta
+
+        # Only relabel when the chapter flips between aligned and unaligned
+        if before == 0 and counts[idx] > 0:
+            self.aligned_counts[lang] += 1
+            self.labels[lang][idx] = f"✓ {self.chapter_numbers[lang][idx]}"
+        elif before > 0 and counts[idx] == 0:
+            self.aligned_counts[lang] -= 1
+            self.labels[lang][idx] = f"○ {self.chapter_numbers[lang][idx]}"
+
+    def add(self, alignment: Dict):
+        """Append an alignment and mark its chapters as used."""
+        self.alignments.append(alignment)
+        for lang in self.LANGUAGES:
+            for idx in alignment[lang]:
+                self._update(lang, idx, 1)
+
+    def remove(self, position: int) -> Dict:
+        """Remove the alignment at position and release its chapters."""
+        alignment = self.alignments.pop(position)
+        for lang in self.LANGUAGES:
+            for idx in alignment[lang]:
+                self._update(lang, idx, -1)
+        return alignment
+
+    def is_aligned(self, lang: str, idx: int) -> bool:
+        return self.use_counts[lang][idx] > 0
+
+    def label(self, lang: str, idx: int) -> str:
+        return self.labels[lang][idx]
+
+    def options(self, lang: str, show_aligned: bool) -> List[int]:
+        """Chapter indices to offer in a picker."""
+        if show_aligned:
+            return list(range(len(self.use_counts[lang])))
+        return [idx for idx, count in enumerate(self.use_counts[lang]) if not count]
+
+
+def set_alignments(alignments: List[Dict]):
+    """Replace the session's alignments and rebuild the lookup index."""
+    index = AlignmentIndex(
+        st.session_state.english_chapters,
+        st.session_state.korean_chapters,
+        alignments,
+    )
+    st.session_state.alignment_index = index
+    st.session_state.alignments = index.alignments
+
+
+def prefill_selection(korean_idx: int, english_idx: int):
+    """Pre-select a suggested pair in both chapter pickers."""
+    st.session_state.korean_select = [korean_idx]
+    st.session_state.english_select = [english_idx]
+
+
+def select_search_hit(hit: Dict):
+    """Add the chapter of a search result to its language's picker."""
+    lang = hit["language"]
+    select_key = f"{lang}_select"
+    show_key = "show_aligned_kr" if lang == "korean" else "show_aligned_en"
+
+    # Aligned chapters are only offered while the picker shows them
+    if st.session_state.alignment_index.is_aligned(lang, hit["chapter"]):
+        st.session_state[show_key] = True
+
+    selected = list(st.session_state.get(select_key, []))
+    if hit["chapter"] not in selected:
+        selected.append(hit["chapter"])
+    st.session_state[select_key] = selected
 
 
 def get_chapter_preview(chapter: Dict, lang: str, max_chars: int = 200) -> str:
@@ -179,15 +302,19 @@ def main():
                     Path(output_file).parent / f"{Path(output_file).stem}_indices.json"
                 )
                 if indices_path.exists():
-                    with open(indices_path, "r", encoding="utf-8") as f:
-                        st.session_state.alignments = json.load(f)
+                    set_alignments(load_chapters(indices_path))
                 else:
-                    st.session_state.alignments = []
+                    set_alignments([])
 
                 st.success(
                     f"Loaded {len(st.session_state.english_chapters)} English and {len(st.session_state.korean_chapters)} Korean chapters"
                 )
                 st.session_state.current_alignment = {"english": [], "korean": []}
+                st.session_state.suggestions = None
+                st.session_state.loaded_files = {
+                    "english": english_file,
+                    "korean": korean_file,
+                }
             except Exception as e:
                 st.error(f"Error loading files: {e}")
 
@@ -201,19 +328,100 @@ def main():
                     st.session_state.english_chapters,
                     st.session_state.korean_chapters,
                 )
-                st.session_state.alignments = auto_alignments
+                set_alignments(auto_alignments)
                 st.success(f"Auto-aligned {len(auto_alignments)} chapter pairs!")
                 st.rerun()
             else:
                 st.error("Please load chapters first!")
 
+        # Feature-based suggestions for chapters the title regexes can't parse
+        st.divider()
+        band = st.number_input("Suggestion band (± chapters)", 1, 200, 15)
+        if st.button("💡 Suggest Alignments"):
+            if st.session_state.get("english_chapters") and st.session_state.get(
+                "korean_chapters"
+            ):
+                with st.spinner("Scoring chapter pairs..."):
+                    st.session_state.suggestions = suggest_alignments(
+                        st.session_state.korean_chapters,
+                        st.session_state.english_chapters,
+                        band=int(band),
+                        top_k=5,
+                    )
+                st.success("Suggestions ready!")
+            else:
+                st.error("Please load chapters first!")
+
+        if st.session_state.get("suggestions"):
+            min_score = st.slider("Minimum suggestion score", 0.0, 1.0, 0.6, 0.05)
+            if st.button("✨ Accept Confident Suggestions"):
+                index = st.session_state.alignment_index
+                accepted = confident_alignments(
+                    st.session_state.suggestions,
+                    min_score=min_score,
+                    used_korean=[
+                        i
+                        for i in range(len(st.session_state.korean_chapters))
+                        if index.is_aligned("korean", i)
+                    ],
+                    used_english=[
+                        i
+                        for i in range(len(st.session_state.english_chapters))
+                        if index.is_aligned("english", i)
+                    ],
+                )
+                for alignment in accepted:
+                    index.add(alignment)
+                st.success(f"Accepted {len(accepted)} suggested pairs!")
+                st.rerun()
+
+        # Full-text search over the loaded files (or all of output/)
+        st.divider()
+        st.header("🔎 Search")
+        query = st.text_input("Find text in chapters", placeholder="Korean or English")
+        loaded_only = st.checkbox("Only the loaded files", value=True)
+
+        if query.strip():
+            loaded = st.session_state.get("loaded_files") or {
+                "english": english_file,
+                "korean": korean_file,
+            }
+            hits = search_corpus(
+                query, files=list(loaded.values()) if loaded_only else None
+            )
+            st.caption(
+                f"{len(hits)} match(es)"
+                f"{f' (first {SEARCH_LIMIT})' if len(hits) == SEARCH_LIMIT else ''}"
+            )
+
+            chapters_loaded = "loaded_files" in st.session_state
+            for i, hit in enumerate(hits):
+                hit_file = Path(hit["file"])
+                label = "KR" if hit["language"] == "korean" else "EN"
+                title = f"{hit_file.parent.name} · Ch {hit['chapter'] + 1} · {label} ¶{hit['paragraph'] + 1}"
+                in_loaded_file = (
+                    chapters_loaded
+                    and Path(loaded[hit["language"]]).resolve() == hit_file.resolve()
+                )
+                if in_loaded_file:
+                    st.button(
+                        f"Select {title}",
+                        key=f"search_hit_{i}",
+                        on_click=select_search_hit,
+                        args=(hit,),
+                        use_container_width=True,
+                    )
+                else:
+                    st.write(title)
+                st.caption(search_index.snippet(hit["text"], query))
+
     # Initialize session state
     if "english_chapters" not in st.session_state:
         st.session_state.english_chapters = []
     if "korean_chapters" not in st.session_state:
         st.session_state.korean_chapters = []
-    if "alignments" not in st.session_state:
-        st.session_state.alignments = []
+    if "alignment_index" not in st.session_state:
+        set_alignments(st.session_state.get("alignments", []))
     if "current_alignment" not in st.session_state:
         st.session_state.current_alignment = {"english": [], "korean": []}
 
@@ -221,6 +429,8 @@ def main():
         st.info("👈 Please load chapter files from the sidebar to begin")
         return
 
+    index = st.session_state.alignment_index
+
     # Main content area
     col1, col2 = st.columns(2)
 
@@ -228,31 +438,15 @@ def main():
     with col1:
         st.header("English Chapters")
 
-        # Show already aligned chapters
-        aligned_english = set()
-        for alignment in st.session_state.alignments:
-            aligned_english.update(alignment["english"])
-
         # Filter options
         show_aligned = st.checkbox(
             "Show aligned chapters", value=False, key="show_aligned_en"
         )
 
-        english_options = []
-        for i, chapter in enumerate(st.session_state.english_chapters):
-            is_aligned = i in aligned_english
-            if show_aligned or not is_aligned:
-                chapter_num = chapter.get("chapter_number", "Unknown")
-                status = "✓" if is_aligned else "○"
-                label = f"{status} {chapter_num}"
-                english_options.append((i, label, chapter))
-
         selected_english = st.multiselect(
             "Select English chapters to align",
-            options=[opt[0] for opt in english_options],
-            format_func=lambda x: next(
-                opt[1] for opt in english_options if opt[0] == x
-            ),
+            options=index.options("english", show_aligned),
+            format_func=lambda x: index.label("english", x),
             key="english_select",
         )
 
@@ -268,28 +462,14 @@ def main():
     with col2:
         st.header("Korean Chapters")
 
-        # Show already aligned chapters
-        aligned_korean = set()
-        for alignment in st.session_state.alignments:
-            aligned_korean.update(alignment["korean"])
-
         show_aligned_kr = st.checkbox(
             "Show aligned chapters", value=False, key="show_aligned_kr"
         )
 
-        korean_options = []
-        for i, chapter in enumerate(st.session_state.korean_chapters):
-            is_aligned = i in aligned_korean
-            if show_aligned_kr or not is_aligned:
-                chapter_num = chapter.get("chapter_number", "Unknown")
-                status = "✓" if is_aligned else "○"
-                label = f"{status} {chapter_num}"
-                korean_options.append((i, label, chapter))
-
         selected_korean = st.multiselect(
             "Select Korean chapters to align",
-            options=[opt[0] for opt in korean_options],
-            format_func=lambda x: next(opt[1] for opt in korean_options if opt[0] == x),
+            options=index.options("korean", show_aligned_kr),
+            format_func=lambda x: index.label("korean", x),
             key="korean_select",
         )
 
@@ -315,7 +495,7 @@ def main():
                 "english": sorted(selected_english),
                 "korean": sorted(selected_korean),
             }
-            st.session_state.alignments.append(new_alignment)
+            index.add(new_alignment)
             st.success(
                 f"Created alignment: {len(selected_english)} EN ↔ {len(selected_korean)} KR"
             )
@@ -336,6 +516,43 @@ def main():
         if st.button("🗑️ Clear Selection"):
             st.rerun()
 
+    # Suggested matches for the selected (or first unaligned) Korean chapter
+    suggestions = st.session_state.get("suggestions")
+    if suggestions:
+        if len(selected_korean) == 1:
+            target = selected_korean[0]
+        else:
+            target = next(
+                (
+                    s["korean"]
+                    for s in suggestions
+                    if not index.is_aligned("korean", s["korean"])
+                ),
+                None,
+            )
+
+        if target is not None and target < len(suggestions):
+            st.divider()
+            st.subheader(
+                f"Suggestions for {st.session_state.korean_chapters[target].get('chapter_number', 'Unknown')}"
+            )
+            for candidate in suggestions[target]["candidates"]:
+                en_idx = candidate["english"]
+                if index.is_aligned("english", en_idx):
+                    continue
+                col1, col2, col3 = st.columns([3, 1, 1])
+                with col1:
+                    st.write(index.label("english", en_idx))
+                with col2:
+                    st.write(f"score {candidate['score']:.2f}")
+                with col3:
+                    st.button(
+                        "Use",
+                        key=f"suggest_{target}_{en_idx}",
+                        on_click=prefill_selection,
+                        args=(target, en_idx),
+                    )
+
     # Show existing alignments
     if st.session_state.alignments:
         st.divider()
@@ -363,7 +580,7 @@ def main():
 
                 with col3:
                     if st.button("Delete", key=f"del_{i}"):
-                        st.session_state.alignments.pop(i)
+                        index.remove(i)
                         st.rerun()
 
     # Statistics
@@ -372,20 +589,8 @@ def main():
         st.header("Statistics")
         total_en = len(st.session_state.english_chapters)
         total_kr = len(st.session_state.korean_chapters)
-        aligned_en_count = len(
-            set(
-                idx
-                for alignment in st.session_state.alignments
-                for idx in alignment["english"]
-            )
-        )
-        aligned_kr_count = len(
-            set(
-                idx
-                for alignment in st.session_state.alignments
-                for idx in alignment["korean"]
-            )
-        )
+        aligned_en_count = index.aligned_counts["english"]
+        aligned_kr_count = index.aligned_counts["korean"]
 
         st.metric("Total Alignments", len(st.session_state.alignments))
         st.metric("English Aligned", f"{aligned_en_count}/{total_en}")
@@ -0,0 +1,264 @@
+"""
+Per-novel data mixing for the training split.
+
+prepare_data writes the training examples of every novel to its own shard
+(<output_dir>/shards/<novel>.jsonl); this module draws training_data.jsonl from the
+shards:
+    - a novel's share is proportional to weight * examples ** (1 / temperature), so
+      temperature 1 keeps the natural mix and higher values flatten it towards
+      equal shares (novels whose share exceeds their size are repeated),
+    - caps bound how many examples a novel gives; what they free up goes to the rest,
+    - the seed fixes every draw, so a mix is reproducible and trying another one
+      only rereads the shards.
+
+Shard lines are copied without being parsed, and memory holds one index per drawn
+example rather than the examples themselves.
+"""
+
+import argparse
+import math
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+import json_io
+
+SHARD_DIR = "shards"
+
+
+def shard_path(shard_dir, novel) -> Path:
+    return Path(shard_dir) / f"{novel}.jsonl"
+
+
+def iter_lines(path):
+    """Non-blank lines of a JSONL shard as bytes, each ending in a newline"""
+    with json_io.open_file(path) as f:
+        for line in f:
+            if line.strip():
+                yield line if line.endswith(b"\n") else line + b"\n"
+
+
+def count_examples(path) -> int:
+    return sum(1 for _ in iter_lines(path))
+
+
+def allocate(
+    counts: Dict[str, int],
+    weights: Optional[Dict[str, float]] = None,
+    caps: Optional[Dict[str, int]] = None,
+    temperature: float = 1.0,
+    total: Optional[int] = None,
+) -> Dict[str, int]:
+    """
+    Number of examples to draw from each novel.
+
+    total defaults to the corpus size after caps. Novels whose share would pass
+    their cap are fixed at the cap and the remaining budget is split among the
+    others; shares are rounded by largest remainder so they add up to total.
+    """
+    weights = weights or {}
+    caps = caps or {}
+    if temperature <= 0:
+        raise ValueError("temperature must be positive")
+
+    scores = {
+        novel: weights.get(novel, 1.0) * count ** (1 / temperature) if count else 0.0
+        for novel, count in counts.items()
+    }
+    limits = {
+        novel: caps[novel] if novel in caps else math.inf
+        for novel in counts
+        if scores[novel] > 0
+    }
+    if total is None:
+        total = sum(min(counts[novel], limit) for novel, limit in limits.items())
+    total = int(min(total, sum(limits.values())))
+
+    targets = {novel: 0 for novel in counts}
+    free = set(limits)
+    budget = total
+    while free:
+        scale = budget / sum(scores[novel] for novel in free)
+        over = {novel for novel in free if scores[novel] * scale > limits[novel]}
+        if not over:
+            break
+        for novel in over:
+            targets[novel] = limits[novel]
+            budget -= limits[novel]
+        free -= over
+
+    if free:
+        exact = {novel: scores[novel] * scale for novel in free}
+        for novel, value in exact.items():
+            targets[novel] = int(value)
+        remainder = budget - sum(targets[novel] for novel in free)
+        by_fraction = sorted(free, key=lambda n: (-(exact[n] % 1), n))
+        for novel in by_fraction[:remainder]:
+            targets[novel] += 1
+
+    return targets
+
+
+def _draw(path, count, target, chosen):
+    """A novel's drawn lines: whole passes over the shard, then the chosen subset"""
+    passes, _ = divmod(target, count)
+    for _ in range(passes):
+        yield from iter_lines(path)
+    if len(chosen):
+        wanted = iter(chosen)
+        next_wanted = next(wanted)
+        for idx, line in enumerate(iter_lines(path)):
+            if idx == next_wanted:
+                yield line
+                next_wanted = next(wanted, None)
+                if next_wanted is None:
+                    return
+
+
+def mix_shards(
+    shard_dir,
+    output_file,
+    weights=None,
+    caps=None,
+    temperature=1.0,
+    total=None,
+    seed=None,
+) -> Dict[str, Dict]:
+    """
+    Write output_file by drawing from every shard in shard_dir.
+
+    Novels are interleaved uniformly at random, so any prefix of the file follows
+    the mix. Returns {novel: {"examples", "drawn", "share"}}.
+    """
+    shards = {path.stem: path for path in sorted(Path(shard_dir).glob("*.jsonl"))}
+    for novel in sorted(set(weights or {}) | set(caps or {})):
+        if novel not in shards:
+            print(f"Warning: no shard for '{novel}' in {shard_dir}; ignoring it")
+
+    counts = {novel: count_examples(path) for novel, path in shards.items()}
+    targets = allocate(counts, weights, caps, temperature, total)
+    novels = [novel for novel in shards if targets[novel]]
+
+    rng = np.random.default_rng(seed)
+    # Partial passes take a random subset, in shard order
+    chosen = {
+        novel: np.sort(
+            rng.choice(counts[novel], targets[novel] % counts[novel], replace=False)
+        )
+        for novel in novels
+    }
+    order = np.repeat(np.arange(len(novels)), [targets[n] for n in novels])
+    rng.shuffle(order)
+
+    streams = [
+        _draw(shards[novel], counts[novel], targets[novel], chosen[novel])
+        for novel in novels
+    ]
+    with json_io.atomic_open(output_file) as f:
+        for i in order:
+            f.write(next(streams[i]))
+
+    drawn = int(len(order))
+    return {
+        novel: {
+            "examples": counts[novel],
+            "drawn": targets[novel],
+            "share": round(targets[novel] / max(drawn, 1), 4),
+        }
+        for novel in shards
+    }
+
+
+def print_mix(report):
+    for novel, entry in sorted(report.items(), key=lambda kv: -kv[1]["drawn"]):
+        repeats = entry["drawn"] / entry["examples"] if entry["examples"] else 0
+        print(
+            f"   {novel}: {entry['drawn']}/{entry['examples']} examples "
+            f"({entry['share']:.1%} of the mix, {repeats:.2f}x)"
+        )
+
+
+def parse_assignments(values, cast):
+    """{"name": value} from repeated NAME=VALUE arguments (names may contain '=')"""
+    assignments = {}
+    for value in values or []:
+        name, sep, number = value.rpartition("=")
+        if not sep or not name:
+            raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got '{value}'")
+        assignments[name] = cast(number)
+    return assignments
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Draw the training file from per-novel shards with weights and caps."
+    )
+
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="output",
+        help=f"Directory holding {SHARD_DIR}/ and training_data.jsonl (default: output)",
+    )
+    parser.add_argument(
+        "--weight",
+        action="append",
+        metavar="NOVEL=WEIGHT",
+        help="Scale a novel's share (repeatable, default weight: 1)",
+    )
+    parser.add_argument(
+        "--cap",
+        action="append",
+        metavar="NOVEL=MAX",
+        help="Draw at most this many examples from a novel (repeatable)",
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=1.0,
+        help="Above 1 flattens the mix towards equal shares per novel (default: 1.0)",
+    )
+    parser.add_argument(
+        "--total",
+        type=int,
+        default=None,
+        help="Examples in the training file (default: all examples, after caps)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Sampling seed (default: 42)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Training file to write (default: <output_dir>/training_data.jsonl)",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        weights = parse_assignments(args.weight, float)
+        caps = parse_assignments(args.cap, int)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+
+    shard_dir = Path(args.output_dir) / SHARD_DIR
+    if not any(shard_dir.glob("*.jsonl")):
+        parser.error(f"no shards in {shard_dir}; run prepare_data.py first")
+    output_file = Path(args.output or Path(args.output_dir) / "training_data.jsonl")
+
+    start = time.time()
+    report = mix_shards(
+        shard_dir, output_file, weights, caps, args.temperature, args.total, args.seed
+    )
+    print_mix(report)
+    drawn = sum(entry["drawn"] for entry in report.values())
+    print(
+        f"\n✅ Drew {drawn} examples from {len(report)} shard(s) in "
+        f"{time.time() - start:.2f}s. Saved to {output_file}"
+    )
@@ -0,0 +1,239 @@
+"""
+Async client for OpenAI-compatible chat endpoints (vLLM, llama.cpp, TGI, ...).
+
+Requests run on a thread pool through asyncio, so the standard library is enough:
+concurrency is bounded by the pool size, transient failures (timeouts, 429, 5xx)
+are retried with exponential backoff, and a JSONL cache keyed by prompt hash makes
+reruns free.
+
+Run this module with --stub to start a local stand-in server for testing.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import json_io
+
+DEFAULT_BASE_URL = "http://localhost:8000/v1"
+RETRY_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class ChatClient:
+    """
+    Chat completions with bounded concurrency and retries.
+
+    Extra keyword arguments (temperature, max_tokens, ...) are sent with every
+    request and are part of the cache key.
+    """
+
+    def __init__(
+        self,
+        model,
+        base_url=DEFAULT_BASE_URL,
+        api_key=None,
+        concurrency=8,
+        max_retries=4,
+        backoff_base=2.0,
+        timeout=600,
+        **params,
+    ):
+        self.model = model
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.params = params
+        self._executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def cache_key(self, messages):
+        """Hash of everything that determines the response"""
+        payload = {"model": self.model, "messages": messages, "params": self.params}
+        encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def _post(self, messages):
+        body = json.dumps(
+            {"model": self.model, "messages": messages, **self.params}
+        ).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        request = urllib.request.Request(self.url, data=body, headers=headers)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            data = json.load(response)
+        return data["choices"][0]["message"]["content"]
+
+    async def complete(self, messages):
+        """Reply text for a list of {"role", "content"} messages"""
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await loop.run_in_executor(self._executor, self._post, messages)
+            except urllib.error.HTTPError as e:
+                if e.code not in RETRY_STATUS or attempt == self.max_retries:
+                    raise
+            except (urllib.error.URLError, TimeoutError, ConnectionError):
+                if attempt == self.max_retries:
+                    raise
+            await asyncio.sleep(self.backoff_base * 2**attempt)
+
+
+class ResponseCache:
+    """
+    Append-only JSONL of {"key", "response"} lines.
+
+    Every response is flushed as soon as it arrives, so an interrupted run loses
+    nothing; a torn last line is ignored on load.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.responses = {}
+        if self.path.exists():
+            for entry in json_io.iter_jsonl(self.path, skip_invalid=True):
+                self.responses[entry["key"]] = entry["response"]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = json_io.open_file(self.path, "ab")
+
+    def __len__(self):
+        return len(self.responses)
+
+    def get(self, key):
+        return self.responses.get(key)
+
+    def put(self, key, response):
+        self.responses[key] = response
+        self._file.write(json_io.dumps({"key": key, "response": response}) + b"\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+async def cached_complete(client, cache, messages):
+    """Return (reply, from_cache) for messages, calling the endpoint on a miss"""
+    key = client.cache_key(messages)
+    if cache is not None:
+        response = cache.get(key)
+        if response is not None:
+            return response, True
+    response = await client.complete(messages)
+    if cache is not None:
+        cache.put(key, response)
+    return response, False
+
+
+def serve_stub(port=8001, answers=None, delay=0.0):
+    """
+    Minimal OpenAI-compatible server for testing clients.
+
+    Replies with the assistant turn of the ShareGPT record whose user turn matches
+    the request (from the answers JSONL), otherwise echoes the last user message.
+    """
+    replies = {}
+    if answers:
+        for record in json_io.iter_jsonl(answers):
+            messages = record["messages"]
+            user = [m["value"] for m in messages if m["from"] in ("user", "human")]
+            reply = [m["value"] for m in messages if m["from"] in ("assistant", "gpt")]
+            if user and reply:
+                replies[user[-1]] = reply[-1]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            user = [m["content"] for m in request["messages"] if m["role"] == "user"]
+            content = replies.get(user[-1], user[-1]) if user else ""
+            time.sleep(delay)
+
+            body = json.dumps(
+                {
+                    "object": "chat.completion",
+                    "model": request.get("model"),
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a stub OpenAI-compatible server for testing eval and translation."
+    )
+
+    parser.add_argument(
+        "--stub",
+        action="store_true",
+        help="Start the stub server (the only mode for now)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8001,
+        help="Port to listen on (default: 8001)",
+    )
+    parser.add_argument(
+        "--answers",
+        type=str,
+        default=None,
+        help="ShareGPT JSONL whose assistant turns are returned for matching prompts",
+    )
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.0,
+        help="Seconds to wait before every reply, to mimic generation time",
+    )
+
+    args = parser.parse_args()
+
+    if not args.stub:
+        parser.error("nothing to do; pass --stub")
+
+    server = serve_stub(args.port, args.answers, args.delay)
+    print(f"✓ Stub server on http://127.0.0.1:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,414 @@
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import auto_align
+import dedup
+import json_io
+import mix_data
+import prepare_data
+import pretokenize
+import quality_filter
+
+MANIFEST_NAME = ".pipeline_manifest.json"
+
+
+class Stage:
+    """A pipeline step with declared input and output files"""
+
+    def __init__(
+        self, name, func, inputs, outputs, kwargs=None, deps=(), protect=False
+    ):
+        self.name = name
+        self.func = func
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.kwargs = kwargs or {}
+        self.deps = list(deps)
+        # Protected outputs are never overwritten once someone else has edited them
+        self.protect = protect
+
+
+def file_hash(path, manifest):
+    """SHA-256 of a file, reusing the manifest entry while mtime and size match"""
+    stat = os.stat(path)
+    cached = manifest["files"].get(str(path))
+    if (
+        cached
+        and cached["mtime_ns"] == stat.st_mtime_ns
+        and cached["size"] == stat.st_size
+    ):
+        return cached["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+
+    manifest["files"][str(path)] = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest.hexdigest(),
+    }
+    return digest.hexdigest()
+
+
+def hash_files(paths, manifest):
+    return {str(p): file_hash(p, manifest) for p in paths if Path(p).exists()}
+
+
+def load_manifest(output_dir):
+    path = Path(output_dir) / MANIFEST_NAME
+    if path.exists():
+        return json_io.read_json(path)
+    return {"files": {}, "stages": {}}
+
+
+def save_manifest(output_dir, manifest):
+    json_io.write_json(Path(output_dir) / MANIFEST_NAME, manifest)
+
+
+def stage_status(stage, manifest):
+    """Return 'fresh', 'stale' or 'protected' for a stage"""
+    record = manifest["stages"].get(stage.name)
+    outputs = hash_files(stage.outputs, manifest)
+
+    if stage.protect and outputs:
+        # An output we did not write (or that was edited since) belongs to a human
+        if not record or record["outputs"] != outputs:
+            return "protected"
+
+    if not record or len(outputs) != len(stage.outputs):
+        return "stale"
+    if record["inputs"] != hash_files(stage.inputs, manifest):
+        return "stale"
+    if record["outputs"] != outputs or record["kwargs"] != stage.kwargs:
+        return "stale"
+    return "fresh"
+
+
+def run_stage(stage):
+    stage.func(**stage.kwargs)
+    return stage.name
+
+
+def align_novel(korean_path, english_path, output_path):
+    korean_chapters = auto_align.load_chapters(korean_path)
+    english_chapters = auto_align.load_chapters(english_path)
+    aligned = auto_align.align_chapters(korean_chapters, english_chapters)
+    auto_align.save_aligned_chapters(aligned, output_path)
+
+
+def build_stages(
+    output_dir,
+    seed=42,
+    model_type="nemo",
+    max_tokens=10240,
+    tokenizer=None,
+    quality_z=quality_filter.Z_THRESHOLD,
+    glossary=None,
+    weights=None,
+    caps=None,
+    temperature=1.0,
+    total=None,
+):
+    """
+    Build the stage DAG for everything under output_dir.
+
+    align:<novel> (one per novel with raw chapters) -> prepare -> mix -> dedup
+
+    prepare writes per-novel shards and the test file; mix draws the training file
+    from the shards, so changing the mix (weights, caps, temperature, total) only
+    reruns mix and what follows.
+    """
+    output_dir = Path(output_dir)
+    stages = []
+
+    for korean_path in sorted(output_dir.glob("*/chapters_korean.json")):
+        novel_dir = korean_path.parent
+        english_path = novel_dir / "chapters_english.json"
+        if not english_path.exists():
+            continue
+
+        aligned_path = novel_dir / "aligned.json"
+        stages.append(
+            Stage(
+                f"align:{novel_dir.name}",
+                align_novel,
+                inputs=[korean_path, english_path],
+                outputs=[aligned_path],
+                kwargs={
+                    "korean_path": str(korean_path),
+                    "english_path": str(english_path),
+                    "output_path": str(aligned_path),
+                },
+                protect=True,
+            )
+        )
+
+    # Manually aligned novels feed prepare too, as do their pending edit journals
+    aligned_files = {p for p in output_dir.glob("*/aligned.json")}
+    aligned_files.update(stage.outputs[0] for stage in stages)
+    journals = [
+        p.with_name(f"{p.name}.journal.jsonl")
+        for p in aligned_files
+        if p.with_name(f"{p.name}.journal.jsonl").exists()
+    ]
+
+    prepare_inputs = sorted(aligned_files) + sorted(journals)
+    if glossary:
+        prepare_inputs.append(Path(glossary))
+
+    train_file = output_dir / "training_data.jsonl"
+    test_file = output_dir / "test_data.jsonl"
+    shards = [
+        mix_data.shard_path(output_dir / mix_data.SHARD_DIR, p.parent.name)
+        for p in sorted(aligned_files)
+    ]
+    stages.append(
+        Stage(
+            "prepare",
+            prepare_data.build_shards,
+            inputs=prepare_inputs,
+            outputs=shards + [test_file],
+            kwargs={
+                "output_dir": str(output_dir),
+                "model_type": model_type,
+                "max_tokens": max_tokens,
+                "seed": seed,
+                "quality_z": quality_z,
+                "glossary": glossary,
+            },
+            deps=[stage.name for stage in stages],
+        )
+    )
+
+    outputs = [train_file]
+    if tokenizer:
+        outputs += [
+            output_dir / "tokenized" / s / name
+            for s in ("train", "test")
+            for name in ("meta.json", pretokenize.AXOLOTL_FILE)
+        ]
+    stages.append(
+        Stage(
+            "mix",
+            prepare_data.mix_training_data,
+            inputs=shards + [test_file],
+            outputs=outputs,
+            kwargs={
+                "output_dir": str(output_dir),
+                "weights": weights,
+                "caps": caps,
+                "temperature": temperature,
+                "total": total,
+                "seed": seed,
+                "tokenizer": tokenizer,
+            },
+            deps=["prepare"],
+        )
+    )
+
+    stages.append(
+        Stage(
+            "dedup",
+            dedup.main,
+            inputs=[train_file],
+            outputs=[
+                output_dir / "training_data_cleaned.jsonl",
+                output_dir / "duplicate_report.json",
+            ],
+            kwargs={
+                "input_file": str(train_file),
+                "output_file": str(output_dir / "training_data_cleaned.jsonl"),
+                "report_file": str(output_dir / "duplicate_report.json"),
+            },
+            deps=["mix"],
+        )
+    )
+
+    return stages
+
+
+def topological_levels(stages):
+    """Group stages into levels whose members only depend on earlier levels"""
+    remaining = {stage.name: stage for stage in stages}
+    done = set()
+    levels = []
+
+    while remaining:
+        level = [s for s in remaining.values() if all(d in done for d in s.deps)]
+        if not level:
+            raise ValueError(f"Cycle in pipeline stages: {sorted(remaining)}")
+        levels.append(level)
+        for stage in level:
+            done.add(stage.name)
+            del remaining[stage.name]
+
+    return levels
+
+
+def run_pipeline(output_dir="output", workers=None, force=False, dry_run=False, **opts):
+    """Run every stale stage, independent stages in parallel"""
+    manifest = load_manifest(output_dir)
+    stages = build_stages(output_dir, **opts)
+    rerun = set()
+
+    for level in topological_levels(stages):
+        todo = []
+        for stage in level:
+            status = stage_status(stage, manifest)
+            if status == "protected":
+                print(f"🔒 {stage.name}: output edited outside the pipeline, skipping")
+            elif force or status == "stale" or any(d in rerun for d in stage.deps):
+                todo.append(stage)
+            else:
+                print(f"✓ {stage.name}: up to date")
+
+        if not todo:
+            continue
+
+        for stage in todo:
+            print(f"▶ {stage.name}")
+        if dry_run:
+            rerun.update(stage.name for stage in todo)
+            continue
+
+        start = time.time()
+        if len(todo) == 1:
+            run_stage(todo[0])
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(run_stage, todo))
+
+        for stage in todo:
+            manifest["stages"][stage.name] = {
+                "inputs": hash_files(stage.inputs, manifest),
+                "outputs": hash_files(stage.outputs, manifest),
+                "kwargs": stage.kwargs,
+            }
+            rerun.add(stage.name)
+        save_manifest(output_dir, manifest)
+
+        print(f"   {len(todo)} stage(s) finished in {time.time() - start:.2f}s")
+
+    if not dry_run:
+        save_manifest(output_dir, manifest)
+    print(f"\n✅ Pipeline complete ({len(rerun)} stage(s) run)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Align, prepare and deduplicate all novels, rerunning only what changed."
+    )
+
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="output",
+        help="Directory holding one folder per novel (default: output)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parallel workers for per-novel stages (default: CPU count)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Seed for the train/test split and the mix (default: 42)",
+    )
+    parser.add_argument(
+        "--model_type",
+        type=str,
+        default="nemo",
+        help="Prompt format passed to prepare_data (default: nemo)",
+    )
+    parser.add_argument(
+        "--max_tokens",
+        type=int,
+        default=10240,
+        help="Skip chapters above this estimated token count (default: 10240)",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        type=str,
+        default=None,
+        help="Local tokenizer for the pre-tokenized export (default: no export)",
+    )
+    parser.add_argument(
+        "--glossary",
+        type=str,
+        default=None,
+        help="Glossary file for prompt hints (default: no hints)",
+    )
+    parser.add_argument(
+        "--quality_z",
+        type=float,
+        default=quality_filter.Z_THRESHOLD,
+        help=f"Quality filter z-score threshold; 0 disables it (default: {quality_filter.Z_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--weight",
+        action="append",
+        metavar="NOVEL=WEIGHT",
+        help="Scale a novel's share of the training mix (repeatable, default weight: 1)",
+    )
+    parser.add_argument(
+        "--cap",
+        action="append",
+        metavar="NOVEL=MAX",
+        help="Draw at most this many training examples from a novel (repeatable)",
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=1.0,
+        help="Above 1 flattens the mix towards equal shares per novel (default: 1.0)",
+    )
+    parser.add_argument(
+        "--total",
+        type=int,
+        default=None,
+        help="Examples in the training file (default: all training examples, after caps)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rerun every stage even if its inputs are unchanged (protected outputs are kept)",
+    )
+    parser.add_argument(
+        "--dry_run",
+        action="store_true",
+        help="Only print which stages would run",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        weights = mix_data.parse_assignments(args.weight, float)
+        caps = mix_data.parse_assignments(args.cap, int)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+
+    run_pipeline(
+        output_dir=args.output_dir,
+        workers=args.workers,
+        force=args.force,
+        dry_run=args.dry_run,
+        seed=args.seed,
+        model_type=args.model_type,
+        max_tokens=args.max_tokens,
+        tokenizer=args.tokenizer,
+        quality_z=args.quality_z or None,
+        glossary=args.glossary,
+        weights=weights,
+        caps=caps,
+        temperature=args.temperature,
+        total=args.total,
+    )
@@ -1,8 +1,17 @@
-import json
+import argparse
 import random
 import re
 from pathlib import Path
 
+import edit_journal
+import json_io
+import mix_data
+import pretokenize
+import quality_filter
+from glossary import Glossary, format_hints
+
+INSTRUCTION = "You are a professional webnovel translator. Translate the following Korean text into flowing, immersive English. Use terminology appropriate for the setting."
+
 
 def clean_text(text: str) -> str:
     """Clean up text by removing excessive whitespace and newlines."""
@@ -77,13 +86,43 @@ def clean_chapter(chapter):
     return cleaned_chapter
 
 
-def process_aligned_file(aligned_file_path, max_tokens=10240, model_type="cohere"):
-    """Process a single aligned.json file: clean and convert to ShareGPT format."""
+def glossary_hints(glossary, korean_content):
+    """Glossary block for a chapter's prompt, or "" without a glossary or matches"""
+    if glossary is None:
+        return ""
+    return format_hints(glossary.hints(korean_content))
+
+
+def prompt_messages(instruction, korean_content, model_type="cohere"):
+    """ShareGPT turns before the translation, in the prompt format of model_type"""
+    if model_type == "cohere":
+        # Cohere format with system message
+        return [
+            {"from": "system", "value": instruction},
+            {"from": "user", "value": korean_content},
+        ]
+    # Gemma format without system message (instruction in user message)
+    return [{"from": "user", "value": f"{instruction}\n\n{korean_content}"}]
+
+
+def process_aligned_file(
+    aligned_file_path,
+    max_tokens=10240,
+    model_type="cohere",
+    quality_z=quality_filter.Z_THRESHOLD,
+    glossary=None,
+):
+    """
+    Process a single aligned.json file: clean and convert to ShareGPT format.
+
+    Pairs the quality filter flags are skipped; quality_z=None turns it off.
+    With a glossary.Glossary, the terms found in each Korean chapter are added to
+    the instruction as hints.
+    """
     print(f"\nProcessing: {aligned_file_path}")
 
-    # Load aligned data
-    with open(aligned_file_path, "r", encoding="utf-8") as f:
-        chapters = json.load(f)
+    # Load aligned data, with edits that are still in the editor's journal
+    chapters = edit_journal.load(aligned_file_path)
 
     print(f"   Found {len(chapters)} chapters")
 
@@ -91,10 +130,31 @@ def process_aligned_file(aligned_file_path, max_tokens=10240, model_type="cohere
     converted_data = []
     skipped_chapters = []
 
-    for idx, chapter in enumerate(chapters):
-        # Clean the chapter first
-        cleaned_chapter = clean_chapter(chapter)
+    cleaned_chapters = [clean_chapter(chapter) for chapter in chapters]
+
+    # Score every non-empty pair against the rest of this novel in one batch
+    quality_flags = {}
+    if quality_z is not None:
+        candidates = [
+            idx
+            for idx, c in enumerate(cleaned_chapters)
+            if c["korean"].get("content") and c["english"].get("content")
+        ]
+        results = quality_filter.check_novel(
+            [
+                {
+                    "korean": cleaned_chapters[idx]["korean"]["content"],
+                    "english": cleaned_chapters[idx]["english"]["content"],
+                }
+                for idx in candidates
+            ],
+            quality_z,
+        )
+        quality_flags = {
+            idx: result for idx, result in zip(candidates, results) if result["reasons"]
+        }
 
+    for idx, cleaned_chapter in enumerate(cleaned_chapters):
         korean_content = cleaned_chapter["korean"].get("content", "")
         english_content = cleaned_chapter["english"].get("content", "")
 
@@ -110,10 +170,24 @@ def process_aligned_file(aligned_file_path, max_tokens=10240, model_type="cohere
             )
             continue
 
+        # Skip pairs that look misaligned, untranslated or mostly notes
+        if idx in quality_flags:
+            skipped_chapters.append(
+                {"index": idx, "reason": "low_quality", **quality_flags[idx]}
+            )
+            continue
+
+        instruction = INSTRUCTION
+        hints = glossary_hints(glossary, korean_content)
+        if hints:
+            instruction = f"{INSTRUCTION}\n\n{hints}"
+
         # Estimate total tokens (including instruction overhead)
         kr_tokens = estimate_tokens(korean_content)
         en_tokens = estimate_tokens(english_content)
         instruction_overhead = 50  # Approximate tokens for instruction text
+        if hints:
+            instruction_overhead += estimate_tokens(hints)
         total_tokens = kr_tokens + en_tokens + instruction_overhead
 
         # Skip chapters that are too long
@@ -129,33 +203,13 @@ def process_aligned_file(aligned_file_path, max_tokens=10240, model_type="cohere
             )
             continue
 
-        # Create ShareGPT format based on model_type
-        if model_type == "cohere":
-            # Cohere format with system message
-            conversation = {
-                "messages": [
-                    {
-                        "from": "system",
-                        "value": "You are a professional webnovel translator. Translate the following Korean text into flowing, immersive English. Use terminology appropriate for the setting.",
-                    },
-                    {
-                        "from": "user",
-                        "value": korean_content,
-                    },
-                    {"from": "assistant", "value": english_content},
-                ]
-            }
-        else:
-            # Gemma format without system message (instruction in user message)
-            conversation = {
-                "messages": [
-                    {
-                        "from": "user",
-                        "value": f"You are a professional webnovel translator. Translate the following Korean text into flowing, immersive English. Use terminology appropriate for the setting.\n\n{korean_content}",
-                    },
-                    {"from": "assistant", "value": english_content},
-                ]
-            }
+        conversation = {
+            "messages": prompt_messages(instruction, korean_content, model_type)
+            + [{"from": "assistant", "value": english_content}]
+        }
+
+        # Source novel, for per-novel statistics and sampling
+        conversation["novel"] = Path(aligned_file_path).parent.name
 
         converted_data.append(conversation)
 
@@ -166,36 +220,71 @@ def process_aligned_file(aligned_file_path, max_tokens=10240, model_type="cohere
     return converted_data, skipped_chapters
 
 
-def main():
-    """Main function to process all aligned.json files in output folder."""
-    output_dir = Path("output")
-    model_type = "nemo"
+def build_shards(
+    output_dir="output",
+    model_type="nemo",
+    max_tokens=10240,
+    seed=None,
+    quality_z=quality_filter.Z_THRESHOLD,
+    glossary=None,
+):
+    """
+    Convert every aligned.json under output_dir and split each novel 90/10.
+
+    The training part of each novel goes to its own shard in output_dir/shards,
+    for mix_data to draw from; the test parts are pooled into test_data.jsonl.
+    Returns summary counts, or None when there is nothing to convert.
+    """
+    output_dir = Path(output_dir)
 
     if not output_dir.exists():
         print(f"Error: '{output_dir}' directory not found")
-        return
+        return None
 
     # Find all aligned.json files
-    aligned_files = list(output_dir.rglob("aligned.json"))
+    aligned_files = sorted(output_dir.rglob("aligned.json"))
 
     if not aligned_files:
         print(f"No aligned.json files found in '{output_dir}'")
-        return
+        return None
 
     print(f"🔍 Found {len(aligned_files)} aligned.json files")
 
+    if glossary:
+        glossary = Glossary.load(glossary)
+        print(f"📝 Loaded {len(glossary.terms)} glossary terms")
+
+    shard_dir = output_dir / mix_data.SHARD_DIR
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+
     # Process all files
-    all_converted_data = []
+    shards = set()
+    test_data = []
+    total_converted = 0
+    total_train = 0
     all_skipped_reports = {}
-    max_tokens = 10240  # 10k tokens
 
     for aligned_file in aligned_files:
         novel_name = aligned_file.parent.name
         converted_data, skipped_chapters = process_aligned_file(
-            aligned_file, max_tokens=max_tokens, model_type=model_type
+            aligned_file,
+            max_tokens=max_tokens,
+            model_type=model_type,
+            quality_z=quality_z,
+            glossary=glossary,
         )
 
-        all_converted_data.extend(converted_data)
+        # Split every novel 90/10, so each is represented in the test set
+        rng.shuffle(converted_data)
+        split_idx = int(len(converted_data) * 0.9)
+        shard = mix_data.shard_path(shard_dir, novel_name)
+        json_io.write_jsonl(shard, converted_data[:split_idx])
+        test_data.extend(converted_data[split_idx:])
+
+        shards.add(shard)
+        total_converted += len(converted_data)
+        total_train += split_idx
 
         if skipped_chapters:
             all_skipped_reports[novel_name] = {
@@ -204,34 +293,18 @@ def main():
                 "skipped_chapters": skipped_chapters,
             }
 
-    # Shuffle the training data
-    print(f"\nShuffling data...")
-    random.shuffle(all_converted_data)
+    # Novels that are gone (or renamed) must not stay in the mix
+    for stale in set(shard_dir.glob("*.jsonl")) - shards:
+        stale.unlink()
 
-    # Split into train and test (90% / 10%)
-    split_idx = int(len(all_converted_data) * 0.9)
-    train_data = all_converted_data[:split_idx]
-    test_data = all_converted_data[split_idx:]
-
-    print(f"Split: {len(train_data)} train, {len(test_data)} test")
-
-    # Save training data
-    train_file = output_dir / "training_data.jsonl"
-    print(f"\nSaving training data...")
-
-    with open(train_file, "w", encoding="utf-8") as f:
-        for item in train_data:
-            f.write(json.dumps(item, ensure_ascii=False) + "\n")
-
-    print(f"   Saved to: {train_file}")
+    print(f"\nSplit: {total_train} train, {len(test_data)} test")
 
     # Save test data
     test_file = output_dir / "test_data.jsonl"
     print(f"Saving test data...")
 
-    with open(test_file, "w", encoding="utf-8") as f:
-        for item in test_data:
-            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    rng.shuffle(test_data)
+    json_io.write_jsonl(test_file, test_data)
 
     print(f"   Saved to: {test_file}")
 
@@ -242,39 +315,223 @@ def main():
             report["total_skipped"] for report in all_skipped_reports.values()
         )
 
-        with open(report_file, "w", encoding="utf-8") as f:
-            json.dump(
-                {
-                    "max_tokens": max_tokens,
-                    "total_novels": len(aligned_files),
-                    "total_chapters_converted": len(all_converted_data),
-                    "train_chapters": len(train_data),
-                    "test_chapters": len(test_data),
-                    "total_chapters_skipped": total_skipped,
-                    "novels": all_skipped_reports,
-                },
-                f,
-                indent=2,
-                ensure_ascii=False,
-            )
+        json_io.write_json(
+            report_file,
+            {
+                "max_tokens": max_tokens,
+                "quality_z": quality_z,
+                "total_novels": len(aligned_files),
+                "total_chapters_converted": total_converted,
+                "train_chapters": total_train,
+                "test_chapters": len(test_data),
+                "total_chapters_skipped": total_skipped,
+                "novels": all_skipped_reports,
+            },
+        )
 
         print(f"\nSkipped Report:")
         print(f"   Total skipped: {total_skipped} chapters")
         print(f"   Report saved to: {report_file}")
 
+    return {
+        "novels": len(aligned_files),
+        "converted": total_converted,
+        "train": total_train,
+        "test": len(test_data),
+    }
+
+
+def mix_training_data(
+    output_dir="output",
+    weights=None,
+    caps=None,
+    temperature=1.0,
+    total=None,
+    seed=None,
+    tokenizer=None,
+):
+    """
+    Draw training_data.jsonl from the shards written by build_shards.
+
+    Weights, caps, temperature and total are described in mix_data.allocate; the
+    defaults keep every training example once. With a tokenizer (local directory
+    or cached model name), the train and test files are also exported
+    pre-tokenized to output_dir/tokenized.
+    """
+    output_dir = Path(output_dir)
+    train_file = output_dir / "training_data.jsonl"
+    test_file = output_dir / "test_data.jsonl"
+
+    print(f"\nMixing training data...")
+    report = mix_data.mix_shards(
+        output_dir / mix_data.SHARD_DIR,
+        train_file,
+        weights=weights,
+        caps=caps,
+        temperature=temperature,
+        total=total,
+        seed=seed,
+    )
+    mix_data.print_mix(report)
+    print(f"   Saved to: {train_file}")
+
+    # Pre-tokenize for training
+    if tokenizer:
+        print(f"\nPre-tokenizing with {tokenizer}...")
+        pretokenize.export_tokenized(
+            output_dir, tokenizer, {"train": train_file, "test": test_file}
+        )
+
+    return report
+
+
+def main(
+    output_dir="output",
+    model_type="nemo",
+    max_tokens=10240,
+    seed=None,
+    tokenizer=None,
+    quality_z=quality_filter.Z_THRESHOLD,
+    glossary=None,
+    weights=None,
+    caps=None,
+    temperature=1.0,
+    total=None,
+):
+    """
+    Main function to process all aligned.json files in output folder.
+
+    Builds the per-novel shards and the test file, then mixes the training file
+    from the shards (see build_shards and mix_training_data). With a glossary file
+    (see glossary.py), prompts carry hints for the terms each chapter uses.
+    """
+    summary = build_shards(
+        output_dir,
+        model_type=model_type,
+        max_tokens=max_tokens,
+        seed=seed,
+        quality_z=quality_z,
+        glossary=glossary,
+    )
+    if summary is None:
+        return
+
+    report = mix_training_data(
+        output_dir,
+        weights=weights,
+        caps=caps,
+        temperature=temperature,
+        total=total,
+        seed=seed,
+        tokenizer=tokenizer,
+    )
+    drawn = sum(entry["drawn"] for entry in report.values())
+
     # Print summary
     print(f"\n" + "=" * 60)
     print(f"TRAINING DATA PREPARATION COMPLETE")
     print(f"=" * 60)
-    print(f"Novels processed: {len(aligned_files)}")
-    print(f"Total chapters converted: {len(all_converted_data)}")
-    print(f"Train chapters: {len(train_data)} (90%)")
-    print(f"Test chapters: {len(test_data)} (10%)")
+    print(f"Novels processed: {summary['novels']}")
+    print(f"Total chapters converted: {summary['converted']}")
+    print(f"Train chapters: {summary['train']} (90%), {drawn} drawn into the mix")
+    print(f"Test chapters: {summary['test']} (10%)")
     print(f"Max tokens limit: {max_tokens}")
-    print(f"Training file: {train_file}")
-    print(f"Test file: {test_file}")
+    print(f"Training file: {Path(output_dir) / 'training_data.jsonl'}")
+    print(f"Test file: {Path(output_dir) / 'test_data.jsonl'}")
     print(f"=" * 60)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(
+        description="Convert aligned chapters into ShareGPT train/test files."
+    )
+
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="output",
+        help="Directory holding one folder per novel (default: output)",
+    )
+    parser.add_argument(
+        "--model_type",
+        type=str,
+        default="nemo",
+        help="Prompt format: cohere uses a system message, others inline it (default: nemo)",
+    )
+    parser.add_argument(
+        "--max_tokens",
+        type=int,
+        default=10240,
+        help="Skip chapters above this estimated token count (default: 10240)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed for the train/test split and the mix (default: random)",
+    )
+    parser.add_argument(
+        "--tokenizer",
+        type=str,
+        default=None,
+        help="Also pre-tokenize for axolotl using this local tokenizer (default: no export)",
+    )
+    parser.add_argument(
+        "--glossary",
+        type=str,
+        default=None,
+        help="Glossary file whose matching terms are added to prompts as hints",
+    )
+    parser.add_argument(
+        "--quality_z",
+        type=float,
+        default=quality_filter.Z_THRESHOLD,
+        help="Skip pairs whose length/paragraph ratios are this many robust z-scores "
+        f"from their novel; 0 disables the quality filter (default: {quality_filter.Z_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--weight",
+        action="append",
+        metavar="NOVEL=WEIGHT",
+        help="Scale a novel's share of the training mix (repeatable, default weight: 1)",
+    )
+    parser.add_argument(
+        "--cap",
+        action="append",
+        metavar="NOVEL=MAX",
+        help="Draw at most this many training examples from a novel (repeatable)",
+    )
+    parser.add_argument(
+        "--temperature",
+        type=float,
+        default=1.0,
+        help="Above 1 flattens the mix towards equal shares per novel (default: 1.0)",
+    )
+    parser.add_argument(
+        "--total",
+        type=int,
+        default=None,
+        help="Examples in the training file (default: all training examples, after caps)",
+    )
+
+    args = parser.parse_args()
+
+    try:
+        weights = mix_data.parse_assignments(args.weight, float)
+        caps = mix_data.parse_assignments(args.cap, int)
+    except (argparse.ArgumentTypeError, ValueError) as e:
+        parser.error(str(e))
+
+    main(
+        output_dir=args.output_dir,
+        model_type=args.model_type,
+        max_tokens=args.max_tokens,
+        seed=args.seed,
+        tokenizer=args.tokenizer,
+        quality_z=args.quality_z or None,
+        glossary=args.glossary,
+        weights=weights,
+        caps=caps,
+        temperature=args.temperature,
+        total=args.total,
+    )
@@ -0,0 +1,295 @@
+"""
+Pre-tokenized, memory-mapped export of the ShareGPT training files.
+
+Each split is written to <output_dir>/tokenized/<split>/ as:
+    tokens.bin       every conversation's token ids, concatenated (raw uint32)
+    loss_mask.bin    1 where the token belongs to an assistant turn (raw uint8)
+    offsets.npy      conversation i is tokens[offsets[i]:offsets[i + 1]] (int64)
+    axolotl.parquet  input_ids, attention_mask and labels per conversation
+    meta.json        tokenizer, content hash, dtypes and counts
+
+Loading is zero-copy: TokenizedDataset memory-maps the arrays and hands out views.
+The finetune configs train on axolotl.parquet, which axolotl loads as a
+pre-tokenized dataset instead of tokenizing training_data.jsonl on every launch.
+"""
+
+import hashlib
+import itertools
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+import json_io
+
+FORMAT_VERSION = 1
+BATCH_SIZE = 64
+AXOLOTL_FILE = "axolotl.parquet"
+# Conversations per parquet row group
+ROW_GROUP_SIZE = 1024
+# Label of tokens the loss ignores, as in transformers
+IGNORE_INDEX = -100
+DTYPES = {"tokens": "uint32", "loss_mask": "uint8"}
+ROLE_NAMES = {
+    "system": "system",
+    "user": "user",
+    "human": "user",
+    "assistant": "assistant",
+    "gpt": "assistant",
+}
+
+
+def load_tokenizer(name_or_path):
+    """Load a tokenizer from a local directory or the local Hugging Face cache only"""
+    try:
+        from transformers import AutoTokenizer
+    except ImportError:
+        raise ImportError(
+            "Pre-tokenizing needs the 'transformers' package: pip install transformers"
+        )
+
+    tokenizer = AutoTokenizer.from_pretrained(name_or_path, local_files_only=True)
+    if not tokenizer.is_fast:
+        raise ValueError(f"{name_or_path} has no fast tokenizer; offsets are required")
+    return tokenizer
+
+
+def tokenizer_fingerprint(tokenizer):
+    """Identify a tokenizer by its vocabulary, special tokens and chat template"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(sorted(tokenizer.get_vocab().items())).encode("utf-8"))
+    digest.update(json.dumps(tokenizer.all_special_tokens).encode("utf-8"))
+    digest.update((tokenizer.chat_template or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+def content_hash(jsonl_path, fingerprint):
+    digest = hashlib.sha256(f"v{FORMAT_VERSION}:{fingerprint}:".encode("utf-8"))
+    with open(jsonl_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def to_chat(conversation):
+    """ShareGPT messages ({"from", "value"}) as chat template messages"""
+    return [
+        {"role": ROLE_NAMES.get(m["from"], m["from"]), "content": m["value"]}
+        for m in conversation["messages"]
+    ]
+
+
+def assistant_spans(text, messages, eos_token):
+    """
+    Character spans of the assistant turns in a rendered conversation.
+
+    Each span covers the reply and the end-of-sequence token right after it, so the
+    model also learns where a translation stops.
+    """
+    spans = []
+    cursor = 0
+    for message in messages:
+        start = text.find(message["content"], cursor)
+        if start < 0:
+            raise ValueError("Chat template altered a message; cannot mask the loss")
+        end = start + len(message["content"])
+        cursor = end
+        if message["role"] != "assistant":
+            continue
+        if eos_token and text.startswith(eos_token, end):
+            end += len(eos_token)
+        spans.append((start, end))
+    return spans
+
+
+def mask_from_offsets(offsets, spans):
+    """1 for every token that overlaps an assistant span"""
+    mask = np.zeros(len(offsets), dtype=np.uint8)
+    if not spans or not len(offsets):
+        return mask
+    offsets = np.asarray(offsets)
+    for start, end in spans:
+        mask |= ((offsets[:, 0] < end) & (offsets[:, 1] > start)).astype(np.uint8)
+    return mask
+
+
+def tokenize_split(tokenizer, jsonl_path, out_dir):
+    """Tokenize one JSONL split into out_dir; returns the token count per conversation"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # Conversations are read and tokenized BATCH_SIZE at a time, so memory stays flat
+    conversations = json_io.iter_jsonl(jsonl_path)
+
+    lengths = []
+    tmp_paths = {name: out_dir / f"{name}.bin.tmp" for name in DTYPES}
+    with (
+        open(tmp_paths["tokens"], "wb") as tokens_f,
+        open(tmp_paths["loss_mask"], "wb") as mask_f,
+    ):
+        while batch := [
+            to_chat(c) for c in itertools.islice(conversations, BATCH_SIZE)
+        ]:
+            texts = [
+                tokenizer.apply_chat_template(messages, tokenize=False)
+                for messages in batch
+            ]
+            encoded = tokenizer(
+                texts, add_special_tokens=False, return_offsets_mapping=True
+            )
+
+            for text, messages, ids, offsets in zip(
+                texts, batch, encoded["input_ids"], encoded["offset_mapping"]
+            ):
+                spans = assistant_spans(text, messages, tokenizer.eos_token)
+                tokens_f.write(np.asarray(ids, dtype=DTYPES["tokens"]).tobytes())
+                mask_f.write(mask_from_offsets(offsets, spans).tobytes())
+                lengths.append(len(ids))
+
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+
+    for name, tmp_path in tmp_paths.items():
+        os.replace(tmp_path, out_dir / f"{name}.bin")
+    np.save(out_dir / "offsets.npy", offsets)
+    return lengths
+
+
+def export_tokenized(output_dir, tokenizer_name, splits):
+    """
+    Pre-tokenize JSONL splits, skipping any whose content and tokenizer are unchanged.
+
+    Args:
+        output_dir: Directory the splits live in; results go to output_dir/tokenized
+        tokenizer_name: Local tokenizer directory or cached Hugging Face model name
+        splits: {"train": path, "test": path, ...}
+    """
+    tokenizer = load_tokenizer(tokenizer_name)
+    fingerprint = tokenizer_fingerprint(tokenizer)
+
+    for split, jsonl_path in splits.items():
+        out_dir = Path(output_dir) / "tokenized" / split
+        meta_path = out_dir / "meta.json"
+        expected = content_hash(jsonl_path, fingerprint)
+
+        if meta_path.exists() and (out_dir / AXOLOTL_FILE).exists():
+            if json_io.read_json(meta_path).get("content_hash") == expected:
+                print(f"   ✓ {split}: tokenized copy is up to date")
+                continue
+
+        lengths = tokenize_split(tokenizer, jsonl_path, out_dir)
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "source": str(jsonl_path),
+            "tokenizer": tokenizer_name,
+            "tokenizer_fingerprint": fingerprint,
+            "content_hash": expected,
+            "vocab_size": len(tokenizer),
+            "dtypes": DTYPES,
+            "conversations": len(lengths),
+            "tokens": int(sum(lengths)),
+            "max_length": max(lengths, default=0),
+        }
+        json_io.write_json(meta_path, meta)
+        export_axolotl(out_dir)
+
+        print(
+            f"   Tokenized {split}: {meta['conversations']} conversations, "
+            f"{meta['tokens']:,} tokens (longest {meta['max_length']})"
+        )
+
+
+class TokenizedDataset:
+    """
+    Zero-copy view of a tokenized split.
+
+    dataset[i] returns {"input_ids", "loss_mask"} as read-only numpy views into the
+    memory-mapped files; nothing is read until the trainer touches the pages.
+    """
+
+    def __init__(self, path):
+        path = Path(path)
+        self.meta = json_io.read_json(path / "meta.json")
+        dtypes = self.meta["dtypes"]
+        if self.meta["tokens"]:
+            self.tokens = np.memmap(
+                path / "tokens.bin", dtype=dtypes["tokens"], mode="r"
+            )
+            self.loss_mask = np.memmap(
+                path / "loss_mask.bin", dtype=dtypes["loss_mask"], mode="r"
+            )
+        else:
+            # An empty file cannot be memory-mapped
+            self.tokens = np.empty(0, dtype=dtypes["tokens"])
+            self.loss_mask = np.empty(0, dtype=dtypes["loss_mask"])
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx):
+        start, end = self.offsets[idx], self.offsets[idx + 1]
+        return {
+            "input_ids": self.tokens[start:end],
+            "loss_mask": self.loss_mask[start:end],
+        }
+
+    def lengths(self):
+        return np.diff(self.offsets)
+
+
+def export_axolotl(split_dir):
+    """
+    Write a tokenized split as split_dir/axolotl.parquet for axolotl.
+
+    Each row holds one conversation's input_ids, an all-ones attention_mask and
+    labels equal to input_ids on assistant tokens and IGNORE_INDEX elsewhere, the
+    columns axolotl trains on directly when a dataset has no type. Rows are copied
+    from the memory-mapped arrays one row group at a time.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError(
+            "The axolotl export needs the 'pyarrow' package: pip install pyarrow"
+        )
+
+    split_dir = Path(split_dir)
+    dataset = TokenizedDataset(split_dir)
+    offsets = np.asarray(dataset.offsets)
+    schema = pa.schema(
+        [
+            ("input_ids", pa.list_(pa.int32())),
+            ("attention_mask", pa.list_(pa.int8())),
+            ("labels", pa.list_(pa.int32())),
+        ]
+    )
+
+    tmp_path = split_dir / f"{AXOLOTL_FILE}.tmp"
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        for first in range(0, len(dataset), ROW_GROUP_SIZE):
+            bounds = offsets[first : first + ROW_GROUP_SIZE + 1]
+            start, end = bounds[0], bounds[-1]
+            input_ids = np.asarray(dataset.tokens[start:end], dtype=np.int32)
+            labels = np.where(
+                dataset.loss_mask[start:end].astype(bool), input_ids, IGNORE_INDEX
+            ).astype(np.int32)
+            list_offsets = pa.array(bounds - start, type=pa.int32())
+
+            columns = {
+                "input_ids": input_ids,
+                "attention_mask": np.ones(end - start, dtype=np.int8),
+                "labels": labels,
+            }
+            writer.write_table(
+                pa.table(
+                    {
+                        name: pa.ListArray.from_arrays(list_offsets, pa.array(values))
+                        for name, values in columns.items()
+                    },
+                    schema=schema,
+                )
+            )
+    os.replace(tmp_path, split_dir / AXOLOTL_FILE)
@@ -0,0 +1,386 @@
+import argparse
+import bisect
+import html
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import json_io
+from glossary import GLOSSARY_HEADER
+from prepare_data import INSTRUCTION, estimate_tokens
+
+UNKNOWN_GROUP = "(unknown)"
+# Relative accuracy of the quantile sketches
+SKETCH_ACCURACY = 0.01
+QUANTILES = (0.5, 0.9, 0.95, 0.99, 1.0)
+LENGTH_BINS = 40
+RATIO_BINS = [0.5, 0.75, 1.0, 1.25, 1.5, 1.75, 2.0, 2.5, 3.0, 4.0]
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch style).
+
+    Quantiles are within SKETCH_ACCURACY relative error, memory grows with the
+    logarithm of the value range, and sketches from different shards merge exactly.
+    """
+
+    def __init__(self, accuracy=SKETCH_ACCURACY):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value):
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        key = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.zeros += other.zeros
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma**key / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class Histogram:
+    """Fixed-edge histogram; the last bin collects everything above the top edge"""
+
+    def __init__(self, edges):
+        self.edges = list(edges)
+        self.counts = [0] * (len(self.edges) + 1)
+
+    def add(self, value):
+        self.counts[bisect.bisect_right(self.edges, value)] += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def to_dict(self):
+        labels = [f"< {self.edges[0]:g}"]
+        labels += [f"{a:g}–{b:g}" for a, b in zip(self.edges, self.edges[1:])]
+        labels.append(f"≥ {self.edges[-1]:g}")
+        return {"bins": labels, "counts": self.counts}
+
+
+class Profile:
+    """Single-pass statistics for one group of examples"""
+
+    def __init__(self, sequence_len):
+        self.sequence_len = sequence_len
+        self.examples = 0
+        self.tokens = 0
+        self.korean_chars = 0
+        self.english_chars = 0
+        self.over_limit = 0
+        self.near_limit = 0
+        self.token_sketch = QuantileSketch()
+        self.ratio_sketch = QuantileSketch()
+        step = sequence_len / (LENGTH_BINS / 2)
+        self.token_histogram = Histogram(step * i for i in range(1, LENGTH_BINS + 1))
+        self.ratio_histogram = Histogram(RATIO_BINS)
+
+    def add(self, tokens, korean_chars, english_chars):
+        self.examples += 1
+        self.tokens += tokens
+        self.korean_chars += korean_chars
+        self.english_chars += english_chars
+        if tokens > self.sequence_len:
+            self.over_limit += 1
+        elif tokens > 0.9 * self.sequence_len:
+            self.near_limit += 1
+
+        self.token_sketch.add(tokens)
+        self.token_histogram.add(tokens)
+        if korean_chars:
+            ratio = english_chars / korean_chars
+            self.ratio_sketch.add(ratio)
+            self.ratio_histogram.add(ratio)
+
+    def merge(self, other):
+        self.examples += other.examples
+        self.tokens += other.tokens
+        self.korean_chars += other.korean_chars
+        self.english_chars += other.english_chars
+        self.over_limit += other.over_limit
+        self.near_limit += other.near_limit
+        self.token_sketch.merge(other.token_sketch)
+        self.ratio_sketch.merge(other.ratio_sketch)
+        self.token_histogram.merge(other.token_histogram)
+        self.ratio_histogram.merge(other.ratio_histogram)
+
+    def summary(self):
+        def quantiles(sketch, digits):
+            return {
+                f"p{round(q * 100)}": (
+                    None
+                    if sketch.quantile(q) is None
+                    else round(sketch.quantile(q), digits)
+                )
+                for q in QUANTILES
+            }
+
+        return {
+            "examples": self.examples,
+            "estimated_tokens": self.tokens,
+            "korean_chars": self.korean_chars,
+            "english_chars": self.english_chars,
+            "over_sequence_len": self.over_limit,
+            "within_10pct_of_sequence_len": self.near_limit,
+            "token_quantiles": quantiles(self.token_sketch, 0),
+            "en_kr_ratio_quantiles": quantiles(self.ratio_sketch, 3),
+        }
+
+
+def split_messages(record):
+    """Return (korean source text, english reply text) of a ShareGPT record"""
+    korean, english = "", ""
+    for message in record.get("messages", []):
+        role = message.get("from") or message.get("role")
+        value = message.get("value") or message.get("content") or ""
+        if role in ("user", "human"):
+            korean = (
+                value[len(INSTRUCTION) :].lstrip()
+                if value.startswith(INSTRUCTION)
+                else value
+            )
+            # Glossary hints sit between the instruction and the source text
+            if korean.startswith(GLOSSARY_HEADER):
+                korean = korean.partition("\n\n")[2]
+        elif role in ("assistant", "gpt"):
+            english = value
+    return korean, english
+
+
+def shard_ranges(path, shards):
+    """Split a file into byte ranges that start at line boundaries"""
+    size = os.path.getsize(path)
+    shards = max(1, min(shards, size // (1 << 20) + 1))
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, shards):
+            f.seek(size * i // shards)
+            f.readline()
+            bounds.append(max(f.tell(), bounds[-1]))
+    bounds.append(size)
+    return [(a, b) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+def profile_shard(path, start, end, sequence_len, group_key):
+    """Profile the lines in [start, end) of a JSONL file"""
+    overall = Profile(sequence_len)
+    groups = {}
+    bad_lines = 0
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if not line.strip():
+                continue
+            try:
+                record = json_io.loads(line)
+            except ValueError:
+                bad_lines += 1
+                continue
+
+            korean, english = split_messages(record)
+            tokens = sum(
+                estimate_tokens(m.get("value") or m.get("content") or "")
+                for m in record.get("messages", [])
+            )
+            group = str(record.get(group_key) or UNKNOWN_GROUP)
+
+            overall.add(tokens, len(korean), len(english))
+            if group not in groups:
+                groups[group] = Profile(sequence_len)
+            groups[group].add(tokens, len(korean), len(english))
+
+    return overall, groups, bad_lines
+
+
+def profile_file(path, sequence_len=12000, workers=None, group_key="novel"):
+    """Profile a JSONL file in parallel shards; returns the report dict"""
+    workers = workers or os.cpu_count() or 1
+    ranges = shard_ranges(path, workers * 4)
+
+    overall = Profile(sequence_len)
+    groups = {}
+    bad_lines = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(profile_shard, path, a, b, sequence_len, group_key)
+            for a, b in ranges
+        ]
+        for future in futures:
+            shard_overall, shard_groups, shard_bad = future.result()
+            overall.merge(shard_overall)
+            bad_lines += shard_bad
+            for name, profile in shard_groups.items():
+                if name in groups:
+                    groups[name].merge(profile)
+                else:
+                    groups[name] = profile
+
+    novels = {}
+    for name, profile in sorted(groups.items(), key=lambda kv: -kv[1].tokens):
+        novels[name] = profile.summary()
+        novels[name]["token_share"] = round(profile.tokens / max(overall.tokens, 1), 4)
+
+    return {
+        "file": str(path),
+        "sequence_len": sequence_len,
+        "token_estimate": "characters / 3 (prepare_data.estimate_tokens)",
+        "bad_lines": bad_lines,
+        "overall": overall.summary(),
+        "token_histogram": overall.token_histogram.to_dict(),
+        "en_kr_ratio_histogram": overall.ratio_histogram.to_dict(),
+        "novels": novels,
+    }
+
+
+def _bars(histogram):
+    peak = max(histogram["counts"]) or 1
+    rows = []
+    for label, count in zip(histogram["bins"], histogram["counts"]):
+        width = 100 * count / peak
+        rows.append(
+            f"<tr><td>{html.escape(label)}</td><td class='n'>{count}</td>"
+            f"<td><div class='bar' style='width:{width:.1f}%'></div></td></tr>"
+        )
+    return "<table class='hist'>" + "".join(rows) + "</table>"
+
+
+def render_html(report):
+    overall = report["overall"]
+    novel_rows = "".join(
+        f"<tr><td>{html.escape(name)}</td><td class='n'>{s['examples']}</td>"
+        f"<td class='n'>{s['estimated_tokens']:,}</td><td class='n'>{s['token_share']:.1%}</td>"
+        f"<td class='n'>{s['token_quantiles']['p50']}</td><td class='n'>{s['token_quantiles']['p99']}</td>"
+        f"<td class='n'>{s['en_kr_ratio_quantiles']['p50']}</td>"
+        f"<td class='n'>{s['over_sequence_len']}</td></tr>"
+        for name, s in report["novels"].items()
+    )
+    quantile_rows = "".join(
+        f"<tr><td>{q}</td><td class='n'>{overall['token_quantiles'][q]}</td>"
+        f"<td class='n'>{overall['en_kr_ratio_quantiles'][q]}</td></tr>"
+        for q in overall["token_quantiles"]
+    )
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Dataset profile</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; margin-bottom: 2em; }}
+td, th {{ padding: 2px 8px; border-bottom: 1px solid #eee; text-align: left; }}
+td.n {{ text-align: right; font-variant-numeric: tabular-nums; }}
+table.hist td:last-child {{ width: 400px; }}
+.bar {{ background: #4a78c2; height: 12px; }}
+</style></head><body>
+<h1>{html.escape(report["file"])}</h1>
+<p>{overall["examples"]} examples, {overall["estimated_tokens"]:,} estimated tokens.
+{overall["over_sequence_len"]} over sequence_len {report["sequence_len"]},
+{overall["within_10pct_of_sequence_len"]} within 10% of it.</p>
+<h2>Quantiles</h2>
+<table><tr><th></th><th>tokens</th><th>EN/KR chars</th></tr>{quantile_rows}</table>
+<h2>Tokens per example</h2>{_bars(report["token_histogram"])}
+<h2>EN/KR character ratio</h2>{_bars(report["en_kr_ratio_histogram"])}
+<h2>Per novel</h2>
+<table><tr><th>novel</th><th>examples</th><th>tokens</th><th>share</th><th>p50</th><th>p99</th>
+<th>EN/KR p50</th><th>over limit</th></tr>{novel_rows}</table>
+</body></html>
+"""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Profile a ShareGPT JSONL dataset in one streaming pass."
+    )
+
+    parser.add_argument(
+        "input_file",
+        nargs="?",
+        default="output/training_data.jsonl",
+        help="JSONL file with messages/from/value records (default: output/training_data.jsonl)",
+    )
+    parser.add_argument(
+        "--sequence_len",
+        type=int,
+        default=12000,
+        help="Training sequence length to compare against (default: 12000)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Parallel worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--group_key",
+        type=str,
+        default="novel",
+        help="Record field to break statistics down by (default: novel)",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Report path without extension; writes .json and .html (default: next to input)",
+    )
+
+    args = parser.parse_args()
+
+    start = time.time()
+    report = profile_file(
+        args.input_file,
+        sequence_len=args.sequence_len,
+        workers=args.workers,
+        group_key=args.group_key,
+    )
+    elapsed = time.time() - start
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        input_path = Path(args.input_file)
+        output = input_path.with_name(f"{input_path.stem}_profile")
+
+    json_io.write_json(output.with_suffix(".json"), report)
+    with open(output.with_suffix(".html"), "w", encoding="utf-8") as f:
+        f.write(render_html(report))
+
+    overall = report["overall"]
+    print(f"✅ Profiled {overall['examples']} examples in {elapsed:.2f}s")
+    print(
+        f"   Tokens p50/p99/max: {overall['token_quantiles']['p50']} / "
+        f"{overall['token_quantiles']['p99']} / {overall['token_quantiles']['p100']}"
+    )
+    print(f"   Over sequence_len {args.sequence_len}: {overall['over_sequence_len']}")
+    for name, summary in report["novels"].items():
+        print(
+            f"   {name}: {summary['examples']} examples, {summary['token_share']:.1%} of tokens"
+        )
+    print(
+        f"   Report saved to {output.with_suffix('.json')} and {output.with_suffix('.html')}"
+    )
@@ -0,0 +1,321 @@
+"""
+Quality filter for aligned Korean/English pairs.
+
+Scores every pair on a few cheap features (length, script, paragraph and number
+agreement) and flags the ones that look misaligned, untranslated or made up of
+translator notes. prepare_data skips flagged pairs; run this module directly for a
+corpus-wide report.
+"""
+
+import argparse
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+import edit_journal
+import json_io
+
+# Flag a pair when a feature is this many robust standard deviations from its novel
+Z_THRESHOLD = 3.5
+# Hard limits that hold for every novel
+MIN_KOREAN_HANGUL_SHARE = 0.3
+MAX_ENGLISH_HANGUL_SHARE = 0.05
+MAX_NOTE_SHARE = 0.5
+# Both sides need this many distinct numbers before disjoint numbers count as a mismatch
+MIN_NUMBERS = 3
+
+# Translator notes, credits and similar lines that are not part of the translation
+NOTE_PATTERN = re.compile(
+    r"^\s*[\[(]?\s*(?:t/?n|tl(?:\s*note)?|translator|editor|ed|pr|note)\b",
+    re.IGNORECASE,
+)
+
+# Features checked against their novel's distribution, with a floor on their spread
+# (log ratios) so a translator who mirrors the source closely isn't flagged for noise
+Z_FEATURES = {"length_ratio": 0.1, "paragraph_ratio": 0.1}
+
+# UTF-8 byte classes counted by text_stats
+OTHER, LATIN, DIGIT, SPACE, HANGUL_LEAD = range(5)
+
+
+def _byte_classes():
+    """Lookup table from a UTF-8 byte to its class (see text_stats)"""
+    table = np.zeros(256, dtype=np.uint8)
+    table[ord("A") : ord("Z") + 1] = LATIN
+    table[ord("a") : ord("z") + 1] = LATIN
+    table[ord("0") : ord("9") + 1] = DIGIT
+    table[[ord(" "), ord("\t"), ord("\r"), ord("\n")]] = SPACE
+    # Lead bytes of U+A000-U+DFFF, which holds the Hangul syllable block
+    table[0xEA:0xEE] = HANGUL_LEAD
+    return table
+
+
+BYTE_CLASSES = _byte_classes()
+
+
+def text_stats(text: str):
+    """
+    Return (hangul letters, latin letters, paragraphs, numbers) for one text.
+
+    Works on the UTF-8 bytes as a NumPy array, so every count is a few vector
+    passes instead of a Python loop over characters. Paragraphs are lines holding
+    something besides whitespace; numbers are the distinct runs of ASCII digits.
+    """
+    data = text.encode("utf-8")
+    raw = np.frombuffer(data, dtype=np.uint8)
+    if not len(raw):
+        return 0, 0, 0, set()
+    classes = BYTE_CLASSES[raw]
+
+    # Decode only the 3-byte sequences that may be Hangul syllables
+    lead = np.flatnonzero(classes == HANGUL_LEAD)
+    lead = lead[lead + 2 < len(raw)]
+    points = (
+        (raw[lead].astype(np.int32) & 0x0F) << 12
+        | (raw[lead + 1].astype(np.int32) & 0x3F) << 6
+        | (raw[lead + 2].astype(np.int32) & 0x3F)
+    )
+    hangul = int(np.count_nonzero((points >= 0xAC00) & (points <= 0xD7A3)))
+    latin = int(np.count_nonzero(classes == LATIN))
+
+    line_starts = np.concatenate(([0], np.flatnonzero(raw == 0x0A) + 1))
+    line_starts = line_starts[line_starts < len(raw)]
+    filled = (classes != SPACE).astype(np.int32)
+    paragraphs = int(np.count_nonzero(np.add.reduceat(filled, line_starts)))
+
+    is_digit = np.concatenate(([False], classes == DIGIT, [False]))
+    edges = np.flatnonzero(is_digit[1:] != is_digit[:-1])
+    numbers = {data[start:end] for start, end in zip(edges[::2], edges[1::2])}
+
+    return hangul, latin, paragraphs, numbers
+
+
+def pair_features(pairs: Sequence[Dict]) -> Dict[str, np.ndarray]:
+    """
+    Compute quality features for aligned pairs in one batch.
+
+    Each pair is {"korean": text, "english": text}.
+    """
+    rows = []
+    for pair in pairs:
+        korean = pair["korean"] or ""
+        english = pair["english"] or ""
+        kr_hangul, kr_latin, kr_paragraphs, kr_numbers = text_stats(korean)
+        en_hangul, en_latin, en_paragraphs, en_numbers = text_stats(english)
+
+        # Translator notes need a pattern match, but only on the English lines
+        note_chars = sum(
+            len(line) for line in english.split("\n") if NOTE_PATTERN.match(line)
+        )
+
+        rows.append(
+            (
+                len(korean),
+                len(english),
+                kr_hangul,
+                kr_latin,
+                kr_paragraphs,
+                en_hangul,
+                en_latin,
+                en_paragraphs,
+                note_chars,
+                len(kr_numbers & en_numbers),
+                len(kr_numbers | en_numbers),
+                min(len(kr_numbers), len(en_numbers)),
+            )
+        )
+
+    (
+        kr_len,
+        en_len,
+        kr_hangul,
+        kr_latin,
+        kr_paragraphs,
+        en_hangul,
+        en_latin,
+        en_paragraphs,
+        note_chars,
+        shared,
+        union,
+        number_count,
+    ) = (
+        np.array(rows, dtype=np.float64).reshape(-1, 12).T
+    )
+
+    korean_letters = np.maximum(kr_hangul + kr_latin, 1)
+    english_letters = np.maximum(en_hangul + en_latin, 1)
+
+    return {
+        "length_ratio": np.log((en_len + 1) / (kr_len + 1)),
+        "paragraph_ratio": np.log(
+            np.maximum(en_paragraphs, 1) / np.maximum(kr_paragraphs, 1)
+        ),
+        "korean_hangul_share": kr_hangul / korean_letters,
+        "english_hangul_share": en_hangul / english_letters,
+        "english_latin_share": en_latin / english_letters,
+        "note_share": note_chars / np.maximum(en_len, 1),
+        "number_overlap": np.where(union > 0, shared / np.maximum(union, 1), 1.0),
+        "number_count": number_count,
+    }
+
+
+def robust_z(values: np.ndarray, min_mad: float = 0.0) -> np.ndarray:
+    """Median/MAD z-scores; 0 everywhere when the spread is zero"""
+    median = np.median(values)
+    mad = max(np.median(np.abs(values - median)), min_mad)
+    if mad == 0:
+        return np.zeros_like(values)
+    return 0.6745 * (values - median) / mad
+
+
+def flag_pairs(
+    features: Dict[str, np.ndarray], z_threshold: float = Z_THRESHOLD
+) -> List[List[str]]:
+    """
+    Return the reasons each pair looks bad (empty list = keep).
+
+    Length and paragraph ratios are judged against the pair's own novel, so a
+    translator's habitual verbosity doesn't count against them.
+    """
+    n = len(features["length_ratio"])
+    reasons = [[] for _ in range(n)]
+
+    if n >= 5:
+        for name, min_mad in Z_FEATURES.items():
+            z = robust_z(features[name], min_mad)
+            for i in np.flatnonzero(np.abs(z) > z_threshold):
+                direction = "high" if z[i] > 0 else "low"
+                reasons[i].append(f"{name}_{direction} (z={z[i]:.1f})")
+
+    rules = (
+        (
+            "korean_not_korean",
+            features["korean_hangul_share"] < MIN_KOREAN_HANGUL_SHARE,
+        ),
+        (
+            "english_untranslated",
+            features["english_hangul_share"] > MAX_ENGLISH_HANGUL_SHARE,
+        ),
+        ("mostly_notes", features["note_share"] > MAX_NOTE_SHARE),
+        (
+            "numbers_mismatch",
+            (features["number_count"] >= MIN_NUMBERS)
+            & (features["number_overlap"] == 0),
+        ),
+    )
+    for reason, mask in rules:
+        for i in np.flatnonzero(mask):
+            reasons[i].append(reason)
+
+    return reasons
+
+
+def check_novel(pairs: Sequence[Dict], z_threshold: float = Z_THRESHOLD) -> List[Dict]:
+    """Features and flags for the pairs of one novel, one dict per pair"""
+    if not pairs:
+        return []
+    features = pair_features(pairs)
+    reasons = flag_pairs(features, z_threshold)
+    return [
+        {
+            "reasons": reasons[i],
+            **{name: round(float(values[i]), 4) for name, values in features.items()},
+        }
+        for i in range(len(pairs))
+    ]
+
+
+def load_pairs(aligned_file) -> List[Dict]:
+    """Korean/English texts of an aligned file, pending journal edits included"""
+    chapters = edit_journal.load(aligned_file)
+    return [
+        {
+            "korean": chapter.get("korean", {}).get("content", ""),
+            "english": chapter.get("english", {}).get("content", ""),
+        }
+        for chapter in chapters
+    ]
+
+
+def check_file(aligned_file, z_threshold: float = Z_THRESHOLD) -> Dict:
+    """Report entry for one aligned file, scored on the text prepare_data trains on"""
+    # Imported here: prepare_data itself imports this module
+    from prepare_data import clean_text
+
+    pairs = [
+        {"korean": clean_text(p["korean"]), "english": clean_text(p["english"])}
+        for p in load_pairs(aligned_file)
+    ]
+    results = check_novel(pairs, z_threshold)
+    return {
+        "file": str(aligned_file),
+        "pairs": len(results),
+        "flagged": [{"index": i, **r} for i, r in enumerate(results) if r["reasons"]],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Flag misaligned, untranslated and note-heavy pairs in aligned files."
+    )
+
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="output",
+        help="Directory holding one folder per novel (default: output)",
+    )
+    parser.add_argument(
+        "--z_threshold",
+        type=float,
+        default=Z_THRESHOLD,
+        help=f"Robust z-score beyond which a pair is flagged (default: {Z_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Novels checked in parallel (default: CPU count)",
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        default=None,
+        help="Report file (default: <output_dir>/quality_report.json)",
+    )
+
+    args = parser.parse_args()
+
+    start = time.time()
+    aligned_files = sorted(Path(args.output_dir).rglob("aligned.json"))
+    report = {"z_threshold": args.z_threshold, "novels": {}}
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        entries = executor.map(
+            check_file, aligned_files, [args.z_threshold] * len(aligned_files)
+        )
+        for aligned_file, entry in zip(aligned_files, entries):
+            report["novels"][aligned_file.parent.name] = entry
+            flagged = entry["flagged"]
+
+            print(
+                f"{aligned_file.parent.name}: {len(flagged)}/{entry['pairs']} flagged"
+            )
+            for item in flagged[:10]:
+                print(f"   Chapter {item['index'] + 1}: {', '.join(item['reasons'])}")
+            if len(flagged) > 10:
+                print(f"   ... {len(flagged) - 10} more in the report")
+
+    report_file = Path(args.report or Path(args.output_dir) / "quality_report.json")
+    json_io.write_json(report_file, report)
+
+    total_pairs = sum(entry["pairs"] for entry in report["novels"].values())
+    total_flagged = sum(len(entry["flagged"]) for entry in report["novels"].values())
+    print(
+        f"\n✅ Checked {total_pairs} pairs in {time.time() - start:.2f}s, "
+        f"{total_flagged} flagged. Report saved to {report_file}"
+    )
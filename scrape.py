@@ -1,30 +1,35 @@
 import argparse
+import importlib
 import re
 import time
+from pathlib import Path
 from urllib.parse import urlparse
 
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-
-from scraper.spiders import (
-    BookTokiSpider,
-    LightNovelPubSpider,
-    MythicRegressorSpider,
-    NovelFireSpider,
-    WeTriedTlsSpider,
-)
+import json_io
 
+# Spiders are imported on demand so only the detected site's module gets loaded
 SPIDER_MAP = {
-    "booktoki": BookTokiSpider,
-    "lightnovelpub": LightNovelPubSpider,
-    "novelfire": NovelFireSpider,
-    "wetriedtls": WeTriedTlsSpider,
-    "mythicregressor": MythicRegressorSpider,
+    "booktoki": "scraper.spiders.booktoki.BookTokiSpider",
+    "lightnovelpub": "scraper.spiders.lightnovelpub.LightNovelPubSpider",
+    "novelfire": "scraper.spiders.novelfire.NovelFireSpider",
+    "wetriedtls": "scraper.spiders.wetriedtls.WeTriedTlsSpider",
+    "mythicregressor": "scraper.spiders.mythic_regressor.MythicRegressorSpider",
 }
 
+PLAYWRIGHT_DOWNLOAD_HANDLERS = {
+    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
+}
 
-def detect_spider(url):
-    """Detect spider based on URL, handling numbered subdomains"""
+
+def load_spider(spider_path):
+    """Import a spider class from its dotted path"""
+    module_name, class_name = spider_path.rsplit(".", 1)
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def detect_spider_key(url):
+    """Return the SPIDER_MAP key for a URL without importing anything"""
     parsed = urlparse(url)
     domain = parsed.netloc.lower().replace("www.", "")
 
@@ -32,11 +37,44 @@ def detect_spider(url):
     domain_clean = re.sub(r"\d+", "", domain)
 
     # Try to find matching spider
-    for key, spider in SPIDER_MAP.items():
+    for key in SPIDER_MAP:
         if key in domain or key in domain_clean:
-            return spider, key
+            return key
+
+    return None
+
+
+def detect_spider(url):
+    """Detect spider based on URL, handling numbered subdomains"""
+    key = detect_spider_key(url)
+    if key is None:
+        return None, None
+    return load_spider(SPIDER_MAP[key]), key
 
-    return None, None
+
+def create_process(use_playwright=False, headful=False, **overrides):
+    """Build a CrawlerProcess, installing the Playwright handler only when needed"""
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    settings = get_project_settings()
+
+    # Spiders are passed as classes, so skip the loader's import-everything scan
+    settings.set("SPIDER_MODULES", [])
+
+    if use_playwright:
+        settings.set("DOWNLOAD_HANDLERS", PLAYWRIGHT_DOWNLOAD_HANDLERS)
+        if headful:
+            settings.set(
+                "PLAYWRIGHT_LAUNCH_OPTIONS",
+                settings.getdict("PLAYWRIGHT_DESKTOP_LAUNCH_OPTIONS"),
+            )
+
+    for key, value in overrides.items():
+        if value is not None:
+            settings.set(key, value)
+
+    return CrawlerProcess(settings)
 
 
 def run_paired_scraping(
@@ -48,25 +86,19 @@ def run_paired_scraping(
     kor_max_chapters=0,
     eng_max_chapters=0,
     use_playwright=False,
+    headful=False,
+    max_pages_per_context=None,
+    prefetch=None,
+    dry_run=False,
 ):
     """
     Run both Korean and English spiders to scrape chapters separately.
     """
-    settings = get_project_settings()
-
-    if output_dir:
-        settings.set("OUTPUT_DIR", output_dir)
-
-    if output_name:
-        settings.set("OUTPUT_NAME", output_name)
-
-    process = CrawlerProcess(settings)
-
     # Detect and schedule Korean spider
     korean_url = korean_urls[0]
-    korean_spider, korean_name = detect_spider(korean_url)
+    korean_name = detect_spider_key(korean_url)
 
-    if korean_spider is None:
+    if korean_name is None:
         raise ValueError(
             f"Unsupported Korean source site in URL: {korean_url}\n"
             f"Supported sites: {', '.join(SPIDER_MAP.keys())}"
@@ -74,19 +106,11 @@ def run_paired_scraping(
 
     print(f"✓ Detected Korean spider: {korean_name}")
 
-    # process.crawl(
-    #     korean_spider,
-    #     start_urls=korean_urls,
-    #     auto_crawl=auto_crawl,
-    #     max_chapters=kor_max_chapters,
-    #     use_playwright=use_playwright,
-    # )
-
     # Detect and schedule English spider
     english_url = english_urls[0]
-    english_spider, english_name = detect_spider(english_url)
+    english_name = detect_spider_key(english_url)
 
-    if english_spider is None:
+    if english_name is None:
         raise ValueError(
             f"Unsupported English source site in URL: {english_url}\n"
             f"Supported sites: {', '.join(SPIDER_MAP.keys())}"
@@ -94,8 +118,29 @@ def run_paired_scraping(
 
     print(f"✓ Detected English spider: {english_name}")
 
+    if dry_run:
+        print("Dry run: not crawling.")
+        return
+
+    process = create_process(
+        use_playwright=use_playwright,
+        headful=headful,
+        PLAYWRIGHT_MAX_PAGES_PER_CONTEXT=max_pages_per_context,
+        PREFETCH_CHAPTERS=prefetch,
+        OUTPUT_DIR=output_dir or None,
+        OUTPUT_NAME=output_name or None,
+    )
+
+    # process.crawl(
+    #     load_spider(SPIDER_MAP[korean_name]),
+    #     start_urls=korean_urls,
+    #     auto_crawl=auto_crawl,
+    #     max_chapters=kor_max_chapters,
+    #     use_playwright=use_playwright,
+    # )
+
     process.crawl(
-        english_spider,
+        load_spider(SPIDER_MAP[english_name]),
         start_urls=english_urls,
         auto_crawl=auto_crawl,
         max_chapters=eng_max_chapters,
@@ -106,6 +151,95 @@ def run_paired_scraping(
     print("\n✅ Scraping completed! Check the output directory for results.")
 
 
+def find_resume_url(chapter_file):
+    """
+    Return the URL an update crawl should start from, or None for an empty file.
+
+    That is the last stored chapter's next link, or the last chapter itself when the
+    next chapter wasn't out yet; its page is fetched again to find the new link.
+    """
+    last = None
+    for last in json_io.iter_json_array(chapter_file):
+        pass
+
+    if last is None:
+        return None
+
+    return last.get("next_chapter_url") or last.get("url")
+
+
+def run_update_scraping(
+    output_dir="output",
+    output_name="chapters",
+    kor_max_chapters=0,
+    eng_max_chapters=0,
+    use_playwright=False,
+    headful=False,
+    max_pages_per_context=None,
+    prefetch=None,
+    dry_run=False,
+):
+    """
+    Crawl only the chapters published after the ones already stored.
+
+    New chapters are appended to the existing chapter files.
+    """
+    scheduled = []
+
+    for language, max_chapters in (
+        ("korean", kor_max_chapters),
+        ("english", eng_max_chapters),
+    ):
+        chapter_file = Path(output_dir) / f"{output_name}_{language}.json"
+        if not chapter_file.exists():
+            print(f"- No {language} chapters in {chapter_file}, skipping")
+            continue
+
+        resume_url = find_resume_url(chapter_file)
+        if not resume_url:
+            print(f"- {chapter_file} has no chapters to resume from, skipping")
+            continue
+
+        name = detect_spider_key(resume_url)
+        if name is None:
+            raise ValueError(
+                f"Unsupported {language} source site in URL: {resume_url}\n"
+                f"Supported sites: {', '.join(SPIDER_MAP.keys())}"
+            )
+
+        print(f"✓ Updating {language} chapters with {name} from {resume_url}")
+        scheduled.append((name, resume_url, max_chapters))
+
+    if not scheduled:
+        print("Nothing to update.")
+        return
+
+    if dry_run:
+        print("Dry run: not crawling.")
+        return
+
+    process = create_process(
+        use_playwright=use_playwright,
+        headful=headful,
+        PLAYWRIGHT_MAX_PAGES_PER_CONTEXT=max_pages_per_context,
+        PREFETCH_CHAPTERS=prefetch,
+        OUTPUT_DIR=output_dir,
+        OUTPUT_NAME=output_name,
+        UPDATE_MODE=True,
+    )
+    for name, resume_url, max_chapters in scheduled:
+        process.crawl(
+            load_spider(SPIDER_MAP[name]),
+            start_urls=[resume_url],
+            auto_crawl=True,
+            max_chapters=max_chapters,
+            use_playwright=use_playwright,
+        )
+
+    process.start()
+    print("\n✅ Update completed! New chapters were appended to the existing files.")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Run parallel scraping of Korean and English novel sources."
@@ -114,13 +248,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--korean_url",
         nargs="+",
-        required=True,
         help="Starting URL(s) for Korean chapters (space-separated if multiple)",
     )
     parser.add_argument(
         "--english_url",
         nargs="+",
-        required=True,
         help="Starting URL(s) for English chapters (space-separated if multiple)",
     )
     parser.add_argument(
@@ -157,23 +289,77 @@ if __name__ == "__main__":
         "--use_playwright",
         type=lambda x: x.lower() in ["true", "1", "yes"],
         default=False,
-        help="Use Playwright for dynamic content scraping (True/False)",
+        help="Render sites that need JavaScript in headless Chromium (True/False)",
+    )
+    parser.add_argument(
+        "--headful",
+        type=lambda x: x.lower() in ["true", "1", "yes"],
+        default=False,
+        help="With --use_playwright, open a visible Edge window instead (True/False)",
+    )
+    parser.add_argument(
+        "--max_pages_per_context",
+        type=int,
+        default=None,
+        help="Browser pages open at once in the shared context (default: from settings)",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=None,
+        help="Chapters to request ahead once chapter URLs follow a pattern, 0 to disable (default: from settings)",
+    )
+
+    parser.add_argument(
+        "--update",
+        type=lambda x: x.lower() in ["true", "1", "yes"],
+        default=False,
+        help="Only crawl chapters newer than those already in the output files (True/False)",
+    )
+
+    parser.add_argument(
+        "--dry_run",
+        type=lambda x: x.lower() in ["true", "1", "yes"],
+        default=False,
+        help="Detect spiders and print what would be crawled, without crawling (True/False)",
     )
 
     args = parser.parse_args()
 
+    if not args.update and not (args.korean_url and args.english_url):
+        parser.error(
+            "--korean_url and --english_url are required unless --update is set"
+        )
+
     start = time.time()
 
-    run_paired_scraping(
-        korean_urls=args.korean_url,
-        english_urls=args.english_url,
-        auto_crawl=args.auto_crawl,
-        output_dir=args.output_dir,
-        output_name=args.output_name,
-        kor_max_chapters=args.kor_max_chapters,
-        eng_max_chapters=args.eng_max_chapters,
-        use_playwright=args.use_playwright,
-    )
+    if args.update:
+        run_update_scraping(
+            output_dir=args.output_dir,
+            output_name=args.output_name,
+            kor_max_chapters=args.kor_max_chapters,
+            eng_max_chapters=args.eng_max_chapters,
+            use_playwright=args.use_playwright,
+            headful=args.headful,
+            max_pages_per_context=args.max_pages_per_context,
+            prefetch=args.prefetch,
+            dry_run=args.dry_run,
+        )
+    else:
+        run_paired_scraping(
+            korean_urls=args.korean_url,
+            english_urls=args.english_url,
+            auto_crawl=args.auto_crawl,
+            output_dir=args.output_dir,
+            output_name=args.output_name,
+            kor_max_chapters=args.kor_max_chapters,
+            eng_max_chapters=args.eng_max_chapters,
+            use_playwright=args.use_playwright,
+            headful=args.headful,
+            max_pages_per_context=args.max_pages_per_context,
+            prefetch=args.prefetch,
+            dry_run=args.dry_run,
+        )
 
     end = time.time()
     elapsed = end - start
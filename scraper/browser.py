@@ -0,0 +1,9 @@
+"""Resource policy for Playwright pages (see PLAYWRIGHT_ABORT_REQUEST in settings.py)."""
+
+# Chapter text never depends on these, and they are most of a page's bytes
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+
+def should_abort_request(request) -> bool:
+    """Abort images, media and fonts inside the browser; keep scripts and XHR"""
+    return request.resource_type in BLOCKED_RESOURCE_TYPES
@@ -3,4 +3,6 @@ from .booktoki import BookTokiExtractor
 from .lightnovelpub import LightNovelPubExtractor
 from .mythic_regressor import MythicRegressorExtractor
 from .novelfire import NovelFireExtractor
+from .sites import SITE_SPECS
+from .spec import SpecExtractor
 from .wetriedtls import WeTriedTlsExtractor
@@ -28,3 +28,7 @@ class BaseExtractor(ABC):
     def extract_prev_chapter_url(self, response) -> str:
         """Extract URL of previous chapter"""
         pass
+
+    def has_content(self, response) -> bool:
+        """Check whether the page holds chapter content (used to spot block pages)"""
+        return bool(self.extract_content(response))
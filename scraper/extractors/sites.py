@@ -0,0 +1,161 @@
+"""
+Declarative site definitions.
+
+Each site maps the five extracted fields to:
+    select   selectors tried in order (XPath, or CSS prefixed with "css:")
+    post     post-processing rules applied in order:
+             strip | split_first:<sep> | reject_prefix:<prefix> | urljoin
+    default  value returned when nothing matched (default: "")
+    missing  message logged when nothing matched
+    mode     content only: "blocks" flattens the first matched element with one
+             line per block element, "lines" joins matched text nodes line by line
+
+Adding a site means adding an entry here and a spider that uses SpecExtractor.
+"""
+
+SITE_SPECS = {
+    "booktoki": {
+        "title": {
+            "select": [
+                '//*[@id="at-main"]/div[2]/section/article/div[1]/div/div[2]/div/@title'
+            ],
+            "post": ["split_first:-", "strip"],
+        },
+        "chapter_number": {
+            "select": [
+                '//*[@id="at-main"]/div[2]/section/article/div[1]/div/div[2]/div/span/text()'
+            ],
+            "post": ["strip"],
+            "default": "-1",
+        },
+        "content": {"select": ['//*[@id="novel_content"]/div[2]']},
+        "next": {
+            # The last chapter's button is a dummy link that raises an alert
+            "select": ['//*[@id="goNextBtn"][not(contains(@onclick, "alert"))]/@href'],
+            "post": ["reject_prefix:#", "urljoin"],
+            "missing": "No next chapter link found",
+        },
+        "prev": {
+            "select": ['//*[@id="goPrevBtn"][not(contains(@onclick, "alert"))]/@href'],
+            "post": ["reject_prefix:#", "urljoin"],
+            "missing": "No previous chapter link found (likely first chapter)",
+        },
+    },
+    "lightnovelpub": {
+        "title": {
+            "select": [
+                "css:div.novel-info a::text",
+                "/html/body/main/div[1]/div[1]/div[1]/div[1]/div[1]/a/text()",
+            ],
+        },
+        "chapter_number": {
+            "select": [
+                "css:.chapter-selector-btn::text",
+                "/html/body/main/div[1]/div[1]/div[1]/div[1]/div[1]/h1/text()",
+            ],
+            "post": ["strip"],
+            "default": "-1",
+        },
+        "content": {"select": ['//*[@id="chapterText"]']},
+        "next": {
+            "select": [
+                "css:a.next-btn::attr(href)",
+                '//a[contains(@class, "next-btn")]/@href',
+            ],
+            "post": ["urljoin"],
+            "missing": "Could not find next chapter URL",
+        },
+        "prev": {
+            "select": [
+                "css:a.prev-btn::attr(href)",
+                '//a[contains(@class, "prev-btn")]/@href',
+            ],
+            "post": ["urljoin"],
+            "missing": "No previous chapter link found (likely first chapter)",
+        },
+    },
+    "mythic_regressor": {
+        "title": {
+            "select": [
+                '//*[@id="manga-reading-nav-head"]/div/div[1]/div/div[1]/ol/li[2]/a/text()'
+            ],
+            "post": ["strip"],
+        },
+        "chapter_number": {
+            "select": [
+                '//*[@id="chapter-heading"]/text()[normalize-space()]',
+                "css:#chapter-heading::text",
+            ],
+            "post": ["strip"],
+            "default": "-1",
+        },
+        "content": {
+            "select": [
+                "/html/body/div[1]/div/div[2]/div/div/div/div/div/div/div[1]/div[2]/div/div/div/div[2]"
+            ]
+        },
+        "next": {
+            "select": [
+                '//*[@id="manga-reading-nav-head"]//a[@href][contains(@class, "next")]/@href',
+                "css:a.next_page::attr(href)",
+            ],
+            "post": ["urljoin"],
+            "missing": "Next chapter URL not found.",
+        },
+        "prev": {
+            "select": [
+                '//*[@id="manga-reading-nav-head"]//a[@href][contains(@class, "prev")]/@href',
+                "css:a.prev_page::attr(href)",
+            ],
+            "post": ["urljoin"],
+            "missing": "Previous chapter URL not found.",
+        },
+    },
+    "novelfire": {
+        "title": {
+            "select": ['//*[@id="chapter-article"]/section/div/div[1]/h1/a/text()'],
+        },
+        "chapter_number": {
+            "select": [
+                '//*[@id="chapter-article"]/section/div/div[1]/h1/span[2]/text()'
+            ],
+            "post": ["strip"],
+            "default": "-1",
+        },
+        "content": {"select": ['//*[@id="content"]']},
+        "next": {
+            "select": ['//*[@id="chapter-article"]/section/div/div[2]/a[2]/@href'],
+            "post": ["urljoin"],
+            "missing": "Could not find next chapter URL",
+        },
+        "prev": {
+            "select": ['//*[@id="chapter-article"]/section/div/div[2]/a[1]/@href'],
+            "post": ["urljoin"],
+            "missing": "Could not find previous chapter URL",
+        },
+    },
+    "wetriedtls": {
+        "title": {
+            "select": ["/html/body/div/main/div[2]/nav[1]/div/div[1]/div[2]/h2/text()"],
+        },
+        "chapter_number": {
+            "select": ["/html/body/div/main/div[2]/nav[1]/div/div[1]/div[2]/h1/text()"],
+            "post": ["strip"],
+            "default": "-1",
+        },
+        "content": {
+            "select": ['//*[@id="reader-container"]//p//text()'],
+            "mode": "lines",
+        },
+        "next": {
+            "select": ["/html/body/div/main/div[2]/nav[2]/div/a[2]/@href"],
+            "post": ["urljoin"],
+            "missing": "Could not find next chapter URL",
+        },
+        "prev": {
+            "select": ["/html/body/div/main/div[2]/nav[2]/div/a[1]/@href"],
+            "post": ["urljoin"],
+            "missing": "Could not find previous chapter URL",
+        },
+    },
+}
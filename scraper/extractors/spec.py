@@ -0,0 +1,209 @@
+import logging
+from typing import Dict, List
+
+from lxml import etree
+from parsel.csstranslator import HTMLTranslator
+
+from .base import BaseExtractor
+
+logger = logging.getLogger(__name__)
+
+# Elements that start and end a line when flattening chapter HTML to text
+BLOCK_ELEMENTS = {
+    "p",
+    "div",
+    "h1",
+    "h2",
+    "h3",
+    "h4",
+    "h5",
+    "h6",
+    "li",
+    "ul",
+    "ol",
+    "blockquote",
+    "pre",
+    "table",
+    "tr",
+    "section",
+    "article",
+    "header",
+    "footer",
+    "center",
+}
+
+# Elements whose text never belongs to the chapter
+SKIPPED_ELEMENTS = {"script", "style", "noscript"}
+
+FIELDS = ("title", "chapter_number", "content", "next", "prev")
+
+_css_translator = HTMLTranslator()
+
+
+def compile_selector(selector: str) -> etree.XPath:
+    """Compile an XPath, or a CSS selector prefixed with 'css:', into an XPath object"""
+    if selector.startswith("css:"):
+        selector = _css_translator.css_to_xpath(selector[len("css:") :])
+    return etree.XPath(selector)
+
+
+def compile_spec(spec: Dict) -> Dict[str, List[etree.XPath]]:
+    """Compile every selector of a site spec once"""
+    return {
+        field: [compile_selector(s) for s in spec[field]["select"]]
+        for field in FIELDS
+        if field in spec
+    }
+
+
+def _append_text(text, result):
+    if not text:
+        return
+    # Normalize whitespace inside the text node
+    text = " ".join(text.split())
+    if text:
+        # Add space before if needed (unless we just added a newline)
+        if result and result[-1] != "\n" and not result[-1].endswith(" "):
+            result.append(" ")
+        result.append(text)
+
+
+def _block_text(element, result):
+    """Recursively extract text with proper line break handling"""
+    _append_text(element.text, result)
+
+    for child in element:
+        tag = child.tag if isinstance(child.tag, str) else None
+
+        if tag is None or tag in SKIPPED_ELEMENTS:
+            # Comments, processing instructions and scripts
+            pass
+        elif tag == "br":
+            # Explicit line break
+            result.append("\n")
+        elif tag in BLOCK_ELEMENTS:
+            # Block element - line break before and after
+            if result and result[-1] != "\n":
+                result.append("\n")
+            _block_text(child, result)
+            if result and result[-1] != "\n":
+                result.append("\n")
+        else:
+            # Inline element (i, strong, span, etc) - no line breaks
+            _block_text(child, result)
+
+        _append_text(child.tail, result)
+
+
+def element_to_text(element) -> str:
+    """Flatten an HTML element into chapter text, one line per block"""
+    result = []
+    _block_text(element, result)
+    return "".join(result).strip()
+
+
+class SpecExtractor(BaseExtractor):
+    """
+    Extractor driven by a declarative site spec (see sites.py).
+
+    Each field lists selectors tried in order; the first non-empty match wins and is
+    then passed through the field's post-processing rules. Selectors are compiled
+    into lxml XPath objects and evaluated on the response's lxml tree: once per
+    subclass for its class-level spec, once per instance for a spec passed in.
+    """
+
+    spec: Dict = {}
+
+    def __init__(self, spec: Dict = None):
+        if spec is not None:
+            self.spec = spec
+            self.selectors = compile_spec(spec)
+            return
+
+        # Compiled on first use and stored on the subclass itself, not inherited
+        cls = type(self)
+        if "_selectors" not in cls.__dict__:
+            cls._selectors = compile_spec(cls.spec)
+        self.selectors = cls._selectors
+
+    def _select(self, field, response):
+        """Return the first non-empty match of a field's selectors"""
+        root = response.selector.root
+        for xpath in self.selectors.get(field, []):
+            matches = xpath(root)
+            if isinstance(matches, list):
+                if matches:
+                    return matches[0]
+            elif matches:
+                return matches
+        return None
+
+    def _post_process(self, field, value, response):
+        for rule in self.spec[field].get("post", []):
+            if not value:
+                break
+            name, _, arg = rule.partition(":")
+            if name == "strip":
+                value = value.strip()
+            elif name == "split_first":
+                value = value.split(arg)[0]
+            elif name == "reject_prefix":
+                value = "" if value.startswith(arg) else value
+            elif name == "urljoin":
+                value = response.urljoin(value)
+            else:
+                raise ValueError(f"Unknown post-processing rule: {rule}")
+        return value
+
+    def _extract_string(self, field, response) -> str:
+        if field not in self.spec:
+            raise NotImplementedError(f"Site spec has no '{field}' entry")
+
+        match = self._select(field, response)
+        value = "" if match is None else str(match)
+        value = self._post_process(field, value, response)
+
+        if not value:
+            default = self.spec[field].get("default", "")
+            message = self.spec[field].get("missing")
+            if message:
+                logger.info(message)
+            return default
+
+        return value
+
+    def extract_novel_title(self, response) -> str:
+        return self._extract_string("title", response)
+
+    def extract_chapter_number(self, response) -> str:
+        return self._extract_string("chapter_number", response)
+
+    def extract_content(self, response) -> str:
+        content_spec = self.spec["content"]
+
+        if content_spec.get("mode", "blocks") == "lines":
+            # Selector yields text nodes; keep one stripped, non-empty line per node
+            root = response.selector.root
+            for xpath in self.selectors["content"]:
+                lines = [str(t).strip() for t in xpath(root)]
+                lines = [line for line in lines if line]
+                if lines:
+                    return "\n".join(lines)
+            return ""
+
+        element = self._select("content", response)
+        if element is None or not hasattr(element, "tag"):
+            logger.warning("Content container not found")
+            return ""
+
+        return element_to_text(element)
+
+    def has_content(self, response) -> bool:
+        # A single selector evaluation, cheaper than flattening the content
+        return self._select("content", response) is not None
+
+    def extract_next_chapter_url(self, response) -> str:
+        return self._extract_string("next", response)
+
+    def extract_prev_chapter_url(self, response) -> str:
+        return self._extract_string("prev", response)
@@ -0,0 +1,144 @@
+"""
+Canonical URLs and content fingerprints of scraped chapters.
+
+Chapter URLs are compared in canonical form, so tracking parameters, a trailing
+slash or http/https and www. variants don't make the same chapter look new. Chapter
+bodies are compared by a hash of their whitespace-normalized text, which catches a
+"next" link that leads back to an earlier chapter under a different URL.
+
+The URLs and fingerprints of a chapter file are kept next to it in
+.<chapter file stem>.fingerprints.json, stamped with the chapter file's size and
+mtime; when the stamp doesn't match, the index is rebuilt from the chapters.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urlsplit, urlunsplit
+
+import json_io
+
+# Query parameters that never select a different page
+TRACKING_PARAMS = frozenset(
+    {"fbclid", "gclid", "msclkid", "ref", "ref_src", "source", "spm", "_ga"}
+)
+_PATH_SAFE = "/:@!$&'()*+,;=-._~"
+
+
+def canonical_url(url: str) -> str:
+    """
+    Key for comparing chapter URLs (not for fetching).
+
+    Lowercases the host and drops www., default ports, the fragment, tracking
+    parameters and trailing slashes; http and https compare equal and the remaining
+    query parameters are sorted.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    if scheme == "http":
+        scheme = "https"
+
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and port not in (80, 443):
+        host = f"{host}:{port}"
+
+    path = quote(unquote(re.sub(r"/{2,}", "/", parts.path)), safe=_PATH_SAFE)
+    path = path.rstrip("/") or "/"
+
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def content_fingerprint(content) -> Optional[str]:
+    """Hash of a chapter's text with whitespace collapsed; None for empty content"""
+    text = " ".join(str(content or "").split())
+    if not text:
+        return None
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def index_path(chapter_path) -> Path:
+    chapter_path = Path(chapter_path)
+    return chapter_path.with_name(f".{chapter_path.stem}.fingerprints.json")
+
+
+def _stamp(path: Path):
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class ChapterIndex:
+    """Canonical URLs and content fingerprints of stored chapters"""
+
+    def __init__(self, urls: Iterable[str] = (), fingerprints: Iterable[str] = ()):
+        self.urls = set(urls)
+        self.fingerprints = set(fingerprints)
+
+    def __len__(self):
+        return len(self.urls)
+
+    def has_url(self, url) -> bool:
+        return canonical_url(url) in self.urls
+
+    def has_content(self, content) -> bool:
+        fingerprint = content_fingerprint(content)
+        return fingerprint is not None and fingerprint in self.fingerprints
+
+    def add(self, url, content):
+        self.urls.add(canonical_url(url))
+        fingerprint = content_fingerprint(content)
+        if fingerprint is not None:
+            self.fingerprints.add(fingerprint)
+
+    @classmethod
+    def from_chapters(cls, chapters: Iterable[dict]) -> "ChapterIndex":
+        index = cls()
+        for chapter in chapters:
+            index.add(chapter.get("url") or "", chapter.get("content"))
+        return index
+
+    @classmethod
+    def load(cls, chapter_path) -> "ChapterIndex":
+        """
+        Index of a chapter file: its saved index if still current, otherwise
+        rebuilt from the chapters (and saved). Empty if the file doesn't exist.
+        """
+        chapter_path = Path(chapter_path)
+        if not chapter_path.exists():
+            return cls()
+
+        path = index_path(chapter_path)
+        if path.exists():
+            try:
+                saved = json_io.read_json(path)
+                if saved.get("chapters") == _stamp(chapter_path):
+                    return cls(saved["urls"], saved["fingerprints"])
+            except (ValueError, KeyError, AttributeError):
+                pass
+
+        index = cls.from_chapters(json_io.iter_json_array(chapter_path))
+        index.save(chapter_path)
+        return index
+
+    def save(self, chapter_path):
+        """Write the index next to chapter_path, stamped with its current state"""
+        json_io.write_json(
+            index_path(chapter_path),
+            {
+                "chapters": _stamp(Path(chapter_path)),
+                "urls": sorted(self.urls),
+                "fingerprints": sorted(self.fingerprints),
+            },
+            indent=None,
+        )
@@ -1,10 +1,15 @@
+import asyncio
+import hashlib
 import json
 import logging
 
 import requests
 from scrapy import signals
+from scrapy.exceptions import IgnoreRequest
 from scrapy.http import HtmlResponse
 
+from .fingerprints import canonical_url
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,8 +57,8 @@ class BrightDataMiddleware:
         return middleware
 
     def process_request(self, request, spider):
-        # Only use Bright Data for specific domains
-        if "booktoki" in request.url:
+        # Only use Bright Data for specific domains, or requests escalated to it
+        if "booktoki" in request.url or request.meta.get("unlocker"):
             logger.info(f"Using Bright Data API for: {request.url}")
 
             try:
@@ -97,3 +102,112 @@ class BrightDataMiddleware:
 
     def spider_opened(self, spider):
         logger.info(f"BrightDataMiddleware enabled for spider: {spider.name}")
+
+
+class ChallengePageMiddleware:
+    """
+    Catch anti-bot interstitials and soft blocks that come back as HTTP 200.
+
+    A response is flagged when its body is tiny, contains a known challenge marker,
+    lacks the site's content node, or is byte-identical to a page already seen at
+    another URL. Flagged pages are re-queued with exponential backoff, then escalated
+    to Playwright or the Bright Data unlocker when configured, and finally dropped
+    so they never reach the spider or the storage pipeline.
+    """
+
+    def __init__(self, settings, stats):
+        self.min_body_size = settings.getint("CHALLENGE_MIN_BODY_SIZE", 1024)
+        self.markers = [
+            marker.lower().encode("utf-8")
+            for marker in settings.getlist("CHALLENGE_MARKERS", [])
+        ]
+        self.max_retries = settings.getint("CHALLENGE_MAX_RETRIES", 3)
+        self.backoff_base = settings.getfloat("CHALLENGE_BACKOFF_BASE", 10)
+        self.stats = stats
+
+        handlers = settings.getdict("DOWNLOAD_HANDLERS")
+        middlewares = settings.getdict("DOWNLOADER_MIDDLEWARES")
+        self.can_use_playwright = any(
+            "scrapy_playwright" in str(handler) for handler in handlers.values()
+        )
+        self.can_use_unlocker = any(
+            "BrightDataMiddleware" in str(path) and order is not None
+            for path, order in middlewares.items()
+        )
+
+        # Body digest -> canonical URL it was first seen at
+        self.seen_bodies = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.settings, crawler.stats)
+
+    def classify(self, request, response, spider):
+        """Return why a response looks like a block page, or None if it looks fine"""
+        if response.status != 200 or not isinstance(response, HtmlResponse):
+            return None
+
+        body = response.body
+        if len(body) < self.min_body_size:
+            return "small_body"
+
+        head = body[:16384].lower()
+        for marker in self.markers:
+            if marker in head:
+                return "marker"
+
+        extractor = getattr(spider, "extractor", None)
+        if extractor is not None and not extractor.has_content(response):
+            return "missing_content"
+
+        digest = hashlib.blake2b(body, digest_size=16).digest()
+        url = canonical_url(request.url)
+        first_url = self.seen_bodies.setdefault(digest, url)
+        if first_url != url:
+            return "repeated_body"
+
+        return None
+
+    def _escalate(self, request, attempt):
+        """Build the next attempt for a blocked request, or None to give up"""
+        meta = dict(request.meta)
+        meta["challenge_retries"] = attempt
+
+        if attempt <= self.max_retries:
+            return request.replace(dont_filter=True, meta=meta)
+
+        if self.can_use_playwright and not meta.get("playwright"):
+            meta["playwright"] = True
+            return request.replace(dont_filter=True, meta=meta)
+
+        if self.can_use_unlocker and not meta.get("unlocker"):
+            meta["unlocker"] = True
+            return request.replace(dont_filter=True, meta=meta)
+
+        return None
+
+    async def process_response(self, request, response, spider):
+        reason = self.classify(request, response, spider)
+        if reason is None:
+            return response
+
+        self.stats.inc_value(f"challenge/detected/{reason}", spider=spider)
+        attempt = request.meta.get("challenge_retries", 0) + 1
+        retry = self._escalate(request, attempt)
+
+        if retry is None:
+            self.stats.inc_value("challenge/gave_up", spider=spider)
+            logger.error(
+                f"Giving up on {request.url} after {attempt - 1} attempts ({reason})"
+            )
+            raise IgnoreRequest(f"Block page at {request.url} ({reason})")
+
+        delay = self.backoff_base * 2 ** min(attempt - 1, self.max_retries - 1)
+        logger.warning(
+            f"Block page at {request.url} ({reason}); "
+            f"retry {attempt} in {delay:.0f}s"
+            + (" via Playwright" if retry.meta.get("playwright") else "")
+            + (" via unlocker" if retry.meta.get("unlocker") else "")
+        )
+        await asyncio.sleep(delay)
+        return retry
@@ -0,0 +1,152 @@
+"""
+Ordering of chapters that were scraped out of order.
+
+Chapters are ranked by their prev/next link chain first; the parsed chapter number
+only decides how disconnected chain segments are ordered relative to each other.
+"""
+
+import heapq
+import re
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import json_io
+
+CHAPTER_NUMBER_PATTERN = re.compile(r"(\d+)(?:\.(\d+))?")
+
+
+def parse_chapter_key(chapter_number) -> Optional[Tuple[int, int]]:
+    """
+    Parse a scraped chapter number like 'Chapter 12.1' or '(12/294)' into (12, 1).
+
+    Returns None for missing numbers, including the extractors' '-1' placeholder.
+    """
+    text = str(chapter_number or "").strip()
+    if not text or text.startswith("-"):
+        return None
+    match = CHAPTER_NUMBER_PATTERN.search(text)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2) or 0)
+
+
+def chain_order(links: Dict[str, Dict]) -> Tuple[List[str], Dict]:
+    """
+    Order chapter URLs by following their prev/next links.
+
+    Args:
+        links: url -> {"prev": url, "next": url, "key": parsed number, "seq": arrival}
+
+    Returns:
+        (ordered urls, report) where the report lists chain gaps, branches and
+        chapter numbers claimed by more than one URL.
+    """
+    successor = {}
+    predecessor = {}
+    branches = []
+
+    def link(a, b):
+        if successor.get(a, b) != b or predecessor.get(b, a) != a:
+            branches.append({"from": a, "to": b})
+            return
+        successor[a] = b
+        predecessor[b] = a
+
+    for url, node in sorted(links.items(), key=lambda kv: kv[1]["seq"]):
+        if node.get("next") in links and node["next"] != url:
+            link(url, node["next"])
+        if node.get("prev") in links and node["prev"] != url:
+            link(node["prev"], url)
+
+    # Walk every segment from its head; leftovers are cycles, broken at arrival order
+    segments = []
+    visited = set()
+    heads = [url for url in links if url not in predecessor]
+    heads += sorted(
+        (url for url in links if url in predecessor), key=lambda u: links[u]["seq"]
+    )
+    for head in heads:
+        if head in visited:
+            continue
+        segment = []
+        url = head
+        while url is not None and url not in visited:
+            visited.add(url)
+            segment.append(url)
+            url = successor.get(url)
+        segments.append(segment)
+
+    def segment_key(segment):
+        keys = [links[u]["key"] for u in segment if links[u]["key"] is not None]
+        first_key = tuple(keys[0]) if keys else (float("inf"), 0)
+        return first_key, links[segment[0]]["seq"]
+
+    segments.sort(key=segment_key)
+    order = [url for segment in segments for url in segment]
+
+    # A segment boundary is a gap if a next link was left unscraped or numbers jump
+    gaps = []
+    for before, after in zip(segments, segments[1:]):
+        missing_next = links[before[-1]].get("next")
+        before_key = links[before[-1]]["key"]
+        after_key = links[after[0]]["key"]
+        number_jump = (
+            before_key is not None
+            and after_key is not None
+            and after_key[0] - before_key[0] > 1
+        )
+        if missing_next or number_jump:
+            gaps.append(
+                {"after": before[-1], "before": after[0], "missing_next": missing_next}
+            )
+    tail_next = links[segments[-1][-1]].get("next") if segments else None
+    if tail_next:
+        gaps.append(
+            {"after": segments[-1][-1], "before": None, "missing_next": tail_next}
+        )
+
+    urls_by_key = {}
+    for url in order:
+        key = links[url]["key"]
+        if key is not None:
+            urls_by_key.setdefault(tuple(key), []).append(url)
+    duplicate_numbers = [
+        {"chapter": f"{k[0]}.{k[1]}" if k[1] else str(k[0]), "urls": urls}
+        for k, urls in sorted(urls_by_key.items())
+        if len(urls) > 1
+    ]
+
+    report = {
+        "segments": len(segments),
+        "gaps": gaps,
+        "branches": branches,
+        "duplicate_numbers": duplicate_numbers,
+    }
+    return order, report
+
+
+def write_run(path: Path, chapters: Iterable[dict]):
+    """Spill a batch of chapters to a JSONL run file"""
+    json_io.write_jsonl(path, chapters)
+
+
+def read_run(path: Path) -> Iterator[dict]:
+    return json_io.iter_jsonl(path)
+
+
+def merge_runs(
+    run_paths: List[Path], buffer: List[dict], rank: Dict[str, int]
+) -> Iterator[dict]:
+    """
+    Yield every chapter from the spilled runs and the in-memory buffer in rank order.
+
+    Each run is sorted on its own (one run in memory at a time), then all runs are
+    streamed through a k-way merge.
+    """
+    for path in run_paths:
+        chapters = sorted(read_run(path), key=lambda ch: rank[ch["url"]])
+        write_run(path, chapters)
+
+    streams = [read_run(path) for path in run_paths]
+    streams.append(iter(sorted(buffer, key=lambda ch: rank[ch["url"]])))
+    return heapq.merge(*streams, key=lambda ch: rank[ch["url"]])
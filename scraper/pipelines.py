@@ -1,11 +1,17 @@
-import json
 import logging
+import shutil
+import tempfile
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional
 
 import scrapy
+from scrapy.exceptions import DropItem
 
+import json_io
+
+from .fingerprints import ChapterIndex
 from .items import NovelChapterItem
+from .ordering import chain_order, merge_runs, parse_chapter_key, write_run
 
 logger = logging.getLogger(__name__)
 
@@ -16,13 +22,27 @@ class StoragePipeline:
 
     Saves Korean chapters to one JSON file and English chapters to another.
     No pairing logic - just simple storage.
+
+    Chapters may arrive in any order. They are buffered in memory up to
+    buffer_size per language, spilled to temporary run files beyond that, and
+    written in prev/next chain order (chapter number as fallback) at finalize.
+
+    A chapter whose canonical URL or content is already stored (in this run, or
+    in the existing files in update mode) is dropped.
     """
 
+    LANGUAGES = ("korean", "english")
+
     # Class-level shared storage (shared across all spider instances)
-    _shared_korean_chapters: List[NovelChapterItem] = []
-    _shared_english_chapters: List[NovelChapterItem] = []
+    _shared_chapters: Dict[str, List[dict]] = {}
+    _shared_runs: Dict[str, List[Path]] = {}
+    _shared_links: Dict[str, Dict[str, Dict]] = {}
+    _shared_run_dir: Optional[Path] = None
     _shared_output_dir: Optional[Path] = None
     _shared_output_name: Optional[str] = None
+    _shared_update_mode: bool = False
+    _shared_buffer_size: int = 500
+    _known: Dict[str, ChapterIndex] = {}
     _spider_count: int = 0
     _completed_spiders: int = 0
 
@@ -30,6 +50,8 @@ class StoragePipeline:
         self,
         output_dir: str = "output",
         output_name: str = "chapters",
+        update_mode: bool = False,
+        buffer_size: int = 500,
     ):
         """
         Initialize the StoragePipeline.
@@ -37,6 +59,10 @@ class StoragePipeline:
         Args:
             output_dir (str, optional): Output directory. Defaults to "output".
             output_name (str, optional): Base name for output files. Defaults to "chapters".
+            update_mode (bool, optional): Append new chapters to the existing files
+                instead of overwriting them. Defaults to False.
+            buffer_size (int, optional): Chapters per language kept in memory before
+                spilling to disk. Defaults to 500.
         """
         self.output_dir = Path(output_dir)
         self.output_name = output_name
@@ -45,8 +71,10 @@ class StoragePipeline:
         if StoragePipeline._shared_output_dir is None:
             StoragePipeline._shared_output_dir = self.output_dir
             StoragePipeline._shared_output_name = output_name
-            StoragePipeline._shared_korean_chapters = []
-            StoragePipeline._shared_english_chapters = []
+            StoragePipeline._shared_update_mode = update_mode
+            StoragePipeline._shared_buffer_size = buffer_size
+            StoragePipeline._known = self._load_known(update_mode)
+            self._reset_buffers()
             StoragePipeline._spider_count = 0
             StoragePipeline._completed_spiders = 0
 
@@ -67,12 +95,43 @@ class StoragePipeline:
         """
         output_dir = crawler.settings.get("OUTPUT_DIR", "output")
         output_name = crawler.settings.get("OUTPUT_NAME", "chapters")
+        update_mode = crawler.settings.getbool("UPDATE_MODE", False)
+        buffer_size = crawler.settings.getint("CHAPTER_BUFFER_SIZE", 500)
 
         return cls(
             output_dir=output_dir,
             output_name=output_name,
+            update_mode=update_mode,
+            buffer_size=buffer_size,
         )
 
+    @staticmethod
+    def _reset_buffers():
+        if StoragePipeline._shared_run_dir is not None:
+            shutil.rmtree(StoragePipeline._shared_run_dir, ignore_errors=True)
+        StoragePipeline._shared_run_dir = None
+        StoragePipeline._shared_chapters = {
+            lang: [] for lang in StoragePipeline.LANGUAGES
+        }
+        StoragePipeline._shared_runs = {lang: [] for lang in StoragePipeline.LANGUAGES}
+        StoragePipeline._shared_links = {lang: {} for lang in StoragePipeline.LANGUAGES}
+
+    def _chapter_path(self, language: str) -> Path:
+        output_dir = StoragePipeline._shared_output_dir or self.output_dir
+        output_name = StoragePipeline._shared_output_name or self.output_name
+        return output_dir / f"{output_name}_{language}.json"
+
+    def _load_known(self, update_mode: bool) -> Dict[str, ChapterIndex]:
+        """Index the chapters already stored for each language (none unless updating)."""
+        return {
+            language: (
+                ChapterIndex.load(self._chapter_path(language))
+                if update_mode
+                else ChapterIndex()
+            )
+            for language in self.LANGUAGES
+        }
+
     def open_spider(self, spider: scrapy.Spider):
         """
         Initialize resources when the spider opens.
@@ -91,15 +150,55 @@ class StoragePipeline:
 
     def process_item(self, item: NovelChapterItem, spider: scrapy.Spider):
         """Process each scraped item and store it."""
-        if item["language"] == "korean":
-            StoragePipeline._shared_korean_chapters.append(item)
-            logger.debug(f"Stored Korean chapter {item.get('chapter_number')}")
-        elif item["language"] == "english":
-            StoragePipeline._shared_english_chapters.append(item)
-            logger.debug(f"Stored English chapter {item.get('chapter_number')}")
+        language = item["language"]
+        known = StoragePipeline._known.get(language)
+        if known is not None:
+            if known.has_url(item["url"]):
+                raise DropItem(f"Chapter already stored: {item['url']}")
+            if known.has_content(item.get("content")):
+                raise DropItem(f"Chapter content already stored: {item['url']}")
+            known.add(item["url"], item.get("content"))
+
+        if language not in StoragePipeline._shared_chapters:
+            return item
+
+        links = StoragePipeline._shared_links[language]
+        if item["url"] in links:
+            raise DropItem(f"Duplicate chapter: {item['url']}")
+
+        # Only the link graph stays in memory for every chapter; content may be spilled
+        links[item["url"]] = {
+            "prev": item.get("prev_chapter_url"),
+            "next": item.get("next_chapter_url"),
+            "key": parse_chapter_key(item.get("chapter_number")),
+            "seq": len(links),
+        }
+
+        buffer = StoragePipeline._shared_chapters[language]
+        buffer.append(dict(item))
+        logger.debug(f"Stored {language} chapter {item.get('chapter_number')}")
+
+        if len(buffer) >= StoragePipeline._shared_buffer_size:
+            self._spill(language)
 
         return item
 
+    def _spill(self, language: str):
+        """Move the in-memory chapters of a language to a temporary run file."""
+        if StoragePipeline._shared_run_dir is None:
+            output_dir = StoragePipeline._shared_output_dir or self.output_dir
+            output_dir.mkdir(parents=True, exist_ok=True)
+            StoragePipeline._shared_run_dir = Path(
+                tempfile.mkdtemp(prefix=".chapter_runs_", dir=output_dir)
+            )
+
+        runs = StoragePipeline._shared_runs[language]
+        path = StoragePipeline._shared_run_dir / f"{language}_{len(runs):04d}.jsonl"
+        write_run(path, StoragePipeline._shared_chapters[language])
+        runs.append(path)
+        StoragePipeline._shared_chapters[language] = []
+        logger.debug(f"Spilled {language} chapters to {path}")
+
     def close_spider(self, spider: scrapy.Spider):
         """Called when a spider is closed. Save only after all spiders finish."""
         StoragePipeline._completed_spiders += 1
@@ -110,37 +209,115 @@ class StoragePipeline:
         # Only save when ALL spiders have finished
         if StoragePipeline._completed_spiders == StoragePipeline._spider_count:
             logger.info("All spiders completed. Saving chapters...")
-            self._save_chapters()
-
-            # Reset for next run
-            StoragePipeline._shared_korean_chapters = []
-            StoragePipeline._shared_english_chapters = []
+            try:
+                self._save_chapters()
+            finally:
+                # Reset for next run
+                self._reset_buffers()
+                StoragePipeline._known = {}
             StoragePipeline._spider_count = 0
             StoragePipeline._completed_spiders = 0
 
-    def _save_chapters(self):
-        """Save Korean and English chapters to separate files."""
-        output_dir = StoragePipeline._shared_output_dir or Path(".")
-        output_name = StoragePipeline._shared_output_name or "chapters"
+    @staticmethod
+    def _dump_chapter(chapter: dict) -> bytes:
+        """Serialize one chapter exactly as json.dump(indent=2) lays out array items."""
+        return b"  " + json_io.dumps(chapter, indent=2).replace(b"\n", b"\n  ")
+
+    @staticmethod
+    def _append_chapters(path: Path, chapters: Iterable[dict]) -> bool:
+        """
+        Append chapters to an existing JSON array file in place.
+
+        Only the closing bracket is rewritten, so stored chapters are never touched.
+        Returns False if the file is not a non-empty JSON array.
+        """
+        with open(path, "r+b") as f:
+            f.seek(0, 2)
+            end = f.tell()
+            tail_start = max(0, end - 64)
+            f.seek(tail_start)
+            tail = f.read()
+
+            bracket = tail.rstrip().rfind(b"]")
+            if bracket < 0 or tail[:bracket].rstrip().endswith(b"["):
+                return False
+
+            # Drop the bracket and the whitespace before it
+            f.seek(tail_start + len(tail[:bracket].rstrip()))
+            f.truncate()
+            for chapter in chapters:
+                f.write(b",\n" + StoragePipeline._dump_chapter(chapter))
+            f.write(b"\n]")
 
-        # Save Korean chapters
-        if StoragePipeline._shared_korean_chapters:
-            korean_path = output_dir / f"{output_name}_korean.json"
-            korean_data = [dict(ch) for ch in StoragePipeline._shared_korean_chapters]
+        return True
 
-            with open(korean_path, "w", encoding="utf-8") as f:
-                json.dump(korean_data, f, ensure_ascii=False, indent=2)
+    @staticmethod
+    def _report_order(language: str, report: Dict):
+        """Log gaps, branches and duplicate chapter numbers found in the link chain."""
+        for gap in report["gaps"][:10]:
+            if gap["missing_next"]:
+                detail = f"next link {gap['missing_next']} was not scraped"
+            else:
+                detail = f"chapter numbers jump to {gap['before']}"
+            logger.warning(f"Gap in {language} chapters after {gap['after']}: {detail}")
+        for branch in report["branches"][:10]:
+            logger.warning(
+                f"Conflicting {language} links: {branch['from']} -> {branch['to']}"
+            )
+        for duplicate in report["duplicate_numbers"][:10]:
+            logger.warning(
+                f"{language.capitalize()} chapter {duplicate['chapter']} "
+                f"stored from {len(duplicate['urls'])} URLs: {duplicate['urls']}"
+            )
+        logger.info(
+            f"{language.capitalize()} chapters form {report['segments']} chain segment(s): "
+            f"{len(report['gaps'])} gap(s), {len(report['branches'])} conflicting link(s), "
+            f"{len(report['duplicate_numbers'])} duplicate number(s)"
+        )
 
-            logger.info(f"Saved {len(korean_data)} Korean chapters to {korean_path}")
+    def _write_chapters(self, language: str):
+        path = self._chapter_path(language)
+        links = StoragePipeline._shared_links[language]
+
+        order, report = chain_order(links)
+        self._report_order(language, report)
+        rank = {url: position for position, url in enumerate(order)}
+        chapters = merge_runs(
+            StoragePipeline._shared_runs[language],
+            StoragePipeline._shared_chapters[language],
+            rank,
+        )
 
-        # Save English chapters
-        if StoragePipeline._shared_english_chapters:
-            english_path = output_dir / f"{output_name}_english.json"
-            english_data = [dict(ch) for ch in StoragePipeline._shared_english_chapters]
+        if (
+            StoragePipeline._shared_update_mode
+            and path.exists()
+            and self._append_chapters(path, chapters)
+        ):
+            logger.info(f"Appended {len(links)} new {language} chapters to {path}")
+            self._save_index(language, path)
+            return
 
-            with open(english_path, "w", encoding="utf-8") as f:
-                json.dump(english_data, f, ensure_ascii=False, indent=2)
+        with json_io.atomic_open(path) as f:
+            separator = b"[\n"
+            for chapter in chapters:
+                f.write(separator + self._dump_chapter(chapter))
+                separator = b",\n"
+            f.write(b"\n]")
 
-            logger.info(f"Saved {len(english_data)} English chapters to {english_path}")
+        logger.info(f"Saved {len(links)} {language} chapters to {path}")
+        self._save_index(language, path)
+
+    @staticmethod
+    def _save_index(language: str, path: Path):
+        """Keep the URL/content index in step with the chapter file just written."""
+        known = StoragePipeline._known.get(language)
+        if known is not None:
+            known.save(path)
+
+    def _save_chapters(self):
+        """Save Korean and English chapters to separate files, in reading order."""
+        for language in self.LANGUAGES:
+            if StoragePipeline._shared_links[language]:
+                self._write_chapters(language)
 
         logger.info("StoragePipeline finished.")
@@ -0,0 +1,156 @@
+"""
+Speculative prefetch of chapters whose URLs follow a numeric pattern.
+
+Auto-crawl learns from each real next link how the chapter URL changes (one number
+stepping by a fixed amount, e.g. /chapter-123 -> /chapter-124). Once the last
+MIN_HOPS hops agree, the next few URLs are requested ahead of time. A prefetched page
+is only kept when the chain of real next links reaches its URL; when a next link
+breaks the pattern, every outstanding prediction is discarded and learning restarts.
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Consistent next-link hops needed before predicting
+MIN_HOPS = 3
+
+_NUMBER = re.compile(r"(\d+)")
+
+
+def _split(url):
+    """(text between numbers, numbers) of a URL"""
+    parts = _NUMBER.split(url)
+    return tuple(parts[0::2]), parts[1::2]
+
+
+def url_step(url: str, next_url: str) -> Optional[Tuple[int, int]]:
+    """
+    (index of the number that changed, increment) if next_url is url with exactly
+    one number increased, otherwise None.
+    """
+    text, numbers = _split(url)
+    next_text, next_numbers = _split(next_url)
+    if text != next_text or len(numbers) != len(next_numbers):
+        return None
+
+    changed = [
+        i for i, (a, b) in enumerate(zip(numbers, next_numbers)) if int(a) != int(b)
+    ]
+    if len(changed) != 1:
+        return None
+    field = changed[0]
+    delta = int(next_numbers[field]) - int(numbers[field])
+    return (field, delta) if delta > 0 else None
+
+
+def apply_step(url: str, step: Tuple[int, int], times: int = 1) -> str:
+    """url with the step's number advanced times steps, keeping zero padding"""
+    field, delta = step
+    parts = _NUMBER.split(url)
+    number = parts[2 * field + 1]
+    value = int(number) + delta * times
+    width = len(number) if number.startswith("0") else 0
+    parts[2 * field + 1] = str(value).zfill(width)
+    return "".join(parts)
+
+
+class ChapterPrefetcher:
+    """
+    Bookkeeping for speculative chapter requests along one next-link chain.
+
+    The spider reports every real hop (follow), every prefetched page that arrives
+    (arrive) or fails (fail), and asks which URLs to request ahead (predict).
+    """
+
+    def __init__(self, min_hops: int = MIN_HOPS):
+        self.min_hops = min_hops
+        self.step = None
+        self.hops = 0
+        # Predicted URL -> parsed item once it arrived, None while in flight
+        self.pending: Dict[str, Optional[dict]] = {}
+        # In-flight predictions the chain has already reached
+        self.confirmed = set()
+        self.stats = Counter()
+
+    @property
+    def confident(self) -> bool:
+        return self.step is not None and self.hops >= self.min_hops
+
+    def _learn(self, url, next_url):
+        step = url_step(url, next_url)
+        if step is not None and step == self.step:
+            self.hops += 1
+        else:
+            self.step, self.hops = step, int(step is not None)
+
+    def discard(self):
+        """Drop every outstanding prediction; in-flight pages are ignored on arrival"""
+        self.stats["discarded"] += len(self.pending)
+        self.pending.clear()
+        self.confirmed.clear()
+
+    def follow(self, url: str, next_url: str) -> Tuple[str, Optional[dict]]:
+        """
+        Record the real hop url -> next_url.
+
+        Returns ("arrived", item) if next_url was prefetched and its item is ready,
+        ("in_flight", None) if its prefetch is still downloading, or ("request", None)
+        if the spider has to request it.
+        """
+        self._learn(url, next_url)
+
+        if next_url not in self.pending:
+            if self.pending:
+                self.stats["mispredicted"] += 1
+                self.discard()
+                self.hops = 0
+            return "request", None
+
+        self.stats["hits"] += 1
+        if self.pending[next_url] is None:
+            self.confirmed.add(next_url)
+            return "in_flight", None
+        return "arrived", self.pending.pop(next_url)
+
+    def arrive(self, url: str, item: dict) -> Optional[dict]:
+        """
+        Store a prefetched page's item; returns it if the chain already reached url.
+        """
+        if url not in self.pending:
+            self.stats["ignored"] += 1
+            return None
+        if url in self.confirmed:
+            self.confirmed.discard(url)
+            del self.pending[url]
+            return item
+        self.pending[url] = item
+        return None
+
+    def fail(self, url: str) -> bool:
+        """Forget a prefetch that failed; True if the chain needs url requested for real"""
+        self.stats["failed"] += 1
+        self.pending.pop(url, None)
+        if url in self.confirmed:
+            self.confirmed.discard(url)
+            return True
+        return False
+
+    def predict(self, url: str, count: int, skip=None) -> List[str]:
+        """
+        Up to count URLs after url to request ahead, skipping those already pending
+        and those for which skip(url) is true.
+
+        url is the chain's next chapter (requested or in hand), so predictions start
+        one step after it.
+        """
+        if not self.confident or count <= 0:
+            return []
+        urls = []
+        for times in range(1, count + 1):
+            predicted = apply_step(url, self.step, times)
+            if predicted not in self.pending and not (skip and skip(predicted)):
+                self.pending[predicted] = None
+                urls.append(predicted)
+        self.stats["prefetched"] += len(urls)
+        return urls
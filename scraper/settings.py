@@ -20,6 +20,10 @@ CONCURRENT_REQUESTS = 4
 CONCURRENT_REQUESTS_PER_DOMAIN = 4
 CONCURRENT_REQUESTS_PER_IP = 4
 
+# Auto-crawl requests this many chapters ahead once chapter URLs follow a numeric
+# pattern (see scraper/prefetch.py); capped at CONCURRENT_REQUESTS_PER_DOMAIN - 1
+PREFETCH_CHAPTERS = 3
+
 # Enable cookies (important for session tracking)
 COOKIES_ENABLED = True
 
@@ -66,6 +70,10 @@ ITEM_PIPELINES = {
 # Output settings for pipeline
 OUTPUT_DIR = "output"
 OUTPUT_NAME = "chapters"
+# Append to existing chapter files instead of overwriting them (set by scrape.py --update)
+UPDATE_MODE = False
+# Chapters per language held in memory before spilling to disk during a crawl
+CHAPTER_BUFFER_SIZE = 500
 
 # Enable and configure the AutoThrottle extension
 AUTOTHROTTLE_ENABLED = True
@@ -82,19 +90,48 @@ LOG_LEVEL = "INFO"
 LOG_FORMAT = "%(asctime)s [%(name)s] %(levelname)s: %(message)s"
 LOG_DATEFORMAT = "%Y-%m-%d %H:%M:%S"
 
-# Playwright download handlers
-DOWNLOAD_HANDLERS = {
-    "http": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-    "https": "scrapy_playwright.handler.ScrapyPlaywrightDownloadHandler",
-}
+# Playwright download handlers are installed by scrape.py only when
+# --use_playwright is set, so plain HTTP crawls never start a browser
 
 DOWNLOADER_MIDDLEWARES = {
     # "scraper.middlewares.HeaderLoggingMiddleware": 544,
+    "scraper.middlewares.ChallengePageMiddleware": 560,
 }
 
-# Playwright settings - Use Edge
+# Block-page detection for pages that come back as HTTP 200
+CHALLENGE_MIN_BODY_SIZE = 1024
+CHALLENGE_MARKERS = [
+    "<title>just a moment...</title>",
+    "cf-browser-verification",
+    "challenge-platform",
+    "cf_chl_opt",
+    "attention required! | cloudflare",
+    'id="challenge-form"',
+    "hcaptcha.com/1/api.js",
+    "google.com/recaptcha/api.js",
+]
+CHALLENGE_MAX_RETRIES = 3
+CHALLENGE_BACKOFF_BASE = 10
+
+# Playwright settings - headless Chromium server profile
 PLAYWRIGHT_BROWSER_TYPE = "chromium"
 PLAYWRIGHT_LAUNCH_OPTIONS = {
+    "headless": True,
+    "args": [
+        "--disable-blink-features=AutomationControlled",
+        "--disable-dev-shm-usage",
+        "--no-sandbox",
+        "--disable-features=IsolateOrigins,site-per-process",
+        "--disable-infobars",
+        "--disable-extensions",
+        "--disable-gpu",
+        "--mute-audio",
+        "--blink-settings=imagesEnabled=false",
+    ],
+}
+
+# Visible Edge window for debugging a site by eye (scrape.py --headful)
+PLAYWRIGHT_DESKTOP_LAUNCH_OPTIONS = {
     "headless": False,
     "channel": "msedge",
     "args": [
@@ -111,11 +148,19 @@ PLAYWRIGHT_LAUNCH_OPTIONS = {
     ],
 }
 
+# Images, media and fonts are aborted before they are downloaded
+PLAYWRIGHT_ABORT_REQUEST = "scraper.browser.should_abort_request"
+
+# All pages share one context; raise the page limit on machines with spare RAM
+PLAYWRIGHT_MAX_CONTEXTS = 1
+PLAYWRIGHT_MAX_PAGES_PER_CONTEXT = 4
+
 # Playwright contexts for realistic browser fingerprint
 PLAYWRIGHT_CONTEXTS = {
     "default": {
-        "viewport": {"width": 1920, "height": 1080},
-        "screen": {"width": 1920, "height": 1080},
+        # Screen and viewport match, so the reported window fits on the reported screen
+        "viewport": {"width": 800, "height": 600},
+        "screen": {"width": 800, "height": 600},
         "device_scale_factor": 1,
         "is_mobile": False,
         "has_touch": False,
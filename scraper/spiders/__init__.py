@@ -1,6 +1,19 @@
-from .base import BaseNovelSpider
-from .booktoki import BookTokiSpider
-from .lightnovelpub import LightNovelPubSpider
-from .mythic_regressor import MythicRegressorSpider
-from .novelfire import NovelFireSpider
-from .wetriedtls import WeTriedTlsSpider
+import importlib
+
+# Spider modules are imported on first access so loading one site doesn't load all
+_SPIDERS = {
+    "BaseNovelSpider": ".base",
+    "BookTokiSpider": ".booktoki",
+    "LightNovelPubSpider": ".lightnovelpub",
+    "MythicRegressorSpider": ".mythic_regressor",
+    "NovelFireSpider": ".novelfire",
+    "WeTriedTlsSpider": ".wetriedtls",
+}
+
+__all__ = list(_SPIDERS)
+
+
+def __getattr__(name):
+    if name in _SPIDERS:
+        return getattr(importlib.import_module(_SPIDERS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
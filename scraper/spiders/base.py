@@ -1,17 +1,27 @@
 import logging
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
 from typing import Optional
 
 import scrapy
-from fake_useragent import UserAgent
-from scrapy_playwright.page import PageMethod
 
 from ..extractors.base import BaseExtractor
+from ..fingerprints import ChapterIndex, canonical_url, content_fingerprint
 from ..items import NovelChapterItem
+from ..prefetch import ChapterPrefetcher
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_user_agent_pool():
+    """Load the fake_useragent database once and share it between spiders"""
+    from fake_useragent import UserAgent
+
+    return UserAgent()
+
+
 class BaseNovelSpider(scrapy.Spider):
     """Base spider class for all novel sites"""
 
@@ -20,11 +30,15 @@ class BaseNovelSpider(scrapy.Spider):
     language = None
     auto_crawl = False
     use_playwright = False
+    # Sites whose chapters only render (or get past bot checks) with JavaScript
+    requires_js = False
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.ua = UserAgent()
-        self.visited_urls = set()  # To track visited URLs
+        self.visited_urls = set()  # Canonical URLs of the chapters scraped
+        # Content fingerprints of scraped (and, when updating, stored) chapters
+        self.seen_fingerprints = set()
+        self.prefetcher = ChapterPrefetcher()
 
         self.max_chapters = int(kwargs.get("max_chapters", 0))  # 0 means unlimited
         self.chapters_scraped = 0
@@ -38,25 +52,64 @@ class BaseNovelSpider(scrapy.Spider):
         elif not hasattr(self, "start_urls"):
             self.start_urls = []
 
+    @property
+    def ua(self):
+        return get_user_agent_pool()
+
+    @property
+    def uses_browser(self) -> bool:
+        """Render pages in Playwright only if enabled and the site needs JavaScript"""
+        return bool(self.use_playwright) and self.requires_js
+
+    def _request_meta(self, url, stealth=False):
+        if not self.uses_browser:
+            return {}
+
+        meta = {
+            "playwright": True,
+            "playwright_context": "default",
+            "playwright_page_goto_kwargs": {
+                "wait_until": "domcontentloaded",
+                "timeout": 60000,
+            },
+        }
+        if stealth:
+            meta["playwright_page_methods"] = self._stealth_page_methods(url)
+        return meta
+
+    def _stored_fingerprints(self):
+        """Content fingerprints of the chapter file an update crawl appends to"""
+        if not self.settings.getbool("UPDATE_MODE"):
+            return set()
+        output_dir = Path(self.settings.get("OUTPUT_DIR", "output"))
+        output_name = self.settings.get("OUTPUT_NAME", "chapters")
+        return ChapterIndex.load(
+            output_dir / f"{output_name}_{self.language}.json"
+        ).fingerprints
+
     async def start(self):
-        """Start requests with Playwright integration and human-like behavior."""
+        """Start requests, rendered in the browser for sites that need JavaScript."""
+        self.seen_fingerprints = self._stored_fingerprints()
         for url in self.start_urls:
 
             yield scrapy.Request(
                 url,
                 callback=self.parse_chapter,
                 headers={"User-Agent": self.ua.random},
-                meta={
-                    "playwright": self.use_playwright,
-                    "playwright_include_page": True,
-                    "playwright_page_goto_kwargs": {
-                        "wait_until": "domcontentloaded",
-                        "timeout": 60000,
-                    },
-                    "playwright_page_methods": [
-                        PageMethod(
-                            "evaluate",
-                            """
+                meta=self._request_meta(url, stealth=True),
+            )
+
+    def _stealth_page_methods(self, url):
+        """Page methods that make a Playwright page look human; empty without a browser"""
+        if not self.uses_browser:
+            return []
+
+        from scrapy_playwright.page import PageMethod
+
+        return [
+            PageMethod(
+                "evaluate",
+                """
                             page => require('playwright-stealth').stealth(page)
                             
                             () => {
@@ -68,20 +121,55 @@ class BaseNovelSpider(scrapy.Spider):
                                 document.dispatchEvent(event);
                             }
                             """,
-                        ),
-                        PageMethod("wait_for_timeout", 500 + (hash(url) % 1000)),
-                    ],
-                },
+            ),
+            PageMethod("wait_for_timeout", 500 + (hash(url) % 1000)),
+        ]
+
+    @property
+    def prefetch_budget(self) -> int:
+        """
+        Chapters to request ahead of the next link: PREFETCH_CHAPTERS, leaving one
+        request slot for the real next chapter and staying under max_chapters.
+        """
+        budget = min(
+            self.settings.getint("PREFETCH_CHAPTERS", 0),
+            self.settings.getint("CONCURRENT_REQUESTS_PER_DOMAIN", 8) - 1,
+        )
+        if self.max_chapters > 0:
+            budget = min(budget, self.max_chapters - self.chapters_scraped - 1)
+        return max(budget, 0)
+
+    def _chapter_request(self, url, prefetch=False):
+        meta = self._request_meta(url)
+        if not prefetch:
+            return scrapy.Request(
+                url,
+                callback=self.parse_chapter,
+                headers={"User-Agent": self.ua.random},
+                dont_filter=True,
+                meta=meta,
             )
 
-    def parse_chapter(self, response):
-        """Common parsing logic for all novel chapters"""
-        if self.extractor is None:
-            raise NotImplementedError("extractor must be defined")
+        # Speculative pages yield to the real next chapter in the queue
+        return scrapy.Request(
+            url,
+            callback=self.parse_chapter,
+            errback=self._prefetch_failed,
+            headers={"User-Agent": self.ua.random},
+            dont_filter=True,
+            priority=-1,
+            meta={**meta, "prefetch_url": url},
+        )
 
-        # Mark URL as visited
-        self.visited_urls.add(response.url)
+    def _prefetch_failed(self, failure):
+        url = failure.request.meta["prefetch_url"]
+        if self.prefetcher.fail(url):
+            logger.info(f"Prefetch of next chapter {url} failed; requesting it again")
+            yield self._chapter_request(url)
+        else:
+            logger.debug(f"Prefetch of {url} failed: {failure.value}")
 
+    def _extract_item(self, response) -> NovelChapterItem:
         item = NovelChapterItem()
         item["url"] = response.url
         item["source_site"] = self.source_site
@@ -93,53 +181,101 @@ class BaseNovelSpider(scrapy.Spider):
         item["content"] = self.extractor.extract_content(response)
         item["next_chapter_url"] = self.extractor.extract_next_chapter_url(response)
         item["prev_chapter_url"] = self.extractor.extract_prev_chapter_url(response)
+        return item
 
-        logger.info(
-            f"Scraped chapter {item.get('chapter_number')} from {item.get('url')}"
-        )
+    def parse_chapter(self, response):
+        """Common parsing logic for all novel chapters"""
+        if self.extractor is None:
+            raise NotImplementedError("extractor must be defined")
 
-        # Increment chapter counter
-        self.chapters_scraped += 1
+        item = self._extract_item(response)
+
+        # A prefetched page waits until the chain of next links reaches it
+        prefetch_url = response.meta.get("prefetch_url")
+        if prefetch_url is not None:
+            item = self.prefetcher.arrive(prefetch_url, item)
+            if item is None:
+                return
+
+        # Each accepted chapter may unlock the prefetched one after it
+        while item is not None:
+            current_url = item["url"]
+
+            # A body seen before means "next" looped back; start pages are exempt
+            # because update crawls refetch the last stored chapter
+            fingerprint = content_fingerprint(item.get("content"))
+            if fingerprint in self.seen_fingerprints and not self._is_start_url(
+                current_url
+            ):
+                logger.warning(
+                    f"Chapter at {current_url} repeats one already scraped or stored. "
+                    f"Stopping auto-crawl."
+                )
+                return
+            if fingerprint is not None:
+                self.seen_fingerprints.add(fingerprint)
 
-        yield item
+            # Mark URL as visited
+            self.visited_urls.add(canonical_url(current_url))
 
-        # Check if max_chapters limit is reached
-        if self.max_chapters > 0 and self.chapters_scraped >= self.max_chapters:
             logger.info(
-                f"Reached max_chapters limit ({self.max_chapters}). Stopping auto-crawl."
+                f"Scraped chapter {item.get('chapter_number')} from {current_url}"
             )
-            return
 
-        # Auto-crawl next chapter with validation
-        if self.auto_crawl and item["next_chapter_url"]:
+            # Increment chapter counter
+            self.chapters_scraped += 1
+
+            yield item
+
+            # Check if max_chapters limit is reached
+            if self.max_chapters > 0 and self.chapters_scraped >= self.max_chapters:
+                logger.info(
+                    f"Reached max_chapters limit ({self.max_chapters}). Stopping auto-crawl."
+                )
+                return
+
+            # Auto-crawl next chapter with validation
             next_url = item["next_chapter_url"]
+            if not (self.auto_crawl and next_url):
+                return
 
             # Check if already visited
-            if next_url in self.visited_urls:
+            if canonical_url(next_url) in self.visited_urls:
                 logger.info(f"Already visited next chapter URL: {next_url}")
                 return
 
             # Validate the URL before following
-            if self._is_valid_next_url(next_url, response.url):
-                logger.info(
-                    f"Following next chapter: {next_url} ({self.chapters_scraped}/{self.max_chapters or 'unlimited'})"
-                )
-                yield scrapy.Request(
-                    next_url,
-                    callback=self.parse_chapter,
-                    headers={"User-Agent": self.ua.random},
-                    dont_filter=True,
-                    meta={
-                        "playwright": self.use_playwright,
-                        "playwright_include_page": True,
-                        "playwright_page_goto_kwargs": {
-                            "wait_until": "domcontentloaded",
-                            "timeout": 60000,
-                        },
-                    },
-                )
-            else:
+            if not self._is_valid_next_url(next_url, current_url):
                 logger.info(f"Skipping invalid next URL: {next_url}")
+                return
+
+            logger.info(
+                f"Following next chapter: {next_url} ({self.chapters_scraped}/{self.max_chapters or 'unlimited'})"
+            )
+            state, item = self.prefetcher.follow(current_url, next_url)
+            if state == "request":
+                yield self._chapter_request(next_url)
+
+            for url in self.prefetcher.predict(
+                next_url,
+                self.prefetch_budget,
+                skip=lambda url: canonical_url(url) in self.visited_urls,
+            ):
+                logger.debug(f"Prefetching predicted chapter: {url}")
+                yield self._chapter_request(url, prefetch=True)
+
+    def closed(self, reason):
+        stats = self.prefetcher.stats
+        if stats["prefetched"]:
+            unused = stats["prefetched"] - stats["hits"]
+            logger.info(
+                f"Prefetched {stats['prefetched']} predicted chapter(s): "
+                f"{stats['hits']} used, {unused} discarded "
+                f"({stats['mispredicted']} misprediction(s), {stats['failed']} failed)"
+            )
+
+    def _is_start_url(self, url) -> bool:
+        return canonical_url(url) in {canonical_url(u) for u in self.start_urls}
 
     def _is_valid_next_url(self, next_url: str, current_url: str) -> bool:
         """
@@ -161,7 +297,7 @@ class BaseNovelSpider(scrapy.Spider):
             return False
 
         # Check if it's the same URL (some sites do this)
-        if next_url == current_url:
+        if canonical_url(next_url) == canonical_url(current_url):
             logger.debug(f"Rejected same URL: {next_url}")
             return False
 
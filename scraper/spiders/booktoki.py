@@ -7,6 +7,8 @@ class BookTokiSpider(BaseNovelSpider):
     source_site = "booktoki"
     language = "korean"
     allowed_domains = ["booktoki469.com"]
+    # Chapters sit behind a Cloudflare JavaScript check
+    requires_js = True
 
     custom_settings = {
         "DOWNLOAD_DELAY": 8,
@@ -0,0 +1,422 @@
+import argparse
+import hashlib
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+import edit_journal
+import json_io
+
+INDEX_DIR_NAME = ".search_index"
+MANIFEST_NAME = "manifest.json"
+INDEX_VERSION = 1
+
+# Terms longer than this are truncated; the text check after lookup removes collisions
+TERM_WIDTH = 16
+LANGUAGE_CODES = {"korean": 0, "english": 1}
+LANGUAGE_NAMES = {code: name for name, code in LANGUAGE_CODES.items()}
+
+HANGUL_RUN = re.compile(r"[가-힣]+")
+WORD = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """
+    Index terms of a paragraph.
+
+    Hangul runs give character bigrams plus their last syllable (so one-syllable
+    queries find word endings too); everything else gives lowercase words.
+    """
+    terms = set()
+    for run in HANGUL_RUN.findall(text):
+        terms.update(run[i : i + 2] for i in range(len(run) - 1))
+        terms.add(run[-1])
+    for word in WORD.findall(HANGUL_RUN.sub(" ", text)):
+        terms.add(word.lower()[:TERM_WIDTH])
+    return terms
+
+
+def query_terms(query):
+    """
+    Split a query into (exact terms, prefix terms).
+
+    Every term must match. Single Hangul syllables and the last word (typing in
+    progress) match as prefixes.
+    """
+    exact, prefixes = set(), set()
+    for run in HANGUL_RUN.findall(query):
+        if len(run) == 1:
+            prefixes.add(run)
+        else:
+            exact.update(run[i : i + 2] for i in range(len(run) - 1))
+
+    words = [w.lower()[:TERM_WIDTH] for w in WORD.findall(HANGUL_RUN.sub(" ", query))]
+    if words:
+        exact.update(words[:-1])
+        if query.rstrip() and not query[-1].isspace():
+            prefixes.add(words[-1])
+        else:
+            exact.add(words[-1])
+
+    return exact, prefixes
+
+
+def split_paragraphs(content):
+    """Non-empty, stripped lines of a chapter, as shown in the editors"""
+    return [line.strip() for line in (content or "").split("\n") if line.strip()]
+
+
+def iter_chapter_texts(data, file_path):
+    """Yield (chapter_idx, language, content) for a chapter list or aligned file"""
+    if not isinstance(data, list):
+        return
+
+    default_language = None
+    for language in LANGUAGE_CODES:
+        if language in Path(file_path).name.lower():
+            default_language = language
+
+    for idx, entry in enumerate(data):
+        if not isinstance(entry, dict):
+            continue
+        if "korean" in entry or "english" in entry:
+            for language in LANGUAGE_CODES:
+                chapter = entry.get(language)
+                if isinstance(chapter, dict):
+                    yield idx, language, chapter.get("content", "")
+        elif "content" in entry:
+            language = entry.get("language") or default_language
+            if language in LANGUAGE_CODES:
+                yield idx, language, entry.get("content", "")
+
+
+def source_signature(file_path):
+    """Stat of a source file and its edit journal; the segment is rebuilt when it changes"""
+    stat = os.stat(file_path)
+    signature = [stat.st_mtime_ns, stat.st_size]
+    journal = edit_journal.journal_path(file_path)
+    if journal.exists():
+        journal_stat = os.stat(journal)
+        signature += [journal_stat.st_mtime_ns, journal_stat.st_size]
+    return signature
+
+
+class Segment:
+    """
+    Index of one source file, memory-mapped from disk.
+
+    terms.npy     sorted terms (fixed-width unicode)
+    starts.npy    postings range of terms[i] is postings[starts[i]:starts[i + 1]]
+    postings.npy  paragraph ids, sorted within each term
+    paragraphs.npy  (chapter_idx, language code, paragraph_idx, text offset) per id
+    text.jsonl    one JSON string per paragraph, for the final text check
+    """
+
+    FILES = ("terms.npy", "starts.npy", "postings.npy", "paragraphs.npy", "text.jsonl")
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.terms = np.load(self.path / "terms.npy", mmap_mode="r")
+        self.starts = np.load(self.path / "starts.npy", mmap_mode="r")
+        self.postings = np.load(self.path / "postings.npy", mmap_mode="r")
+        self.paragraphs = np.load(self.path / "paragraphs.npy", mmap_mode="r")
+
+    @staticmethod
+    def build(path, data, file_path):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        postings = {}
+        rows = []
+        offset = 0
+        with open(path / "text.jsonl.tmp", "wb") as f:
+            for chapter_idx, language, content in iter_chapter_texts(data, file_path):
+                for para_idx, paragraph in enumerate(split_paragraphs(content)):
+                    pid = len(rows)
+                    rows.append(
+                        (chapter_idx, LANGUAGE_CODES[language], para_idx, offset)
+                    )
+                    line = json_io.dumps(paragraph) + b"\n"
+                    f.write(line)
+                    offset += len(line)
+                    for term in tokenize(paragraph):
+                        postings.setdefault(term, []).append(pid)
+
+        terms = sorted(postings)
+        starts = np.zeros(len(terms) + 1, dtype=np.int64)
+        starts[1:] = np.cumsum([len(postings[t]) for t in terms])
+        flat = np.fromiter(
+            (pid for t in terms for pid in postings[t]),
+            dtype=np.uint32,
+            count=starts[-1],
+        )
+
+        arrays = {
+            "terms.npy": np.array(terms, dtype=f"<U{TERM_WIDTH}"),
+            "starts.npy": starts,
+            "postings.npy": flat,
+            "paragraphs.npy": np.array(rows, dtype=np.int64).reshape(-1, 4),
+        }
+        for name, array in arrays.items():
+            with open(path / f"{name}.tmp", "wb") as f:
+                np.save(f, array)
+        for name in Segment.FILES:
+            os.replace(path / f"{name}.tmp", path / name)
+
+        return len(rows)
+
+    def _term_postings(self, term):
+        i = np.searchsorted(self.terms, term)
+        if i < len(self.terms) and self.terms[i] == term:
+            return self.postings[self.starts[i] : self.starts[i + 1]]
+        return np.empty(0, dtype=np.uint32)
+
+    def _prefix_postings(self, prefix):
+        lo = np.searchsorted(self.terms, prefix, side="left")
+        hi = np.searchsorted(self.terms, prefix + "\U0010ffff", side="left")
+        if lo == hi:
+            return np.empty(0, dtype=np.uint32)
+        return np.unique(self.postings[self.starts[lo] : self.starts[hi]])
+
+    def candidates(self, exact, prefixes):
+        """Paragraph ids containing every term, smallest postings list first"""
+        lists = [self._term_postings(t) for t in exact]
+        lists += [self._prefix_postings(p) for p in prefixes]
+        if not lists:
+            return np.empty(0, dtype=np.uint32)
+
+        lists.sort(key=len)
+        result = np.asarray(lists[0])
+        for postings in lists[1:]:
+            if not len(result):
+                break
+            result = np.intersect1d(result, postings, assume_unique=True)
+        return result
+
+    def paragraph_text(self, f, pid):
+        f.seek(int(self.paragraphs[pid, 3]))
+        return json_io.loads(f.readline())
+
+
+class SearchIndex:
+    """
+    Full-text index over every chapter list and aligned file under a directory.
+
+    Each source file gets its own segment, rebuilt only when the file (or its edit
+    journal) changes, so keeping the index current costs one stat per file.
+    """
+
+    def __init__(self, root="output"):
+        self.root = Path(root)
+        self.index_dir = self.root / INDEX_DIR_NAME
+        self.manifest = self._load_manifest()
+        self.segments = {}
+        # Streamlit sessions share one index; updates and lookups must not interleave
+        self._lock = threading.RLock()
+
+    def _load_manifest(self):
+        path = self.index_dir / MANIFEST_NAME
+        if path.exists():
+            manifest = json_io.read_json(path)
+            if manifest.get("version") == INDEX_VERSION:
+                return manifest
+        return {"version": INDEX_VERSION, "files": {}}
+
+    def source_files(self):
+        files = []
+        for path in sorted(self.root.rglob("*.json")):
+            relative = path.relative_to(self.root)
+            if relative.parts[0] == INDEX_DIR_NAME or path.name.startswith("."):
+                continue
+            if "indices" in path.name or path.name.endswith("_report.json"):
+                continue
+            files.append(path)
+        return files
+
+    def update(self, progress=None):
+        """
+        Bring the index in line with the files on disk.
+
+        Returns the list of source files that were (re)indexed.
+        """
+        with self._lock:
+            return self._update(progress)
+
+    def _update(self, progress):
+        files = self.source_files()
+        current = {str(p.relative_to(self.root)) for p in files}
+        changed = []
+
+        for relative in list(self.manifest["files"]):
+            if relative not in current:
+                entry = self.manifest["files"].pop(relative)
+                self._remove_segment(entry["segment"])
+
+        for i, path in enumerate(files):
+            relative = str(path.relative_to(self.root))
+            signature = source_signature(path)
+            entry = self.manifest["files"].get(relative)
+            if entry and entry["signature"] == signature:
+                continue
+
+            if progress:
+                progress(i, len(files), relative)
+
+            segment_id = hashlib.sha1(relative.encode("utf-8")).hexdigest()[:16]
+            self.segments.pop(segment_id, None)
+            if path.suffix == ".json":
+                data = edit_journal.load(path)
+            else:
+                data = json_io.read_json(path)
+
+            count = Segment.build(self.index_dir / segment_id, data, path)
+            self.manifest["files"][relative] = {
+                "signature": signature,
+                "segment": segment_id,
+                "paragraphs": count,
+            }
+            changed.append(path)
+
+        if changed or not (self.index_dir / MANIFEST_NAME).exists():
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            json_io.write_json(self.index_dir / MANIFEST_NAME, self.manifest)
+
+        return changed
+
+    def _remove_segment(self, segment_id):
+        self.segments.pop(segment_id, None)
+        for name in Segment.FILES:
+            path = self.index_dir / segment_id / name
+            if path.exists():
+                path.unlink()
+        if (self.index_dir / segment_id).exists():
+            (self.index_dir / segment_id).rmdir()
+
+    def _segment(self, segment_id):
+        if segment_id not in self.segments:
+            self.segments[segment_id] = Segment(self.index_dir / segment_id)
+        return self.segments[segment_id]
+
+    def search(self, query, limit=50, files=None, language=None):
+        """
+        Find paragraphs containing query (case-insensitive).
+
+        Args:
+            query: Text to look for; Korean matches anywhere, English by word
+            limit: Maximum number of hits
+            files: Only search these source files (paths), default all
+            language: "korean" or "english" to search one side only
+
+        Returns:
+            [{"file", "chapter", "language", "paragraph", "text"}, ...] in file order
+        """
+        with self._lock:
+            return self._search(query, limit, files, language)
+
+    def _search(self, query, limit, files, language):
+        exact, prefixes = query_terms(query)
+        if not exact and not prefixes:
+            return []
+
+        needle = query.strip().lower()
+        wanted = {str(Path(p).resolve()) for p in files} if files else None
+        hits = []
+
+        for relative, entry in sorted(self.manifest["files"].items()):
+            source = self.root / relative
+            if wanted is not None and str(source.resolve()) not in wanted:
+                continue
+
+            segment = self._segment(entry["segment"])
+            pids = segment.candidates(exact, prefixes)
+            if not len(pids):
+                continue
+
+            with open(segment.path / "text.jsonl", "rb") as f:
+                for pid in pids:
+                    chapter_idx, code, para_idx, _ = segment.paragraphs[pid]
+                    if language and LANGUAGE_NAMES[int(code)] != language:
+                        continue
+                    text = segment.paragraph_text(f, pid)
+                    if needle not in text.lower():
+                        continue
+                    hits.append(
+                        {
+                            "file": str(source),
+                            "chapter": int(chapter_idx),
+                            "language": LANGUAGE_NAMES[int(code)],
+                            "paragraph": int(para_idx),
+                            "text": text,
+                        }
+                    )
+                    if len(hits) >= limit:
+                        return hits
+
+        return hits
+
+
+def snippet(text, query, width=80):
+    """Cut text around the first match of query"""
+    pos = text.lower().find(query.strip().lower())
+    if pos < 0 or len(text) <= width:
+        return text[:width]
+    start = max(0, pos - width // 3)
+    end = min(len(text), start + width)
+    return ("…" if start else "") + text[start:end] + ("…" if end < len(text) else "")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Build the chapter search index and query it from the command line."
+    )
+
+    parser.add_argument(
+        "query",
+        nargs="?",
+        help="Text to search for (omit to only update the index)",
+    )
+    parser.add_argument(
+        "--root",
+        type=str,
+        default="output",
+        help="Directory with chapter and aligned files (default: output)",
+    )
+    parser.add_argument(
+        "--language",
+        choices=sorted(LANGUAGE_CODES),
+        default=None,
+        help="Only search one language",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="Maximum number of hits (default: 50)",
+    )
+
+    args = parser.parse_args()
+
+    index = SearchIndex(args.root)
+    start = time.time()
+    changed = index.update(
+        progress=lambda i, n, name: print(f"   indexing [{i + 1}/{n}] {name}")
+    )
+    print(
+        f"✓ Index up to date ({len(changed)} file(s) reindexed in {time.time() - start:.2f}s)"
+    )
+
+    if args.query:
+        start = time.time()
+        hits = index.search(args.query, limit=args.limit, language=args.language)
+        elapsed = (time.time() - start) * 1000
+        for hit in hits:
+            name = Path(hit["file"]).relative_to(args.root)
+            print(
+                f"{name} · chapter {hit['chapter'] + 1} · {hit['language']} "
+                f"¶{hit['paragraph'] + 1}: {snippet(hit['text'], args.query)}"
+            )
+        print(f"\n{len(hits)} hit(s) in {elapsed:.1f} ms")
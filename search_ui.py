@@ -0,0 +1,24 @@
+"""
+Corpus search for the Streamlit apps (edit.py, manual_align.py).
+"""
+
+import streamlit as st
+
+import search_index
+
+# Hits shown per query
+SEARCH_LIMIT = 50
+
+
+@st.cache_resource(show_spinner=False)
+def get_search_index(root="output"):
+    """One search index per process, shared by all sessions"""
+    return search_index.SearchIndex(root)
+
+
+def search_corpus(query, files=None, root="output", limit=SEARCH_LIMIT):
+    """Search every chapter under root, reindexing files that changed first"""
+    index = get_search_index(root)
+    with st.spinner("Updating search index..."):
+        index.update()
+    return index.search(query, limit=limit, files=files)
@@ -0,0 +1,298 @@
+"""
+Alignment check for existing aligned.json files.
+
+Every Korean chapter is scored against the English chapters of the pairs around it
+(±k) with signals that survive translation: numbers and acronyms, [bracketed] system
+text, and a paragraph profile of where dialogue and brackets fall in the chapter.
+Runs of pairs whose neighbour fits better than their own partner are reported as
+suspect ranges, starting where the drift begins.
+"""
+
+import argparse
+import re
+import time
+import zlib
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+import json_io
+from align_suggest import FINGERPRINT_BITS, anchor_tokens
+from prepare_data import clean_text
+from quality_filter import load_pairs
+
+NEIGHBOURS = 3
+# A neighbour has to beat the pair's own score by this much to count
+MARGIN = 0.15
+# Pairs averaged when looking for drift
+WINDOW = 3
+
+BRACKET_PATTERN = re.compile(r"\[([^\[\]\n]*)\]")
+SPEECH_STARTS = ('"', "'", "[")
+PROFILE_BINS = 32
+PROFILE_SAMPLES = 16
+
+# Relative weight of each signal (tuned on output/ aligned files)
+PROFILE_WEIGHT = 0.6
+ANCHOR_WEIGHT = 0.25
+BRACKET_WEIGHT = 0.15
+
+
+def speech_profile(text: str) -> np.ndarray:
+    """
+    Share of each stretch of the chapter that is dialogue or bracket text.
+
+    Positions are measured in characters, so a paragraph counts by its length and
+    the profile survives translators splitting or merging paragraphs.
+    """
+    lines = [line for line in text.split("\n") if line.strip()]
+    if not lines:
+        return np.zeros(PROFILE_BINS)
+
+    lengths = np.array([len(line) for line in lines], dtype=np.float64)
+    bounds = np.concatenate(([0], np.cumsum(lengths))) / lengths.sum()
+    speech = np.array([line.startswith(SPEECH_STARTS) for line in lines], float)
+
+    samples = (np.arange(PROFILE_BINS * PROFILE_SAMPLES) + 0.5) / (
+        PROFILE_BINS * PROFILE_SAMPLES
+    )
+    owner = np.clip(
+        np.searchsorted(bounds, samples, side="right") - 1, 0, len(lines) - 1
+    )
+    return speech[owner].reshape(PROFILE_BINS, PROFILE_SAMPLES).mean(axis=1)
+
+
+def chapter_features(texts: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    Per-chapter signals for one side of a novel.
+
+    Profiles are centred and scaled so a dot product is their correlation.
+    """
+    n = len(texts)
+    profiles = np.zeros((n, PROFILE_BINS))
+    fingerprints = np.zeros((n, FINGERPRINT_BITS), dtype=bool)
+    brackets = np.zeros(n)
+
+    for i, text in enumerate(texts):
+        profiles[i] = speech_profile(text)
+
+        bracketed = BRACKET_PATTERN.findall(text)
+        brackets[i] = len(bracketed)
+
+        # Bracket text contributes its numbers and acronyms like any other text
+        for token in anchor_tokens(text):
+            fingerprints[i, zlib.crc32(token.encode("utf-8")) % FINGERPRINT_BITS] = True
+
+    profiles -= profiles.mean(axis=1, keepdims=True)
+    norms = np.linalg.norm(profiles, axis=1, keepdims=True)
+    profiles = np.divide(profiles, norms, out=np.zeros_like(profiles), where=norms > 0)
+
+    return {"profile": profiles, "fingerprint": fingerprints, "brackets": brackets}
+
+
+def score_neighbours(
+    korean_features: Dict[str, np.ndarray],
+    english_features: Dict[str, np.ndarray],
+    neighbours: int = NEIGHBOURS,
+) -> np.ndarray:
+    """
+    Score Korean chapter i against English chapters i-k..i+k.
+
+    Returns an (n, 2k + 1) array; column k + d holds the score of (i, i + d) and
+    slots outside the file are -inf. A signal that is absent on both sides (no
+    numbers, no brackets) is left out of that pair's weighted mean.
+    """
+    n = len(korean_features["brackets"])
+    offsets = np.arange(-neighbours, neighbours + 1)
+    candidates = np.arange(n)[:, None] + offsets[None, :]
+    valid = (candidates >= 0) & (candidates < n)
+    safe = np.clip(candidates, 0, max(n - 1, 0))
+
+    profile = np.einsum(
+        "ib,ijb->ij", korean_features["profile"], english_features["profile"][safe]
+    )
+    profile = np.clip(profile, 0, 1)
+
+    kr_bits = korean_features["fingerprint"][:, None, :]
+    en_bits = english_features["fingerprint"][safe]
+    union = (kr_bits | en_bits).sum(axis=-1)
+    anchors = (kr_bits & en_bits).sum(axis=-1) / np.maximum(union, 1)
+
+    kr_brackets = korean_features["brackets"][:, None]
+    en_brackets = english_features["brackets"][safe]
+    most = np.maximum(kr_brackets, en_brackets)
+    brackets = 1 - np.abs(kr_brackets - en_brackets) / np.maximum(most, 1)
+
+    anchor_weight = np.where(union > 0, ANCHOR_WEIGHT, 0)
+    bracket_weight = np.where(most > 0, BRACKET_WEIGHT, 0)
+    scores = (
+        PROFILE_WEIGHT * profile + anchor_weight * anchors + bracket_weight * brackets
+    ) / (PROFILE_WEIGHT + anchor_weight + bracket_weight)
+
+    return np.where(valid, scores, -np.inf)
+
+
+def smooth(scores: np.ndarray, window: int = WINDOW) -> np.ndarray:
+    """Average each offset's scores over a window of pairs; drift persists, noise doesn't"""
+    finite = np.isfinite(scores)
+    kernel = np.ones(window)
+    total = np.apply_along_axis(
+        np.convolve, 0, np.where(finite, scores, 0), kernel, "same"
+    )
+    count = np.apply_along_axis(np.convolve, 0, finite.astype(float), kernel, "same")
+    return np.where(finite, total / np.maximum(count, 1), -np.inf)
+
+
+def _best(scores: np.ndarray, neighbours: int, margin: float):
+    """Best offset per pair, its score, the own score and whether it is a clear win"""
+    own = scores[:, neighbours]
+    best = np.argmax(scores, axis=1)
+    best_scores = scores[np.arange(len(scores)), best]
+    offsets = best - neighbours
+    return offsets, best_scores, own, (offsets != 0) & (best_scores - own > margin)
+
+
+def suspect_ranges(
+    scores: np.ndarray, neighbours: int = NEIGHBOURS, margin: float = MARGIN
+) -> List[Dict]:
+    """
+    Find drifted runs and swapped pairs.
+
+    Drift is read from window-smoothed scores, then its start is walked back to
+    the first pair that already shows the same offset on its own. Offset d means
+    Korean chapter i reads like English chapter i + d. Swaps are pairs that are
+    each other's clear best match.
+    """
+    n = len(scores)
+    offsets, best_scores, own, suspect = _best(smooth(scores), neighbours, margin)
+    raw_offsets, raw_best, raw_own, raw_suspect = _best(scores, neighbours, margin)
+
+    ranges = []
+    for i in np.flatnonzero(suspect):
+        if ranges and ranges[-1]["end"] == i - 1:
+            ranges[-1]["end"] = int(i)
+        else:
+            ranges.append({"kind": "drift", "start": int(i), "end": int(i)})
+
+    for r in ranges:
+        rows = slice(r["start"], r["end"] + 1)
+        r["offset"] = Counter(offsets[rows].tolist()).most_common(1)[0][0]
+        while (
+            r["start"] > 0
+            and raw_suspect[r["start"] - 1]
+            and raw_offsets[r["start"] - 1] == r["offset"]
+        ):
+            r["start"] -= 1
+
+    covered = np.zeros(n, dtype=bool)
+    for r in ranges:
+        covered[r["start"] : r["end"] + 1] = True
+
+    for i in np.flatnonzero(raw_suspect & ~covered):
+        j = i + raw_offsets[i]
+        if j > i and raw_suspect[j] and not covered[j] and j + raw_offsets[j] == i:
+            ranges.append(
+                {"kind": "swap", "start": int(i), "end": int(j), "offset": int(j - i)}
+            )
+
+    for r in ranges:
+        rows = slice(r["start"], r["end"] + 1)
+        r["own_score"] = round(float(raw_own[rows].mean()), 3)
+        r["best_score"] = round(float(raw_best[rows].mean()), 3)
+
+    return sorted(ranges, key=lambda r: r["start"])
+
+
+def verify_file(aligned_file, neighbours: int = NEIGHBOURS, margin: float = MARGIN):
+    """Report entry for one aligned file, pending journal edits included"""
+    pairs = load_pairs(aligned_file)
+    korean = chapter_features([clean_text(p["korean"] or "") for p in pairs])
+    english = chapter_features([clean_text(p["english"] or "") for p in pairs])
+
+    ranges = []
+    if pairs:
+        scores = score_neighbours(korean, english, neighbours)
+        ranges = suspect_ranges(scores, neighbours, margin)
+
+    return {"file": str(aligned_file), "pairs": len(pairs), "ranges": ranges}
+
+
+def describe_range(r: Dict) -> str:
+    """One line for a suspect range, chapter numbers 1-based as in the editor"""
+    start, end = r["start"] + 1, r["end"] + 1
+    scores = f"(own {r['own_score']:.2f} vs {r['best_score']:.2f})"
+    if r["kind"] == "swap":
+        return f"Chapters {start} and {end}: English looks swapped {scores}"
+    chapters = f"Chapter {start}" if start == end else f"Chapters {start}-{end}"
+    return f"{chapters}: drifted, Korean matches English {r['offset']:+d} {scores}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Find pairs in aligned files that match a neighbouring chapter better."
+    )
+
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="output",
+        help="Directory holding one folder per novel (default: output)",
+    )
+    parser.add_argument(
+        "--neighbours",
+        type=int,
+        default=NEIGHBOURS,
+        help=f"Chapters compared on each side of a pair (default: {NEIGHBOURS})",
+    )
+    parser.add_argument(
+        "--margin",
+        type=float,
+        default=MARGIN,
+        help=f"Score lead a neighbour needs to flag a pair (default: {MARGIN})",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Novels checked in parallel (default: CPU count)",
+    )
+    parser.add_argument(
+        "--report",
+        type=str,
+        default=None,
+        help="Also save the suspect ranges as JSON to this file",
+    )
+
+    args = parser.parse_args()
+
+    start = time.time()
+    aligned_files = sorted(Path(args.output_dir).rglob("aligned.json"))
+    report = {}
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        entries = executor.map(
+            verify_file,
+            aligned_files,
+            [args.neighbours] * len(aligned_files),
+            [args.margin] * len(aligned_files),
+        )
+        for aligned_file, entry in zip(aligned_files, entries):
+            report[aligned_file.parent.name] = entry
+            ranges = entry["ranges"]
+            status = f"{len(ranges)} suspect range(s)" if ranges else "✓ no drift"
+            print(f"{aligned_file.parent.name} ({entry['pairs']} pairs): {status}")
+            for r in ranges:
+                print(f"   {describe_range(r)}")
+
+    if args.report:
+        json_io.write_json(args.report, report)
+        print(f"\n📝 Report saved to {args.report}")
+
+    total = sum(len(entry["ranges"]) for entry in report.values())
+    print(
+        f"\n✅ Checked {len(aligned_files)} novel(s) in {time.time() - start:.2f}s, "
+        f"{total} suspect range(s)"
+    )